@@ -10,6 +10,56 @@ class RAGConfig(BaseModel):
     scrape_delay: float = 1.0
     user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     vector_similarity_threshold: float = float(os.getenv("VECTOR_SIMILARITY_THRESHOLD", "50.0"))
+    vector_index_type: str = os.getenv("VECTOR_INDEX_TYPE", "flat").lower()
+    ivf_nlist: int = int(os.getenv("VECTOR_IVF_NLIST", "256"))
+    ivf_nprobe: int = int(os.getenv("VECTOR_IVF_NPROBE", "16"))
+    hnsw_m: int = int(os.getenv("VECTOR_HNSW_M", "32"))
+    hnsw_ef_construction: int = int(os.getenv("VECTOR_HNSW_EF_CONSTRUCTION", "200"))
+    hnsw_ef_search: int = int(os.getenv("VECTOR_HNSW_EF_SEARCH", "128"))
+    pq_m: int = int(os.getenv("VECTOR_PQ_M", "48"))
+    pq_nbits: int = int(os.getenv("VECTOR_PQ_NBITS", "8"))
+    vector_storage: str = os.getenv("VECTOR_STORAGE", "float32").lower()
+    vector_rescore_factor: int = int(os.getenv("VECTOR_RESCORE_FACTOR", "0"))
+    vector_filter_exact_limit: int = int(os.getenv("VECTOR_FILTER_EXACT_LIMIT", "2048"))
+    vector_index_retention: int = int(os.getenv("VECTOR_INDEX_RETENTION", "3"))
+    vector_index_verify: bool = os.getenv("VECTOR_INDEX_VERIFY", "false").lower() == "true"
+    bm25_k1: float = float(os.getenv("BM25_K1", "1.2"))
+    bm25_b: float = float(os.getenv("BM25_B", "0.75"))
+    bm25_title_weight: float = float(os.getenv("BM25_TITLE_WEIGHT", "2.0"))
+    bm25_campaign_id_weight: float = float(os.getenv("BM25_CAMPAIGN_ID_WEIGHT", "3.0"))
+    vector_index_mmap: bool = os.getenv("VECTOR_INDEX_MMAP", "false").lower() == "true"
+    vector_fetch_factor: int = int(os.getenv("VECTOR_FETCH_FACTOR", "15"))
+    hybrid_vector_factor: int = int(os.getenv("HYBRID_VECTOR_FACTOR", "15"))
+    hybrid_keyword_factor: int = int(os.getenv("HYBRID_KEYWORD_FACTOR", "5"))
+    hybrid_adaptive: bool = os.getenv("HYBRID_ADAPTIVE", "false").lower() == "true"
+    hybrid_confidence: float = float(os.getenv("HYBRID_CONFIDENCE", "0.7"))
+    hybrid_fusion: str = os.getenv("HYBRID_FUSION", "heuristic").lower()
+    hybrid_vector_weight: float = float(os.getenv("HYBRID_VECTOR_WEIGHT", "1.0"))
+    hybrid_keyword_weight: float = float(os.getenv("HYBRID_KEYWORD_WEIGHT", "1.0"))
+    hybrid_fuzzy_factor: int = int(os.getenv("HYBRID_FUZZY_FACTOR", "0"))
+    hybrid_fuzzy_weight: float = float(os.getenv("HYBRID_FUZZY_WEIGHT", "1.0"))
+    fuzzy_min_similarity: float = float(os.getenv("FUZZY_MIN_SIMILARITY", "0.6"))
+    rrf_k: int = int(os.getenv("RRF_K", "60"))
+    hybrid_workers: int = int(os.getenv("HYBRID_WORKERS", "8"))
+    hybrid_vector_timeout: float = float(os.getenv("HYBRID_VECTOR_TIMEOUT", "10"))
+    hybrid_keyword_timeout: float = float(os.getenv("HYBRID_KEYWORD_TIMEOUT", "5"))
+    rerank_model: str = os.getenv("RERANK_MODEL", "")
+    rerank_backend: str = os.getenv("RERANK_BACKEND", "onnx").lower()
+    rerank_model_file: str = os.getenv("RERANK_MODEL_FILE", "")
+    rerank_top_n: int = int(os.getenv("RERANK_TOP_N", "20"))
+    rerank_budget_ms: float = float(os.getenv("RERANK_BUDGET_MS", "150"))
+    rerank_batch_size: int = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+    rerank_max_length: int = int(os.getenv("RERANK_MAX_LENGTH", "256"))
+    diversify: bool = os.getenv("DIVERSIFY", "false").lower() == "true"
+    diversify_fetch_factor: int = int(os.getenv("DIVERSIFY_FETCH_FACTOR", "3"))
+    diversify_per_campaign: int = int(os.getenv("DIVERSIFY_PER_CAMPAIGN", "2"))
+    diversify_max_similarity: float = float(os.getenv("DIVERSIFY_MAX_SIMILARITY", "0.95"))
+    mmr_lambda: float = float(os.getenv("MMR_LAMBDA", "0.7"))
+    query_cache_size: int = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+    query_cache_ttl: float = float(os.getenv("QUERY_CACHE_TTL", "300"))
+    answer_cache_ttl: float = float(os.getenv("ANSWER_CACHE_TTL", "300"))
+    semantic_cache_size: int = int(os.getenv("SEMANTIC_CACHE_SIZE", "0"))
+    semantic_cache_distance: float = float(os.getenv("SEMANTIC_CACHE_DISTANCE", "0.05"))
 
 config = RAGConfig()
 
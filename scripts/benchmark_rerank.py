@@ -0,0 +1,229 @@
+"""Benchmark Retriever.rerank and the hybrid_search rescoring against the per-candidate loop they replaced
+
+Usage: python scripts/benchmark_rerank.py [--candidates 1125] [--repeat 20]
+
+Runs on a synthetic corpus, so no embedding model or index on disk is needed.
+Also checks that both implementations produce the same scores and order.
+"""
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+from services.rag.vector_store import VectorStore
+from services.rag.retriever import Retriever, VectorRanking
+from services.rag.preprocessing import analyze_query
+from services.rag.keyword_index import ChunkFields
+
+QUERIES = ["oto kampanyası", "Otoking", "kredi kartı indirim", "market alışverişi puan"]
+
+WORDS = ["kampanya", "kampanyası", "indirim", "puan", "kredi", "kartı", "market", "alışverişi", "taksit",
+         "auto", "king", "otoking", "opet", "akaryakıt", "fırsatı", "müşteri", "teb", "bonus", "%10", "iade"]
+
+def make_corpus(n: int, dimension: int = 16):
+    rng = np.random.default_rng(0)
+    chunks = []
+    for i in range(n):
+        title_words = rng.choice(WORDS, size=3)
+        chunks.append({
+            "text": " ".join(rng.choice(WORDS, size=60)),
+            "title": " ".join(title_words).title(),
+            "campaign_id": "-".join(title_words[:2]) + f"-{i // 5}",
+            "chunk_index": i % 5,
+            "type": "title_description" if i % 5 == 0 else "cleaned_text"
+        })
+    return rng.random((n, dimension)).astype('float32'), chunks
+
+def legacy_word_overlap(query_words: set, query_token_ids: np.ndarray, fields: ChunkFields) -> int:
+    """Per-chunk word overlap the vectorized Retriever._word_overlaps replaced: number of query words among the chunk's text tokens"""
+    if fields.token_ids is None:
+        return len(query_words & fields.words)
+    return int(np.count_nonzero(np.isin(fields.token_ids, query_token_ids, assume_unique=True)))
+
+def legacy_rerank(retriever: Retriever, query: str, results):
+    """Retriever.rerank before vectorization"""
+    analysis = analyze_query(query)
+    matcher = analysis.matcher
+    query_lower = analysis.query_lower
+    query_words = analysis.query_words
+
+    all_fields = retriever._result_fields(results)
+    query_token_ids = retriever.vector_store.keyword_index.lookup(query_words)
+
+    for result, fields in zip(results, all_fields):
+        text, title, campaign_id = fields.text, fields.title, fields.campaign_id
+        exact_overlap = legacy_word_overlap(query_words, query_token_ids, fields)
+        variation_match, variation_in_title, variation_in_id = matcher.match_fields(text, title, campaign_id)
+
+        semantic_distance = result.get("score", float('inf'))
+        if semantic_distance < float('inf'):
+            max_distance = max(retriever.similarity_threshold, 10.0)
+            normalized_distance = min(semantic_distance / max_distance, 1.0) if max_distance > 0 else 1.0
+            semantic_similarity = 1.0 - normalized_distance
+        else:
+            semantic_similarity = 0.0
+
+        word_match_score = exact_overlap / max(len(query_words), 1) if query_words else 0.0
+
+        exact_match_in_title = query_lower in title if title else False
+        exact_match_in_id = query_lower in campaign_id if campaign_id else False
+        exact_match_in_text = query_lower in text if text else False
+
+        key_words_in_title = sum(1 for word in query_words if word in title) if title else 0
+        key_words_in_id = sum(1 for word in query_words if word in campaign_id) if campaign_id else 0
+
+        key_word_ratio_title = key_words_in_title / max(len(query_words), 1) if query_words else 0.0
+        key_word_ratio_id = key_words_in_id / max(len(query_words), 1) if query_words else 0.0
+
+        rerank_score = semantic_similarity * 0.4 + word_match_score * 0.3
+        if result.get("type", "") == "title_description":
+            rerank_score += 0.1
+
+        if exact_match_in_id:
+            rerank_score = min(max(rerank_score, 0.9), 0.98)
+        elif exact_match_in_title:
+            rerank_score = min(max(rerank_score, 0.8), 0.92)
+        elif exact_match_in_text:
+            rerank_score = min(max(rerank_score, 0.7), 0.85)
+        elif key_word_ratio_id >= 0.7:
+            rerank_score = min(max(rerank_score, 0.75), 0.88)
+        elif key_word_ratio_title >= 0.7:
+            rerank_score = min(max(rerank_score, 0.65), 0.82)
+        elif key_word_ratio_id >= 0.5:
+            rerank_score = min(max(rerank_score, 0.6), 0.78)
+        elif key_word_ratio_title >= 0.5:
+            rerank_score = min(max(rerank_score, 0.55), 0.72)
+        elif key_words_in_title > 0:
+            rerank_score += 0.2
+        elif key_words_in_id > 0:
+            rerank_score += 0.25
+
+        if variation_match:
+            rerank_score += 0.1
+        if variation_in_title:
+            rerank_score += 0.15
+        if variation_in_id:
+            rerank_score += 0.2
+
+        result["rerank_score"] = min(rerank_score, 0.99)
+
+    results.sort(key=lambda x: x.get("rerank_score", 0), reverse=True)
+    return results
+
+def legacy_hybrid_rescore(retriever: Retriever, query: str, combined, k: int):
+    """The rescoring loop of Retriever.hybrid_search before vectorization"""
+    analysis = analyze_query(query)
+    matcher = analysis.matcher
+    query_lower = analysis.query_lower
+    query_words = analysis.query_words
+
+    for result, fields in zip(combined, retriever._result_fields(combined)):
+        title, campaign_id = fields.title, fields.campaign_id
+
+        variation_in_title = matcher.search(title)
+        variation_in_id = matcher.search(campaign_id)
+
+        key_words_in_title = sum(1 for word in query_words if word in title) if title else 0
+        key_words_in_id = sum(1 for word in query_words if word in campaign_id) if campaign_id else 0
+        key_word_ratio_title = key_words_in_title / max(len(query_words), 1) if query_words else 0.0
+        key_word_ratio_id = key_words_in_id / max(len(query_words), 1) if query_words else 0.0
+
+        exact_match_in_title = query_lower in title if title else False
+        exact_match_in_id = query_lower in campaign_id if campaign_id else False
+
+        current_score = result.get("rerank_score", result.get("keyword_score", result.get("score", 0)))
+        if result.get("type", "") == "title_description":
+            current_score += 0.2
+
+        if exact_match_in_id:
+            current_score = min(max(current_score, 0.9), 0.98)
+        elif exact_match_in_title:
+            current_score = min(max(current_score, 0.8), 0.92)
+        elif key_word_ratio_id >= 0.7:
+            current_score = min(max(current_score, 0.75), 0.88)
+        elif key_word_ratio_title >= 0.7:
+            current_score = min(max(current_score, 0.65), 0.82)
+        elif key_word_ratio_id >= 0.5:
+            current_score = min(max(current_score, 0.6), 0.78)
+        elif key_word_ratio_title >= 0.5:
+            current_score = min(max(current_score, 0.55), 0.72)
+        elif key_words_in_title > 0:
+            current_score += 0.2
+        elif key_words_in_id > 0:
+            current_score += 0.25
+
+        if variation_in_title:
+            current_score += 0.2
+        if variation_in_id:
+            current_score += 0.3
+
+        result["rerank_score"] = min(current_score, 0.99)
+
+    return sorted(combined, key=lambda x: x.get("rerank_score", x.get("keyword_score", x.get("score", float('inf')))), reverse=True)[:k]
+
+def candidate_rows(store: VectorStore, count: int, seed: int):
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(store.chunks), size=count, replace=False)
+    return rows.astype(np.int64), rng.uniform(0, 20, size=count)
+
+def candidates(store: VectorStore, count: int, seed: int):
+    rows, scores = candidate_rows(store, count, seed)
+    results = []
+    for row, score in zip(rows.tolist(), scores.tolist()):
+        result = store.chunk_result(row)
+        result["score"] = score
+        results.append(result)
+    return results
+
+def timed(function, make_input, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        data = make_input()
+        start = time.perf_counter()
+        output = function(data)
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+def same_ranking(expected, actual) -> bool:
+    return ([result["chunk_id"] for result in expected] == [result["chunk_id"] for result in actual]
+            and np.allclose([result["rerank_score"] for result in expected], [result["rerank_score"] for result in actual], rtol=0, atol=1e-12))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=int, default=5000, help="Number of chunks")
+    parser.add_argument("--candidates", type=int, default=1125, help="Candidates per query (hybrid_search(k=5) reranks k*15*15)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    vectors, chunks = make_corpus(args.corpus)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VectorStore(dimension=vectors.shape[1], index_base_path=tmp)
+        store.add_vectors(vectors, chunks)
+        store.keyword_index
+        retriever = Retriever(store, embedding_service=None)
+
+        print(f"{'query':<26}{'stage':<9}{'loop ms':>10}{'numpy ms':>10}{'speedup':>9}  same")
+        for seed, query in enumerate(QUERIES):
+            make_input = lambda: candidates(store, args.candidates, seed)
+            loop_time, expected = timed(lambda results: legacy_rerank(retriever, query, results), make_input, args.repeat)
+            numpy_time, actual = timed(lambda results: retriever.rerank(query, results), make_input, args.repeat)
+            print(f"{query:<26}{'rerank':<9}{loop_time * 1000:>10.2f}{numpy_time * 1000:>10.2f}{loop_time / numpy_time:>8.1f}x  {same_ranking(expected, actual)}")
+
+            # The legacy loop rescored result dicts; hybrid_search now gets the same candidates as vector stage rows
+            def hybrid(candidates):
+                rows, scores = candidates
+                retriever.embed_query = lambda query: None
+                retriever._vector_ranking = lambda *args, **kwargs: VectorRanking(rows, scores, np.arange(len(rows)), scores)
+                retriever._keyword_ranking = lambda *args, **kwargs: (np.zeros(0, dtype=np.int64), np.zeros(0))
+                return Retriever.hybrid_search(retriever, query, k=5)
+            loop_time, expected = timed(lambda combined: legacy_hybrid_rescore(retriever, query, combined, 5), make_input, args.repeat)
+            numpy_time, actual = timed(hybrid, lambda: candidate_rows(store, args.candidates, seed), args.repeat)
+            print(f"{query:<26}{'hybrid':<9}{loop_time * 1000:>10.2f}{numpy_time * 1000:>10.2f}{loop_time / numpy_time:>8.1f}x  {same_ranking(expected, actual)}")
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@ from pydantic import BaseModel
 import httpx
 import logging
 import os
-from typing import Optional
+from typing import Optional, List
 from services.rag.data_pipeline import DataPipeline
 
 logging.basicConfig(level=logging.INFO)
@@ -26,6 +26,12 @@ class TextQueryRequest(BaseModel):
     k: int = 5
     search_strategy: str = "hybrid"
     similarity_threshold: Optional[float] = None
+    campaign_ids: Optional[List[str]] = None
+    chunk_types: Optional[List[str]] = None
+    indexed_after: Optional[str] = None
+    indexed_before: Optional[str] = None
+    fusion: Optional[str] = None
+    diversify: Optional[bool] = None
 
 class VoiceQueryResponse(BaseModel):
     transcription: str
@@ -88,11 +94,18 @@ async def call_stt_service(audio_content: bytes, filename: str) -> dict:
         response.raise_for_status()
         return response.json()
 
-async def call_rag_service(question: str, k: int = 5, search_strategy: str = "hybrid", similarity_threshold: Optional[float] = None) -> dict:
+async def call_rag_service(question: str, k: int = 5, search_strategy: str = "hybrid", similarity_threshold: Optional[float] = None, filters: Optional[dict] = None, fusion: Optional[str] = None,
+                           diversify: Optional[bool] = None) -> dict:
     async with httpx.AsyncClient(timeout=30.0) as client:
         payload = {"question": question, "k": k, "search_strategy": search_strategy}
         if similarity_threshold is not None:
             payload["similarity_threshold"] = similarity_threshold
+        if fusion:
+            payload["fusion"] = fusion
+        if diversify is not None:
+            payload["diversify"] = diversify
+        if filters:
+            payload.update(filters)
         response = await client.post(f"{RAG_SERVICE_URL}/query", json=payload)
         response.raise_for_status()
         return response.json()
@@ -157,17 +170,17 @@ class VoiceQueryRequest(BaseModel):
 @app.post("/api/v1/voice-query", response_model=VoiceQueryResponse)
 async def voice_query(
     file: UploadFile = File(...), 
-    search_strategy: str = Query("hybrid", description="Search strategy: vector, keyword, or hybrid")
+    search_strategy: str = Query("hybrid", description="Search strategy: vector, keyword, bm25, fuzzy, or hybrid")
 ):
     """Voice query: audio input → text response
     
     Query params:
-        search_strategy: "vector", "keyword", or "hybrid" (default: "hybrid")
+        search_strategy: "vector", "keyword", "bm25", "fuzzy", or "hybrid" (default: "hybrid")
     """
     try:
         await ensure_index_exists()
         
-        valid_strategies = ["vector", "keyword", "hybrid"]
+        valid_strategies = ["vector", "keyword", "bm25", "fuzzy", "hybrid"]
         strategy = search_strategy.lower() if search_strategy else "hybrid"
         if strategy not in valid_strategies:
             raise HTTPException(status_code=400, detail=f"Invalid search_strategy. Must be one of: {valid_strategies}")
@@ -203,13 +216,14 @@ async def text_query(request: TextQueryRequest):
     try:
         await ensure_index_exists()
         
-        valid_strategies = ["vector", "keyword", "hybrid"]
+        valid_strategies = ["vector", "keyword", "bm25", "fuzzy", "hybrid"]
         strategy = request.search_strategy.lower() if request.search_strategy else "hybrid"
         if strategy not in valid_strategies:
             raise HTTPException(status_code=400, detail=f"Invalid search_strategy. Must be one of: {valid_strategies}")
         
         threshold = request.similarity_threshold if request.similarity_threshold is not None else None
-        rag_result = await rag_breaker.call(call_rag_service, request.question, request.k, strategy, threshold)
+        filters = request.model_dump(include={"campaign_ids", "chunk_types", "indexed_after", "indexed_before"}, exclude_none=True)
+        rag_result = await rag_breaker.call(call_rag_service, request.question, request.k, strategy, threshold, filters, request.fusion, request.diversify)
         
         return TextQueryResponse(
             answer=rag_result.get("answer", ""),
@@ -6,10 +6,14 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
+from datetime import datetime
 import logging
 from services.rag.service import RAGService
+from services.rag.vector_store import INDEX_TYPES, STORAGE_TYPES
+from services.rag.fusion import FUSION_MODES
 import json
 from pathlib import Path as PathLib
 from configs.rag_config import config
@@ -26,15 +30,29 @@ class QueryRequest(BaseModel):
     k: int = 5
     search_strategy: str = "hybrid"
     similarity_threshold: Optional[float] = None
+    campaign_ids: Optional[List[str]] = None
+    chunk_types: Optional[List[str]] = None
+    indexed_after: Optional[datetime] = None
+    indexed_before: Optional[datetime] = None
+    fusion: Optional[str] = None
+    diversify: Optional[bool] = None
+    debug: bool = False
 
 class QueryResponse(BaseModel):
     answer: str
     sources: list
     num_sources: int
+    candidate_sizes: Optional[dict] = None
+    timings: Optional[dict] = None
 
 @app.post("/query", response_model=QueryResponse)
 async def query(request: QueryRequest):
-    """Query RAG system"""
+    """Query RAG system
+    
+    Optional filters (campaign_ids, chunk_types, indexed_after, indexed_before)
+    are pushed down into the vector and keyword search. With debug, the
+    response includes the per-stage timings of this query in milliseconds.
+    """
     try:
         if not request.question or not request.question.strip():
             raise HTTPException(status_code=400, detail="Question cannot be empty")
@@ -42,13 +60,25 @@ async def query(request: QueryRequest):
         if rag_service.vector_store.index.ntotal == 0:
             raise HTTPException(status_code=503, detail="No indexed data available. Please index campaigns first.")
         
-        valid_strategies = ["vector", "keyword", "hybrid"]
+        valid_strategies = ["vector", "keyword", "bm25", "fuzzy", "hybrid"]
         strategy = request.search_strategy.lower() if request.search_strategy else "hybrid"
         if strategy not in valid_strategies:
             raise HTTPException(status_code=400, detail=f"Invalid search_strategy. Must be one of: {valid_strategies}")
         
+        if request.fusion is not None and request.fusion.lower() not in FUSION_MODES:
+            raise HTTPException(status_code=400, detail=f"Invalid fusion. Must be one of: {list(FUSION_MODES)}")
+        
         threshold = request.similarity_threshold if request.similarity_threshold is not None else None
-        result = rag_service.query(request.question.strip(), k=request.k, search_strategy=strategy, similarity_threshold=threshold)
+        filters = {
+            "campaign_ids": request.campaign_ids,
+            "types": request.chunk_types,
+            "indexed_after": request.indexed_after.timestamp() if request.indexed_after else None,
+            "indexed_before": request.indexed_before.timestamp() if request.indexed_before else None
+        }
+        filters = {key: value for key, value in filters.items() if value is not None} or None
+        result = rag_service.query(request.question.strip(), k=request.k, search_strategy=strategy, similarity_threshold=threshold, filters=filters,
+                                   fusion=request.fusion.lower() if request.fusion else None, diversify=request.diversify,
+                                   debug=request.debug)
         return QueryResponse(**result)
     except HTTPException:
         raise
@@ -58,6 +88,9 @@ async def query(request: QueryRequest):
 
 class IndexRequest(BaseModel):
     chunking_strategy: str = "default"
+    index_type: Optional[str] = None
+    storage: Optional[str] = None
+    incremental: bool = True
 
 @app.post("/index")
 async def index_campaigns(request: IndexRequest = IndexRequest()):
@@ -65,6 +98,12 @@ async def index_campaigns(request: IndexRequest = IndexRequest()):
     
     Args:
         chunking_strategy: "default", "sliding_window", or "semantic"
+        index_type: "flat", "ivf", "hnsw", or "ivfpq" (default: from config)
+        storage: "float32", "fp16", or "sq8" vector storage (default: from config)
+        incremental: Re-embed only changed campaigns (default: true)
+    
+    The build runs in a worker thread into a separate index that is swapped in
+    once saved, so /query keeps serving the previous index meanwhile.
     """
     try:
         data_path = PathLib(config.data_storage_path)
@@ -83,16 +122,25 @@ async def index_campaigns(request: IndexRequest = IndexRequest()):
         if strategy not in valid_strategies:
             raise HTTPException(status_code=400, detail=f"Invalid chunking_strategy. Must be one of: {valid_strategies}")
         
-        rag_service.index_campaigns(campaigns, chunking_strategy=strategy)
+        index_type = request.index_type.lower() if request.index_type else None
+        if index_type and index_type not in INDEX_TYPES:
+            raise HTTPException(status_code=400, detail=f"Invalid index_type. Must be one of: {INDEX_TYPES}")
+        
+        storage = request.storage.lower() if request.storage else None
+        if storage and storage not in STORAGE_TYPES:
+            raise HTTPException(status_code=400, detail=f"Invalid storage. Must be one of: {list(STORAGE_TYPES)}")
         
-        rag_service.vector_store.load_latest_index()
+        summary = await run_in_threadpool(rag_service.index_campaigns, campaigns, chunking_strategy=strategy, index_type=index_type, incremental=request.incremental, storage=storage)
         
         return {
             "status": "indexed", 
             "campaigns": len(campaigns),
             "index_name": rag_service.vector_store.current_index_name,
             "index_size": rag_service.vector_store.index.ntotal,
-            "chunking_strategy": strategy
+            "index_type": rag_service.vector_store.index_type,
+            "storage": rag_service.vector_store.storage,
+            "chunking_strategy": strategy,
+            **summary
         }
     except HTTPException:
         raise
@@ -106,6 +154,18 @@ async def health():
     return {
         "status": "healthy",
         "index_size": rag_service.vector_store.index.ntotal,
-        "index_name": rag_service.vector_store.current_index_name or "none"
+        "index_name": rag_service.vector_store.current_index_name or "none",
+        "index_type": rag_service.vector_store.index_type,
+        "storage": rag_service.vector_store.storage,
+        "index_version": rag_service.index_version,
+        "query_cache": {
+            "retrieval": rag_service.retrieval_cache.stats(),
+            "answer": rag_service.answer_cache.stats(),
+            "semantic": rag_service.semantic_cache.stats()
+        }
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Per-stage query latency since startup: count, mean, max and p50/p95/p99 in milliseconds"""
+    return {"stages": rag_service.latency.snapshot()}
@@ -0,0 +1,164 @@
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import re
+import json
+import logging
+import numpy as np
+from collections import Counter
+from typing import List, Dict, Tuple, Optional
+from configs.rag_config import config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HEADER_FILE = "bm25.json"
+
+FIELDS = ("text", "title", "campaign_id")
+
+# Words, so "iphone-15" and "kampanyası," index as "iphone", "15", "kampanyası"
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercased word tokens of text"""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+def _field_file(field: str, part: str) -> str:
+    return f"bm25_{field}_{part}.npy"
+
+class BM25Index:
+    """BM25F index over the text, title and campaign_id fields of chunks
+
+    Per field, postings are CSR arrays (offsets over the sorted vocabulary,
+    then row and term frequency of each posting) plus the token length of
+    every chunk. IDF and per-row length normalization are computed once on
+    load, so a query only touches the postings of its terms.
+
+    Scoring follows BM25F: per-field frequencies are length-normalized,
+    weighted and summed before the k1 saturation, then multiplied by the
+    term's IDF over all fields.
+    """
+
+    def __init__(self, vocab: List[str], postings: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]], lengths: Dict[str, np.ndarray], doc_freq: np.ndarray):
+        self.vocab = vocab
+        self.postings = postings
+        self.lengths = lengths
+        self.doc_freq = doc_freq
+        self.count = len(lengths["text"])
+        self.token_ids = {token: i for i, token in enumerate(vocab)}
+
+        self.k1 = config.bm25_k1
+        self.weights = {"text": 1.0, "title": config.bm25_title_weight, "campaign_id": config.bm25_campaign_id_weight}
+        self.idf = np.log1p((self.count - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        # weight / (1 - b + b * len / avg_len), so scoring is a multiply per posting
+        self.row_factors = {}
+        for field, field_lengths in lengths.items():
+            avg_length = float(np.mean(field_lengths)) if self.count and np.any(field_lengths) else 1.0
+            norm = 1.0 - config.bm25_b + config.bm25_b * np.asarray(field_lengths, dtype=np.float32) / avg_length
+            self.row_factors[field] = (self.weights[field] / norm).astype(np.float32)
+
+    @classmethod
+    def build(cls, chunks) -> "BM25Index":
+        """Index the word tokens of chunks, in row order"""
+        tables = {field: {} for field in FIELDS}
+        lengths = {field: [] for field in FIELDS}
+        doc_tokens = {}
+        for row, chunk in enumerate(chunks):
+            row_tokens = set()
+            for field in FIELDS:
+                tokens = tokenize(chunk.get(field))
+                lengths[field].append(len(tokens))
+                for token, freq in Counter(tokens).items():
+                    tables[field].setdefault(token, []).append((row, freq))
+                row_tokens.update(tokens)
+            for token in row_tokens:
+                doc_tokens[token] = doc_tokens.get(token, 0) + 1
+
+        vocab = sorted(doc_tokens)
+        postings = {}
+        for field, table in tables.items():
+            offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(table.get(token, ())) for token in vocab])
+            pairs = [pair for token in vocab for pair in table.get(token, ())]
+            rows = np.array([row for row, _ in pairs], dtype=np.int32)
+            freqs = np.array([freq for _, freq in pairs], dtype=np.float32)
+            postings[field] = (offsets, rows, freqs)
+
+        doc_freq = np.array([doc_tokens[token] for token in vocab], dtype=np.float32)
+        logger.info(f"Built BM25 index: {len(lengths['text'])} chunks, {len(vocab)} terms")
+        return cls(vocab, postings, {field: np.array(values, dtype=np.int32) for field, values in lengths.items()}, doc_freq)
+
+    @staticmethod
+    def exists(index_dir: Path) -> bool:
+        return (Path(index_dir) / HEADER_FILE).exists()
+
+    def save(self, index_dir: Path):
+        index_dir = Path(index_dir)
+        for field, (offsets, rows, freqs) in self.postings.items():
+            np.save(index_dir / _field_file(field, "offsets"), offsets)
+            np.save(index_dir / _field_file(field, "rows"), rows)
+            np.save(index_dir / _field_file(field, "freqs"), freqs)
+            np.save(index_dir / _field_file(field, "lengths"), self.lengths[field])
+        np.save(index_dir / "bm25_doc_freq.npy", self.doc_freq)
+        with open(index_dir / HEADER_FILE, "w", encoding="utf-8") as f:
+            json.dump({"vocab": self.vocab}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, index_dir: Path, use_mmap: bool = True) -> "BM25Index":
+        index_dir = Path(index_dir)
+        mmap_mode = "r" if use_mmap else None
+        with open(index_dir / HEADER_FILE, "r", encoding="utf-8") as f:
+            header = json.load(f)
+        postings = {
+            field: tuple(np.load(index_dir / _field_file(field, part), mmap_mode=mmap_mode) for part in ("offsets", "rows", "freqs"))
+            for field in FIELDS
+        }
+        lengths = {field: np.load(index_dir / _field_file(field, "lengths")) for field in FIELDS}
+        return cls(header["vocab"], postings, lengths, np.load(index_dir / "bm25_doc_freq.npy"))
+
+    def search(self, tokens, k: int = 5, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k rows by BM25F score
+
+        Args:
+            tokens: Query terms (see tokenize()), duplicates are ignored
+            k: Number of rows to return
+            mask: Optional boolean row mask restricting the results
+
+        Returns:
+            (rows, scores), best first; only rows matching a term are returned
+        """
+        row_parts, score_parts = [], []
+        for token in set(tokens) if k > 0 else ():
+            token_id = self.token_ids.get(token)
+            if token_id is None:
+                continue
+            field_rows, field_tf = [], []
+            for field, (offsets, rows, freqs) in self.postings.items():
+                start, end = offsets[token_id], offsets[token_id + 1]
+                if end > start:
+                    posting_rows = np.asarray(rows[start:end])
+                    field_rows.append(posting_rows)
+                    field_tf.append(freqs[start:end] * self.row_factors[field][posting_rows])
+            term_rows, inverse = np.unique(np.concatenate(field_rows), return_inverse=True)
+            tf = np.bincount(inverse, weights=np.concatenate(field_tf))
+            row_parts.append(term_rows)
+            score_parts.append(self.idf[token_id] * tf / (self.k1 + tf))
+
+        if not row_parts:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+
+        rows, inverse = np.unique(np.concatenate(row_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+        if mask is not None:
+            keep = mask[rows]
+            rows, scores = rows[keep], scores[keep]
+
+        if len(rows) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[top], scores[top]
+        order = np.lexsort((rows, -scores))
+        return rows[order], scores[order]
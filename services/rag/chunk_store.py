@@ -0,0 +1,209 @@
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import json
+import mmap
+import logging
+import numpy as np
+from collections.abc import Sequence
+from typing import List, Dict, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HEADER_FILE = "chunks.json"
+TEXT_FILE = "chunks_text.bin"
+EXTRA_FILE = "chunks_extra.bin"
+
+# Fixed-width columns, one .npy file each; ordinals index the header vocabularies
+COLUMNS = {
+    "id": np.int64,
+    "text_offsets": np.int64,
+    "extra_offsets": np.int64,
+    "campaign": np.int32,
+    "title": np.int32,
+    "chunk_index": np.int32,
+    "type": np.int16,
+    "indexed_at": np.int64,
+}
+
+# Filterable chunk keys: column holding the ordinal, value -> ordinal lookup
+FILTER_FIELDS = {"campaign_id": ("campaign", "campaign_ordinals"), "type": ("type", "type_ordinals")}
+
+# Sentinel for "key absent from the chunk dict", so chunks round-trip exactly
+MISSING = -1
+MISSING_CHUNK_INDEX = np.iinfo(np.int32).min
+
+FIXED_KEYS = ("text", "campaign_id", "title", "chunk_index", "type")
+
+def _column_file(name: str) -> str:
+    return f"chunks_{name}.npy"
+
+def _open_blob(path: Path, use_mmap: bool):
+    with open(path, "rb") as f:
+        if use_mmap and path.stat().st_size > 0:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return f.read()
+
+class _Vocabulary:
+    """Assigns ordinals to repeated string values (campaign ids, titles, types)"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.ordinals: Dict[str, int] = {}
+
+    def ordinal(self, value: Optional[str]) -> int:
+        if value is None:
+            return MISSING
+        if value not in self.ordinals:
+            self.ordinals[value] = len(self.values)
+            self.values.append(value)
+        return self.ordinals[value]
+
+class ChunkStore(Sequence):
+    """Read-only columnar chunk store
+
+    Layout: an offset-indexed UTF-8 text blob, the faiss id and indexing time
+    (epoch seconds) of each chunk, fixed-width ordinal arrays for campaign_id, title, chunk_index and type
+    (vocabularies in the JSON header), and a JSON blob for any other chunk
+    keys. A chunk dict is materialized only when indexed. With mmap the files
+    are shared through the page cache, so replicas on one host do not each
+    hold a private copy.
+    """
+
+    def __init__(self, index_dir: Path, use_mmap: bool = True):
+        self.index_dir = Path(index_dir)
+        mmap_mode = "r" if use_mmap else None
+
+        with open(self.index_dir / HEADER_FILE, "r", encoding="utf-8") as f:
+            header = json.load(f)
+        self.campaign_ids: List[str] = header["campaign_ids"]
+        self.titles: List[str] = header["titles"]
+        self.types: List[str] = header["types"]
+        self.campaign_ordinals = {cid: i for i, cid in enumerate(self.campaign_ids)}
+        self.type_ordinals = {chunk_type: i for i, chunk_type in enumerate(self.types)}
+
+        self.columns = {}
+        for name, dtype in COLUMNS.items():
+            path = self.index_dir / _column_file(name)
+            # indexed_at was added later, older stores read as "unknown" (0)
+            self.columns[name] = np.load(path, mmap_mode=mmap_mode) if path.exists() else np.zeros(header["count"], dtype=dtype)
+        self.text_data = _open_blob(self.index_dir / TEXT_FILE, use_mmap)
+        self.extra_data = _open_blob(self.index_dir / EXTRA_FILE, use_mmap)
+
+    @staticmethod
+    def exists(index_dir: Path) -> bool:
+        return (Path(index_dir) / HEADER_FILE).exists()
+
+    @staticmethod
+    def write(chunks: List[Dict], index_dir: Path, ids: Optional[np.ndarray] = None, indexed_at: Optional[np.ndarray] = None):
+        """Write chunks in columnar form
+        
+        Args:
+            chunks: Chunk dicts in row order
+            index_dir: Target directory
+            ids: faiss id of each chunk (default: row number)
+            indexed_at: Indexing time of each chunk in epoch seconds (default: 0)
+        """
+        index_dir = Path(index_dir)
+        n = len(chunks)
+        columns = {name: np.zeros(n + 1 if name.endswith("_offsets") else n, dtype=dtype) for name, dtype in COLUMNS.items()}
+        columns["id"][:] = np.arange(n) if ids is None else ids
+        if indexed_at is not None:
+            columns["indexed_at"][:] = indexed_at
+        campaigns, titles, types = _Vocabulary(), _Vocabulary(), _Vocabulary()
+
+        with open(index_dir / TEXT_FILE, "wb") as text_file, open(index_dir / EXTRA_FILE, "wb") as extra_file:
+            for i, chunk in enumerate(chunks):
+                text = chunk.get("text", "").encode("utf-8")
+                text_file.write(text)
+                columns["text_offsets"][i + 1] = columns["text_offsets"][i] + len(text)
+
+                extra = {key: value for key, value in chunk.items() if key not in FIXED_KEYS}
+                extra_bytes = json.dumps(extra, ensure_ascii=False).encode("utf-8") if extra else b""
+                extra_file.write(extra_bytes)
+                columns["extra_offsets"][i + 1] = columns["extra_offsets"][i] + len(extra_bytes)
+
+                columns["campaign"][i] = campaigns.ordinal(chunk.get("campaign_id"))
+                columns["title"][i] = titles.ordinal(chunk.get("title"))
+                columns["type"][i] = types.ordinal(chunk.get("type"))
+                columns["chunk_index"][i] = chunk.get("chunk_index", MISSING_CHUNK_INDEX)
+
+        for name, values in columns.items():
+            np.save(index_dir / _column_file(name), values)
+
+        with open(index_dir / HEADER_FILE, "w", encoding="utf-8") as f:
+            json.dump({
+                "count": n,
+                "campaign_ids": campaigns.values,
+                "titles": titles.values,
+                "types": types.values
+            }, f, ensure_ascii=False)
+
+    def __len__(self) -> int:
+        return len(self.columns["campaign"])
+
+    def text(self, idx: int) -> str:
+        offsets = self.columns["text_offsets"]
+        return self.text_data[int(offsets[idx]):int(offsets[idx + 1])].decode("utf-8")
+
+    def campaign_id(self, idx: int) -> str:
+        ordinal = self.columns["campaign"][idx]
+        return self.campaign_ids[ordinal] if ordinal != MISSING else ""
+
+    def chunk_key(self, idx: int) -> Tuple[str, int]:
+        """(campaign_id, chunk_index) of a chunk, with "" and 0 for missing values"""
+        chunk_index = self.columns["chunk_index"][idx]
+        return self.campaign_id(idx), int(chunk_index) if chunk_index != MISSING_CHUNK_INDEX else 0
+
+    def campaign_rows(self, campaign_ids) -> np.ndarray:
+        """Row numbers of all chunks belonging to the given campaign ids"""
+        ordinals = [self.campaign_ordinals[cid] for cid in campaign_ids if cid in self.campaign_ordinals]
+        return np.nonzero(np.isin(self.columns["campaign"], ordinals))[0]
+
+    def field_mask(self, field: str, value: str) -> np.ndarray:
+        """Boolean row mask of chunks whose `field` ("campaign_id" or "type") equals value"""
+        column, ordinals = FILTER_FIELDS[field]
+        ordinal = getattr(self, ordinals).get(value)
+        if ordinal is None:
+            return np.zeros(len(self), dtype=bool)
+        return np.asarray(self.columns[column] == ordinal)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("chunk index out of range")
+
+        chunk = {"text": self.text(idx)}
+
+        ordinal = self.columns["campaign"][idx]
+        if ordinal != MISSING:
+            chunk["campaign_id"] = self.campaign_ids[ordinal]
+        ordinal = self.columns["title"][idx]
+        if ordinal != MISSING:
+            chunk["title"] = self.titles[ordinal]
+        chunk_index = self.columns["chunk_index"][idx]
+        if chunk_index != MISSING_CHUNK_INDEX:
+            chunk["chunk_index"] = int(chunk_index)
+        ordinal = self.columns["type"][idx]
+        if ordinal != MISSING:
+            chunk["type"] = self.types[ordinal]
+
+        extra_offsets = self.columns["extra_offsets"]
+        start, end = int(extra_offsets[idx]), int(extra_offsets[idx + 1])
+        if end > start:
+            chunk.update(json.loads(self.extra_data[start:end]))
+
+        return chunk
+
+    def to_list(self) -> List[Dict]:
+        """Materialize every chunk into a mutable list"""
+        return [self[i] for i in range(len(self))]
@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import time
+import logging
+import numpy as np
+from typing import List, Dict, Optional
+from configs.rag_config import config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def pair_text(chunk: Dict) -> str:
+    """Passage side of a (query, passage) pair: title line plus chunk text"""
+    title = chunk.get("title") or ""
+    text = chunk.get("text", "")
+    return f"{title}\n{text}" if title else text
+
+class CrossEncoderReranker:
+    """Local cross-encoder scoring (query, chunk) pairs on CPU
+
+    Defaults to the ONNX Runtime backend; RERANK_MODEL_FILE selects a
+    quantized export such as onnx/model_qint8_avx512_vnni.onnx.
+    """
+
+    def __init__(self, model_name: str, backend: str = "onnx", model_file: str = "", batch_size: int = 16, max_length: int = 256):
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        logger.info(f"Loading cross-encoder: {model_name} ({backend}{', ' + model_file if model_file else ''}) on cpu")
+        self.model = CrossEncoder(model_name, device="cpu", backend=backend, max_length=max_length,
+                                  model_kwargs={"file_name": model_file} if model_file else None)
+        logger.info("Cross-encoder loaded")
+
+    def score(self, query: str, texts: List[str], deadline: Optional[float] = None) -> Optional[np.ndarray]:
+        """Relevance score of each text for query, higher is better
+
+        Args:
+            query: Query text
+            texts: Passages to score
+            deadline: Optional time.monotonic() deadline, checked between batches
+
+        Returns:
+            One score per text, or None if the deadline passed first
+        """
+        scores = []
+        for start in range(0, len(texts), self.batch_size):
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+            pairs = [(query, text) for text in texts[start:start + self.batch_size]]
+            scores.append(np.asarray(self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False, convert_to_numpy=True), dtype=np.float32).reshape(-1))
+        return np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
+
+def load_cross_encoder() -> Optional[CrossEncoderReranker]:
+    """Cross-encoder configured by RERANK_MODEL, or None if disabled or it cannot be loaded"""
+    if not config.rerank_model:
+        return None
+    try:
+        return CrossEncoderReranker(config.rerank_model, backend=config.rerank_backend, model_file=config.rerank_model_file,
+                                    batch_size=config.rerank_batch_size, max_length=config.rerank_max_length)
+    except Exception as e:
+        logger.warning(f"Could not load cross-encoder '{config.rerank_model}', keeping heuristic rerank only: {e}")
+        return None
@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import heapq
+import logging
+import numpy as np
+from operator import itemgetter
+from typing import List, Dict, Tuple, Sequence
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# "heuristic" rescores merged result dicts (Retriever.hybrid_search), the others fuse ranked id lists
+FUSION_MODES = ("heuristic", "rrf", "weighted")
+
+def reciprocal_rank_fusion(rankings: Sequence[np.ndarray], weights: Sequence[float], k: int, rrf_k: int = 60) -> List[Tuple[int, float]]:
+    """Fuse ranked id lists by weighted reciprocal rank
+    
+    An id scores sum(weight / (rrf_k + rank)) over the lists it appears in.
+    
+    Args:
+        rankings: Id arrays, best first
+        weights: Weight of each ranking
+        k: Number of ids to return
+        rrf_k: Rank offset damping the head of each list
+    
+    Returns:
+        (id, score) pairs, best first; ties keep first-seen order
+    """
+    scores: Dict[int, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, item in enumerate(np.asarray(ranking).tolist(), start=1):
+            scores[item] = scores.get(item, 0.0) + weight / (rrf_k + rank)
+    return heapq.nlargest(k, scores.items(), key=itemgetter(1))
+
+def _min_max(scores: np.ndarray) -> np.ndarray:
+    scores = np.asarray(scores, dtype=np.float64)
+    if len(scores) == 0:
+        return scores
+    low, high = scores.min(), scores.max()
+    return (scores - low) / (high - low) if high > low else np.ones_like(scores)
+
+def weighted_fusion(rankings: Sequence[Tuple[np.ndarray, np.ndarray]], weights: Sequence[float], k: int) -> List[Tuple[int, float]]:
+    """Fuse scored id lists by weighted sum of min-max normalized scores
+    
+    Args:
+        rankings: (ids, scores) pairs; higher scores are better
+        weights: Weight of each ranking
+        k: Number of ids to return
+    
+    Returns:
+        (id, score) pairs, best first; ties keep first-seen order
+    """
+    fused: Dict[int, float] = {}
+    for (ids, scores), weight in zip(rankings, weights):
+        for item, score in zip(np.asarray(ids).tolist(), (_min_max(scores) * weight).tolist()):
+            fused[item] = fused.get(item, 0.0) + score
+    return heapq.nlargest(k, fused.items(), key=itemgetter(1))
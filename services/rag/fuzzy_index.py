@@ -0,0 +1,194 @@
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import re
+import json
+import logging
+import numpy as np
+from itertools import chain
+from typing import List, Tuple, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HEADER_FILE = "fuzzy.json"
+
+# Shorter terms share too few trigrams to tell a typo from a different word
+MIN_TERM_LENGTH = 4
+
+# Turkish letters fold to ASCII, since transcripts and IDs mix both spellings
+FOLD_TABLE = str.maketrans("ıİşŞçÇğĞöÖüÜâÂîÎûÛ", "iissccggoouuaaiiuu")
+
+TERM_PATTERN = re.compile(r"[^\W_]+")
+
+def fold(text: Optional[str]) -> str:
+    """Lowercased, ASCII-folded form of text"""
+    return text.translate(FOLD_TABLE).lower() if text else ""
+
+def _words(text: Optional[str]) -> List[str]:
+    return TERM_PATTERN.findall(fold(text))
+
+def _distinct(terms) -> List[str]:
+    return list(dict.fromkeys(term for term in terms if len(term) >= MIN_TERM_LENGTH))
+
+def name_terms(title: Optional[str], campaign_id: Optional[str]) -> List[str]:
+    """Indexed terms of a chunk: folded title and campaign_id words plus the joined campaign_id
+
+    The joined ID ("auto-king" -> "autoking") matches names spoken or typed as one word.
+    """
+    id_words = _words(campaign_id)
+    return _distinct(_words(title) + id_words + ["".join(id_words)])
+
+def query_terms(query: Optional[str]) -> List[str]:
+    """Folded words of a query plus each adjacent pair joined ("oto king" -> "otoking")"""
+    words = _words(query)
+    return _distinct(words + [first + second for first, second in zip(words, words[1:])])
+
+def trigrams(term: str) -> List[str]:
+    """Distinct character trigrams of term, padded so its first and last letters count"""
+    padded = f"${term}$"
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+class FuzzyIndex:
+    """Character trigram index over the title and campaign_id terms of chunks
+
+    Catches misspelled and mis-transcribed campaign names ("otokin",
+    "oto king" for "Otoking") that whole-word keyword matching misses.
+    Indexed terms come from titles and campaign IDs only (see name_terms());
+    both the trigram -> term postings and the term -> row postings are CSR
+    arrays.
+
+    A query term is compared with the indexed terms sharing a trigram with
+    it: merging their posting lists counts the shared trigrams per term, and
+    terms whose Dice coefficient reaches min_similarity match. A match
+    scores its similarity times the term's normalized IDF, so a typo in a
+    rare campaign name outranks a common word like "kampanya".
+    """
+
+    def __init__(self, terms: List[str], grams: List[str], gram_postings: Tuple[np.ndarray, np.ndarray],
+                 term_gram_counts: np.ndarray, term_postings: Tuple[np.ndarray, np.ndarray], count: int):
+        self.terms = terms
+        self.grams = grams
+        self.gram_postings = gram_postings
+        self.term_gram_counts = np.asarray(term_gram_counts)
+        self.term_postings = term_postings
+        self.count = count
+        self.gram_ids = {gram: i for i, gram in enumerate(grams)}
+
+        # log(1 + N / df), scaled so a term found in a single row weighs 1
+        doc_freq = np.maximum(np.diff(np.asarray(term_postings[0])), 1)
+        self.weights = (np.log1p(count / doc_freq) / np.log1p(count)).astype(np.float32) if count > 0 else np.ones(len(terms), dtype=np.float32)
+
+    @classmethod
+    def build(cls, chunks) -> "FuzzyIndex":
+        """Index the title and campaign_id terms of chunks, in row order"""
+        table = {}
+        count = 0
+        for row, chunk in enumerate(chunks):
+            count += 1
+            for term in name_terms(chunk.get("title"), chunk.get("campaign_id")):
+                table.setdefault(term, []).append(row)
+
+        terms = sorted(table)
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        term_offsets[1:] = np.cumsum([len(table[term]) for term in terms])
+        term_rows = np.fromiter(chain.from_iterable(table[term] for term in terms), dtype=np.int32, count=int(term_offsets[-1]))
+
+        gram_table = {}
+        term_grams = [trigrams(term) for term in terms]
+        for term_id, grams in enumerate(term_grams):
+            for gram in grams:
+                gram_table.setdefault(gram, []).append(term_id)
+        grams = sorted(gram_table)
+        gram_offsets = np.zeros(len(grams) + 1, dtype=np.int64)
+        gram_offsets[1:] = np.cumsum([len(gram_table[gram]) for gram in grams])
+        gram_terms = np.fromiter(chain.from_iterable(gram_table[gram] for gram in grams), dtype=np.int32, count=int(gram_offsets[-1]))
+
+        logger.info(f"Built fuzzy index: {count} chunks, {len(terms)} terms, {len(grams)} trigrams")
+        return cls(terms, grams, (gram_offsets, gram_terms), np.array([len(g) for g in term_grams], dtype=np.int32),
+                   (term_offsets, term_rows), count)
+
+    @staticmethod
+    def exists(index_dir: Path) -> bool:
+        return (Path(index_dir) / HEADER_FILE).exists()
+
+    def save(self, index_dir: Path):
+        index_dir = Path(index_dir)
+        np.save(index_dir / "fuzzy_gram_offsets.npy", self.gram_postings[0])
+        np.save(index_dir / "fuzzy_gram_terms.npy", self.gram_postings[1])
+        np.save(index_dir / "fuzzy_term_gram_counts.npy", self.term_gram_counts)
+        np.save(index_dir / "fuzzy_term_offsets.npy", self.term_postings[0])
+        np.save(index_dir / "fuzzy_term_rows.npy", self.term_postings[1])
+        with open(index_dir / HEADER_FILE, "w", encoding="utf-8") as f:
+            json.dump({"count": self.count, "terms": self.terms, "grams": self.grams}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, index_dir: Path, use_mmap: bool = True) -> "FuzzyIndex":
+        index_dir = Path(index_dir)
+        mmap_mode = "r" if use_mmap else None
+        with open(index_dir / HEADER_FILE, "r", encoding="utf-8") as f:
+            header = json.load(f)
+        load = lambda name: np.load(index_dir / name, mmap_mode=mmap_mode)
+        return cls(header["terms"], header["grams"], (load("fuzzy_gram_offsets.npy"), load("fuzzy_gram_terms.npy")),
+                   np.load(index_dir / "fuzzy_term_gram_counts.npy"), (load("fuzzy_term_offsets.npy"), load("fuzzy_term_rows.npy")),
+                   header["count"])
+
+    def match_terms(self, query: str, min_similarity: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(term ids, scores) of indexed terms similar to a term of the query"""
+        gram_offsets, gram_terms = self.gram_postings
+        term_parts, score_parts = [], []
+        for term in query_terms(query):
+            gram_ids = [self.gram_ids[gram] for gram in trigrams(term) if gram in self.gram_ids]
+            if not gram_ids:
+                continue
+            postings = np.concatenate([gram_terms[gram_offsets[gram_id]:gram_offsets[gram_id + 1]] for gram_id in gram_ids])
+            candidates, shared = np.unique(postings, return_counts=True)
+            similarity = 2.0 * shared / (len(trigrams(term)) + self.term_gram_counts[candidates])
+            keep = similarity >= min_similarity
+            term_parts.append(candidates[keep])
+            score_parts.append(similarity[keep] * self.weights[candidates[keep]])
+
+        if not term_parts:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        term_ids, scores = np.concatenate(term_parts), np.concatenate(score_parts)
+        # Best score per term: sort by score, keep each term's first occurrence
+        order = np.argsort(-scores, kind="stable")
+        term_ids, first = np.unique(term_ids[order], return_index=True)
+        return term_ids, scores[order][first]
+
+    def search(self, query: str, k: int = 5, mask: Optional[np.ndarray] = None, min_similarity: float = 0.5) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k rows by fuzzy title / campaign_id match
+
+        Args:
+            query: Query text
+            k: Number of rows to return
+            mask: Optional boolean row mask restricting the results
+            min_similarity: Minimum trigram Dice similarity of a matching term
+
+        Returns:
+            (rows, scores), best first; a row scores its best matching term
+        """
+        term_ids, term_scores = self.match_terms(query, min_similarity) if k > 0 else (np.zeros(0, dtype=np.int32), None)
+        if len(term_ids) == 0:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+
+        term_offsets, term_rows = self.term_postings
+        lengths = term_offsets[term_ids + 1] - term_offsets[term_ids]
+        rows = np.concatenate([term_rows[term_offsets[term_id]:term_offsets[term_id + 1]] for term_id in term_ids])
+        scores = np.repeat(term_scores, lengths)
+        order = np.argsort(-scores, kind="stable")
+        rows, first = np.unique(rows[order], return_index=True)
+        scores = scores[order][first]
+        if mask is not None:
+            keep = mask[rows]
+            rows, scores = rows[keep], scores[keep]
+
+        if len(rows) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[top], scores[top]
+        order = np.lexsort((rows, -scores))
+        return rows[order], scores[order]
@@ -10,7 +10,8 @@ import logging
 from typing import List, Dict, Optional
 from openai import OpenAI
 from dotenv import load_dotenv
-from services.rag.preprocessing import TurkishPreprocessor
+from services.rag.preprocessing import QueryAnalysis, analyze_query
+from services.rag.metrics import stage_timer
 
 load_dotenv()
 
@@ -22,7 +23,6 @@ class ResponseGenerator:
         self.use_openai = use_openai
         self.openai_client = None
         self.model = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
-        self.preprocessor = TurkishPreprocessor()
         
         if use_openai:
             api_key = os.getenv("OPENAI_API_KEY")
@@ -46,50 +46,51 @@ Bu bilgiler kampanya detaylarından alınmıştır.""",
 Detaylı bilgi için kampanya sayfasını ziyaret edebilirsiniz."""
         }
     
-    def generate(self, query: str, retrieved_chunks: List[Dict]) -> str:
-        """Generate response from retrieved chunks using OpenAI or template"""
+    def generate(self, query: str, retrieved_chunks: List[Dict], analysis: Optional[QueryAnalysis] = None,
+                 timings: Optional[Dict[str, float]] = None) -> str:
+        """Generate response from retrieved chunks using OpenAI or template
+        
+        Args:
+            query: User query
+            retrieved_chunks: Retrieved chunks, best first
+            analysis: analyze_query(query), if the caller already has it
+            timings: Optional dict that receives the context_build and generation times (see stage_timer())
+        """
         if not retrieved_chunks:
             return "Üzgünüm, bu soruya yanıt verebilecek kampanya bilgisi bulunamadı."
         
-        context = self._build_context(retrieved_chunks)
+        with stage_timer(timings, "context_build"):
+            context = self._build_context(retrieved_chunks)
         
-        if self.use_openai and self.openai_client:
-            return self._generate_with_openai(query, context, retrieved_chunks)
-        else:
-            return self.templates["default"].format(context=context)
+        with stage_timer(timings, "generation"):
+            if self.use_openai and self.openai_client:
+                return self._generate_with_openai(query, context, retrieved_chunks, analysis)
+            else:
+                return self.templates["default"].format(context=context)
     
-    def _generate_with_openai(self, query: str, context: str, chunks: List[Dict] = None) -> str:
+    def _generate_with_openai(self, query: str, context: str, chunks: List[Dict] = None, analysis: Optional[QueryAnalysis] = None) -> str:
         """Generate response using OpenAI API with sophisticated prompt"""
         try:
-            # Preprocess query to expand synonyms
-            processed_query = self.preprocessor.preprocess_query(query)
+            # Preprocessed query (synonyms expanded) and variations, shared with retrieval
+            analysis = analysis or analyze_query(query)
+            processed_query = analysis.processed_query
             
             # Build synonym note if query was changed or variations found
             synonym_note = ""
-            query_variations = self.preprocessor._generate_variations(query)
-            processed_variations = self.preprocessor._generate_variations(processed_query)
-            all_variations = query_variations | processed_variations
+            matcher = analysis.matcher
             
-            context_lower = context.lower()
-            found_variations = []
+            found_variations = matcher.findall(context.lower())
             matching_titles = []
             
-            for variation in all_variations:
-                if len(variation) > 2 and variation in context_lower:
-                    found_variations.append(variation)
-            
             if chunks:
                 for chunk in chunks:
                     title = chunk.get("title", "")
                     chunk_text = chunk.get("text", "").lower()
                     title_lower = title.lower() if title else ""
                     
-                    for variation in all_variations:
-                        if len(variation) > 2:
-                            if variation in chunk_text or variation in title_lower:
-                                if title and title not in matching_titles:
-                                    matching_titles.append(title)
-                                break
+                    if matcher.search(chunk_text) or matcher.search(title_lower):
+                        if title and title not in matching_titles:
+                            matching_titles.append(title)
             
             if found_variations or matching_titles or processed_query.lower() != query.lower():
                 titles_note = ""
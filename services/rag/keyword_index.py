@@ -0,0 +1,209 @@
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import re
+import json
+import logging
+import numpy as np
+from itertools import chain
+from typing import List, Dict, Tuple, NamedTuple, Optional, FrozenSet
+from services.rag.chunk_store import _open_blob
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HEADER_FILE = "keywords.json"
+TOKENS_FILE = "keywords_tokens.npy"
+
+# Chunk fields with their own posting lists
+FIELDS = ("text", "title", "campaign_id")
+
+def _postings_file(field: str, part: str) -> str:
+    return f"keywords_{field}_{part}.npy"
+
+def _lower_file(field: str) -> str:
+    return f"keywords_{field}_lower.bin"
+
+class ChunkFields(NamedTuple):
+    """Lowercased text, title and campaign_id of a chunk plus its text tokens
+
+    Indexed chunks carry token_ids, the sorted interned ids of their distinct
+    text tokens. Chunks normalized on the fly carry the token strings in words.
+    """
+    text: str
+    title: str
+    campaign_id: str
+    token_ids: Optional[np.ndarray]
+    token_count: int
+    words: Optional[FrozenSet[str]] = None
+
+def normalize_chunk(chunk: Dict) -> ChunkFields:
+    """Normalize a chunk that is not in the keyword index"""
+    text = chunk.get("text", "").lower()
+    title = chunk.get("title", "").lower() if chunk.get("title") else ""
+    campaign_id = chunk.get("campaign_id", "").lower()
+    words = text.split()
+    return ChunkFields(text, title, campaign_id, None, len(words), frozenset(words))
+
+def _encode(values: List[str]) -> Tuple[bytes, np.ndarray]:
+    """UTF-8 blob of values plus the (len + 1) byte offsets into it"""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+    return b"".join(encoded), offsets
+
+class KeywordIndex:
+    """Inverted index from lowercased whitespace tokens to chunk rows, per field
+
+    Postings are stored CSR-style per field (an offsets array over the sorted
+    vocabulary and the sorted rows of each token), so a token lookup is an
+    array slice. Substring lookups, used for term variations, search the
+    vocabulary instead of the chunks and return candidate rows for callers
+    to verify.
+
+    The index also keeps each chunk's normalized fields (lowercased text,
+    title and campaign_id, distinct text token ids and token count), so
+    scoring candidates does no string normalization at query time.
+    """
+
+    def __init__(self, vocab: List[str], postings: Dict[str, Tuple[np.ndarray, np.ndarray]], count: int,
+                 lowered: Dict[str, Tuple[bytes, np.ndarray]], tokens: Tuple[np.ndarray, np.ndarray, np.ndarray]):
+        self.vocab = vocab
+        self.postings = postings
+        self.count = count
+        self.lowered = lowered
+        self.tokens = tokens
+        self.token_ids = {token: i for i, token in enumerate(vocab)}
+        # Tokens never contain whitespace, so "\n" separates them unambiguously
+        self._vocab_blob = "\n".join(vocab)
+        self._vocab_starts = np.cumsum([0] + [len(token) + 1 for token in vocab[:-1]]) if vocab else np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def build(cls, chunks) -> "KeywordIndex":
+        """Index the text, title and campaign_id tokens of chunks, in row order"""
+        tables = {field: {} for field in FIELDS}
+        lowered = {field: [] for field in FIELDS}
+        text_tokens, token_counts = [], []
+        for row, chunk in enumerate(chunks):
+            for field, value in zip(FIELDS, normalize_chunk(chunk)):
+                lowered[field].append(value)
+                tokens = value.split()
+                for token in set(tokens):
+                    tables[field].setdefault(token, []).append(row)
+                if field == "text":
+                    text_tokens.append(set(tokens))
+                    token_counts.append(len(tokens))
+        count = len(token_counts)
+
+        vocab = sorted(set().union(*(table.keys() for table in tables.values())))
+        postings = {}
+        for field, table in tables.items():
+            offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(table.get(token, ())) for token in vocab])
+            rows = np.fromiter(chain.from_iterable(table.get(token, ()) for token in vocab), dtype=np.int32, count=int(offsets[-1]))
+            postings[field] = (offsets, rows)
+
+        token_ids = {token: i for i, token in enumerate(vocab)}
+        row_token_ids = [sorted(token_ids[token] for token in tokens) for tokens in text_tokens]
+        token_offsets = np.zeros(count + 1, dtype=np.int64)
+        token_offsets[1:] = np.cumsum([len(ids) for ids in row_token_ids])
+        tokens = (token_offsets,
+                  np.fromiter(chain.from_iterable(row_token_ids), dtype=np.int32, count=int(token_offsets[-1])),
+                  np.array(token_counts, dtype=np.int32))
+
+        logger.info(f"Built keyword index: {count} chunks, {len(vocab)} tokens")
+        return cls(vocab, postings, count, {field: _encode(values) for field, values in lowered.items()}, tokens)
+
+    @staticmethod
+    def exists(index_dir: Path) -> bool:
+        return (Path(index_dir) / HEADER_FILE).exists() and (Path(index_dir) / TOKENS_FILE).exists()
+
+    def save(self, index_dir: Path):
+        index_dir = Path(index_dir)
+        for field, (offsets, rows) in self.postings.items():
+            np.save(index_dir / _postings_file(field, "offsets"), offsets)
+            np.save(index_dir / _postings_file(field, "rows"), rows)
+            blob, byte_offsets = self.lowered[field]
+            with open(index_dir / _lower_file(field), "wb") as f:
+                f.write(blob)
+            np.save(index_dir / _postings_file(field, "lower_offsets"), byte_offsets)
+        token_offsets, token_ids, token_counts = self.tokens
+        np.save(index_dir / "keywords_token_offsets.npy", token_offsets)
+        np.save(index_dir / TOKENS_FILE, token_ids)
+        np.save(index_dir / "keywords_token_counts.npy", token_counts)
+        with open(index_dir / HEADER_FILE, "w", encoding="utf-8") as f:
+            json.dump({"count": self.count, "vocab": self.vocab}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, index_dir: Path, use_mmap: bool = True) -> "KeywordIndex":
+        index_dir = Path(index_dir)
+        mmap_mode = "r" if use_mmap else None
+        with open(index_dir / HEADER_FILE, "r", encoding="utf-8") as f:
+            header = json.load(f)
+        postings = {
+            field: (np.load(index_dir / _postings_file(field, "offsets"), mmap_mode=mmap_mode),
+                    np.load(index_dir / _postings_file(field, "rows"), mmap_mode=mmap_mode))
+            for field in FIELDS
+        }
+        lowered = {
+            field: (_open_blob(index_dir / _lower_file(field), use_mmap),
+                    np.load(index_dir / _postings_file(field, "lower_offsets"), mmap_mode=mmap_mode))
+            for field in FIELDS
+        }
+        tokens = tuple(np.load(index_dir / name, mmap_mode=mmap_mode) for name in ("keywords_token_offsets.npy", TOKENS_FILE, "keywords_token_counts.npy"))
+        return cls(header["vocab"], postings, header["count"], lowered, tokens)
+
+    def fields(self, row: int) -> ChunkFields:
+        """Precomputed normalized fields of a chunk row"""
+        values = []
+        for field in FIELDS:
+            blob, offsets = self.lowered[field]
+            values.append(blob[int(offsets[row]):int(offsets[row + 1])].decode("utf-8"))
+        token_offsets, token_ids, token_counts = self.tokens
+        row_token_ids = np.asarray(token_ids[token_offsets[row]:token_offsets[row + 1]])
+        return ChunkFields(values[0], values[1], values[2], row_token_ids, int(token_counts[row]))
+
+    def lookup(self, tokens) -> np.ndarray:
+        """Sorted ids of the given tokens, dropping ones not in the vocabulary"""
+        return np.array(sorted({self.token_ids[token] for token in tokens if token in self.token_ids}), dtype=np.int32)
+
+    def _token_rows(self, field: str, token_id: int) -> np.ndarray:
+        offsets, rows = self.postings[field]
+        return rows[offsets[token_id]:offsets[token_id + 1]]
+
+    def rows(self, field: str, token: str) -> np.ndarray:
+        """Sorted rows whose field contains token as a whole word"""
+        token_id = self.token_ids.get(token)
+        if token_id is None:
+            return np.zeros(0, dtype=np.int32)
+        return np.asarray(self._token_rows(field, token_id))
+
+    def _tokens_containing(self, piece: str) -> np.ndarray:
+        """Ids of vocabulary tokens that contain piece"""
+        starts = [match.start() for match in re.finditer(re.escape(piece), self._vocab_blob)]
+        return np.unique(np.searchsorted(self._vocab_starts, starts, side="right") - 1)
+
+    def substring_rows(self, pattern: str) -> np.ndarray:
+        """Candidate rows for `pattern in f"{text} {title} {campaign_id}"` (lowercased)
+
+        Every whitespace-free piece of the pattern has to fall inside a single
+        token, so rows holding a token that contains each piece are a superset
+        of the matches. Callers verify the candidates.
+        """
+        pieces = pattern.split()
+        if not pieces:
+            return np.arange(self.count, dtype=np.int32)
+
+        candidates = None
+        for piece in pieces:
+            token_ids = self._tokens_containing(piece)
+            piece_rows = [self._token_rows(field, token_id) for token_id in token_ids for field in FIELDS]
+            piece_rows = np.unique(np.concatenate(piece_rows)) if piece_rows else np.zeros(0, dtype=np.int32)
+            candidates = piece_rows if candidates is None else np.intersect1d(candidates, piece_rows, assume_unique=True)
+            if len(candidates) == 0:
+                break
+        return candidates
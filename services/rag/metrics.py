@@ -0,0 +1,117 @@
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import math
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Query stages in pipeline order; concurrent hybrid stages overlap, so they do not sum to "total"
+STAGES = ("preprocess", "embed", "vector_search", "keyword_search", "fuzzy_search", "merge", "rerank",
+          "cross_encoder", "diversify", "context_build", "generation", "total")
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+@contextmanager
+def stage_timer(timings: Optional[Dict[str, float]], stage: str) -> Iterator[None]:
+    """Add the wall time of the block, in milliseconds, to timings[stage] (no-op if timings is None)"""
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + (time.perf_counter() - start) * 1000
+
+def timed_stage(timings: Optional[Dict[str, float]], stage: str, function: Callable[[], Any]) -> Callable[[], Any]:
+    """function wrapped in stage_timer(timings, stage), for stages run through run_stages()"""
+    def run():
+        with stage_timer(timings, stage):
+            return function()
+    return run
+
+class LatencyHistogram:
+    """Latency histogram with fixed, geometrically growing buckets
+
+    Bucket upper bounds grow by GROWTH from MIN_MS to MAX_MS, so memory is
+    constant and a quantile is off by at most one bucket width (~10%).
+    Larger values land in an overflow bucket; quantiles are capped at the
+    largest recorded value.
+    """
+
+    MIN_MS = 0.01
+    MAX_MS = 120_000.0
+    GROWTH = 1.1
+
+    def __init__(self):
+        self.bounds: List[float] = [self.MIN_MS * self.GROWTH ** i
+                                    for i in range(int(math.log(self.MAX_MS / self.MIN_MS, self.GROWTH)) + 2)]
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, value_ms: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value_ms)] += 1
+            self.count += 1
+            self.sum += value_ms
+            self.max = max(self.max, value_ms)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile, in milliseconds (0.0 if empty)"""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = max(math.ceil(q * self.count), 1)
+            seen = 0
+            for i, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if seen >= rank:
+                    return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+            return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Count, mean, max and p50/p95/p99 in milliseconds"""
+        with self._lock:
+            count, total, largest = self.count, self.sum, self.max
+        summary = {"count": count, "mean_ms": round(total / count, 3) if count else 0.0, "max_ms": round(largest, 3)}
+        for q in QUANTILES:
+            summary[f"p{round(q * 100)}_ms"] = round(self.quantile(q), 3)
+        return summary
+
+class LatencyMetrics:
+    """Per-stage latency histograms of the query path"""
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, timings: Dict[str, float]):
+        """Add one query's stage timings (milliseconds, see stage_timer()) to the histograms"""
+        # Copy first: a timed-out retrieval stage may still write to timings
+        for stage, value_ms in dict(timings).items():
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                with self._lock:
+                    histogram = self.histograms.setdefault(stage, LatencyHistogram())
+            histogram.record(value_ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """summary() of every recorded stage, in pipeline order"""
+        with self._lock:
+            histograms = dict(self.histograms)
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        return {stage: histograms[stage].summary() for stage in sorted(histograms, key=lambda stage: order.get(stage, len(order)))}
@@ -1,17 +1,63 @@
 import sys
 from pathlib import Path
 import re
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Iterable, List, Tuple, FrozenSet, NamedTuple
 
 project_root = Path(__file__).parent.parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 import logging
+import numpy as np
+from services.rag.bm25 import tokenize
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SEPARATOR_PATTERN = re.compile(r'[-_\s]+')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+WORD_PATTERN = re.compile(r'\b\w+\b')
+
+class VariationMatcher:
+    """The term variations of one query, compiled once for matching lowercased texts
+    
+    Variations shorter than 3 characters are ignored and ones with uppercase
+    letters are dropped, since they can never occur in lowercased text. The
+    any-match check only tests variations that do not contain another one,
+    because a longer variation can only match where a shorter one it
+    contains also does.
+    """
+    
+    def __init__(self, variations: Iterable[str]):
+        self.variations = sorted({variation for variation in variations if len(variation) > 2})
+        self.patterns = [variation for variation in self.variations if variation == variation.lower()]
+        self._minimal = [pattern for pattern in self.patterns if not any(other != pattern and other in pattern for other in self.patterns)]
+    
+    def search(self, text: str) -> bool:
+        """Whether any variation occurs in text"""
+        return any(pattern in text for pattern in self._minimal)
+    
+    def search_array(self, texts: np.ndarray) -> np.ndarray:
+        """search() over an array of strings, as a boolean array"""
+        found = np.zeros(len(texts), dtype=bool)
+        for pattern in self._minimal:
+            found |= np.char.find(texts, pattern) >= 0
+        return found
+    
+    def findall(self, text: str) -> List[str]:
+        """All variations occurring in text, sorted"""
+        return [pattern for pattern in self.patterns if pattern in text]
+    
+    def match_fields(self, text: str, title: str, campaign_id: str) -> Tuple[bool, bool, bool]:
+        """(in f"{text} {title} {campaign_id}", in title, in campaign_id)
+        
+        Title and campaign_id are only checked when the combined text matched.
+        """
+        if not self.search(f"{text} {title} {campaign_id}"):
+            return False, False, False
+        return True, self.search(title), self.search(campaign_id)
+
 class TurkishPreprocessor:
     """Turkish text preprocessing with broad synonym expansion"""
     
@@ -26,20 +72,21 @@ class TurkishPreprocessor:
         }
         
         self.common_patterns = [
-            (r'\boto\b', 'auto'),
-            (r'\bautoking\b', 'auto king'),
-            (r'\bauto-king\b', 'auto king'),
-            (r'\bauto_king\b', 'auto king'),
+            (re.compile(r'\boto\b', re.IGNORECASE), 'auto'),
+            (re.compile(r'\bautoking\b', re.IGNORECASE), 'auto king'),
+            (re.compile(r'\bauto-king\b', re.IGNORECASE), 'auto king'),
+            (re.compile(r'\bauto_king\b', re.IGNORECASE), 'auto king'),
         ]
     
     def _normalize_term(self, term: str) -> str:
         """Normalize term by removing punctuation and standardizing"""
-        normalized = re.sub(r'[-_\s]+', ' ', term.lower())
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
+        normalized = SEPARATOR_PATTERN.sub(' ', term.lower())
+        normalized = WHITESPACE_PATTERN.sub(' ', normalized).strip()
         return normalized
     
-    def _generate_variations(self, term: str) -> set:
-        """Generate all possible variations of a term"""
+    @lru_cache(maxsize=1024)
+    def _generate_variations(self, term: str) -> FrozenSet[str]:
+        """Generate all possible variations of a term (memoized)"""
         variations = set()
         term_lower = term.lower()
         
@@ -58,12 +105,12 @@ class TurkishPreprocessor:
             variations.add(''.join(w.capitalize() for w in words))
             variations.add(''.join(w[0].upper() + w[1:] if len(w) > 1 else w.upper() for w in words))
         
-        return variations
+        return frozenset(variations)
     
     def _find_turkish_english_match(self, query: str) -> Optional[str]:
         """Find Turkish-English word matches algorithmically"""
         query_lower = query.lower()
-        words = re.findall(r'\b\w+\b', query_lower)
+        words = WORD_PATTERN.findall(query_lower)
         
         for word in words:
             if word in self.turkish_to_english:
@@ -72,21 +119,19 @@ class TurkishPreprocessor:
         
         return None
     
+    @lru_cache(maxsize=1024)
     def preprocess_query(self, query: str) -> str:
-        """Preprocess query with broad synonym expansion"""
+        """Preprocess query with broad synonym expansion (memoized)"""
         processed = query
         query_lower = query.lower()
         
-        normalized_query = self._normalize_term(query)
-        query_variations = self._generate_variations(normalized_query)
-        
         turkish_english_match = self._find_turkish_english_match(query)
         if turkish_english_match:
             processed = turkish_english_match
         
         for pattern, replacement in self.common_patterns:
-            if re.search(pattern, query_lower):
-                processed = re.sub(pattern, replacement, processed, flags=re.IGNORECASE)
+            if pattern.search(query_lower):
+                processed = pattern.sub(replacement, processed)
                 break
         
         processed = processed.strip()
@@ -98,22 +143,44 @@ class TurkishPreprocessor:
     
     def find_synonym_in_text(self, query: str, text: str) -> bool:
         """Check if query or its variations exist in text"""
-        query_variations = self._generate_variations(query)
-        processed_query = self.preprocess_query(query)
-        processed_variations = self._generate_variations(processed_query)
-        
-        all_variations = query_variations | processed_variations
-        text_lower = text.lower()
-        
-        for variation in all_variations:
-            if len(variation) > 2 and variation in text_lower:
-                return True
-        
-        return False
+        return analyze_query(query).matcher.search(text.lower())
     
     def normalize_text(self, text: str) -> str:
         """Normalize Turkish text"""
-        text = re.sub(r"\s+", " ", text)
+        text = WHITESPACE_PATTERN.sub(" ", text)
         text = text.strip()
         return text
 
+# Shared by all callers; its memoized methods make a per-request instance wasteful
+turkish_preprocessor = TurkishPreprocessor()
+
+class QueryAnalysis(NamedTuple):
+    """Everything the retrieval stages and the generator derive from a query
+
+    Built once per query by analyze_query() and passed along, so no stage
+    preprocesses the query or regenerates its variations again.
+    """
+    query: str
+    query_lower: str
+    query_words: FrozenSet[str]
+    processed_query: str
+    matcher: VariationMatcher
+    terms: FrozenSet[str]
+
+@lru_cache(maxsize=256)
+def analyze_query(query: str) -> QueryAnalysis:
+    """Analyze a query (cached)
+    
+    The matcher covers the variations of the query and of its preprocessed
+    form; terms are the BM25 tokens of both.
+    """
+    processed_query = turkish_preprocessor.preprocess_query(query)
+    query_lower = query.lower()
+    return QueryAnalysis(
+        query=query,
+        query_lower=query_lower,
+        query_words=frozenset(query_lower.split()),
+        processed_query=processed_query,
+        matcher=VariationMatcher(turkish_preprocessor._generate_variations(query) | turkish_preprocessor._generate_variations(processed_query)),
+        terms=frozenset(tokenize(query)) | frozenset(tokenize(processed_query))
+    )
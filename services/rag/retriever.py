@@ -6,299 +6,782 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 import re
+import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 import numpy as np
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import Any, Callable, List, Dict, Tuple, Optional, NamedTuple
 from services.rag.vector_store import VectorStore
 from services.rag.embeddings import EmbeddingService
+from services.rag.preprocessing import QueryAnalysis, analyze_query
+from services.rag.keyword_index import ChunkFields, normalize_chunk
+from services.rag.fusion import FUSION_MODES, reciprocal_rank_fusion, weighted_fusion
+from services.rag.cross_encoder import CrossEncoderReranker, pair_text
+from services.rag.metrics import stage_timer, timed_stage
 from configs.rag_config import config
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class MatchFeatures(NamedTuple):
+    """Query match features of a candidate list, one array entry per candidate"""
+    word_overlap: np.ndarray
+    exact_in_title: np.ndarray
+    exact_in_id: np.ndarray
+    exact_in_text: np.ndarray
+    words_in_title: np.ndarray
+    words_in_id: np.ndarray
+    variation_match: np.ndarray
+    variation_in_title: np.ndarray
+    variation_in_id: np.ndarray
+    title_description: np.ndarray
+
+class VectorRanking(NamedTuple):
+    """Reranked vector candidates, best first: chunk rows, L2 distances, faiss positions and rerank scores"""
+    rows: np.ndarray
+    distances: np.ndarray
+    positions: np.ndarray
+    scores: np.ndarray
+
+EMPTY_VECTOR_RANKING = VectorRanking(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64),
+                                     np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64))
+
+_stage_executor: Optional[ThreadPoolExecutor] = None
+_stage_executor_lock = threading.Lock()
+
+def _get_stage_executor() -> ThreadPoolExecutor:
+    """Thread pool shared by all retrievers, created on first use"""
+    global _stage_executor
+    with _stage_executor_lock:
+        if _stage_executor is None:
+            _stage_executor = ThreadPoolExecutor(max_workers=config.hybrid_workers, thread_name_prefix="retrieval-stage")
+        return _stage_executor
+
+def run_stages(stages: List[Tuple[str, Callable[[], Any], float, Any]]) -> Tuple[List[Any], List[str]]:
+    """Run retrieval stages concurrently on the shared pool
+    
+    Embedding and faiss release the GIL, so stages overlap and the total
+    latency approaches that of the slowest stage. With HYBRID_WORKERS=0
+    the stages run serially in the calling thread, without timeouts.
+    
+    Args:
+        stages: (name, function, timeout in seconds (0: none), fallback) per stage
+    
+    Returns:
+        (results in stage order, names of stages that timed out); a stage that
+        misses its deadline (counted from submission) yields its fallback.
+        Exceptions raised by a stage propagate.
+    """
+    if config.hybrid_workers <= 0:
+        return [function() for _, function, _, _ in stages], []
+    
+    executor = _get_stage_executor()
+    start = time.monotonic()
+    futures = [executor.submit(function) for _, function, _, _ in stages]
+    results, timed_out = [], []
+    for (name, _, timeout, fallback), future in zip(stages, futures):
+        try:
+            results.append(future.result(timeout=max(start + timeout - time.monotonic(), 0) if timeout > 0 else None))
+        except FuturesTimeoutError:
+            future.cancel()
+            logger.warning(f"Retrieval stage '{name}' exceeded {timeout}s, continuing without it")
+            results.append(fallback)
+            timed_out.append(name)
+    return results, timed_out
+
+def top_k_order(scores: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+    """Indices of the k highest scores, best first, ties in index order
+    
+    Same as np.argsort(-scores, kind="stable")[:k], but np.argpartition
+    selects the k best in linear time and only those are sorted.
+    """
+    scores = np.asarray(scores)
+    if k is None or k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+    # Of the scores equal to the k-th, keep the earliest, as a stable sort would
+    above = np.flatnonzero(scores > kth)
+    selected = np.concatenate([above, np.flatnonzero(scores == kth)[:k - len(above)]])
+    return selected[np.lexsort((selected, -scores[selected]))]
+
 class Retriever:
-    def __init__(self, vector_store: VectorStore, embedding_service: EmbeddingService):
+    def __init__(self, vector_store: VectorStore, embedding_service: EmbeddingService, cross_encoder: Optional[CrossEncoderReranker] = None):
         self.vector_store = vector_store
         self.embedding_service = embedding_service
+        self.cross_encoder = cross_encoder
         self.similarity_threshold = config.vector_similarity_threshold
+        # Memoized per retriever, so the semantic cache lookup and the vector stage embed a query once
+        self.embed_query = lru_cache(maxsize=256)(self._embed_query)
     
-    def retrieve(self, query: str, k: int = 5, similarity_threshold: Optional[float] = None) -> List[Dict]:
+    def retrieve(self, query: str, k: int = 5, similarity_threshold: Optional[float] = None, filters: Optional[Dict] = None,
+                 analysis: Optional[QueryAnalysis] = None, fetch_k: Optional[int] = None, stats: Optional[Dict] = None,
+                 timings: Optional[Dict[str, float]] = None) -> List[Dict]:
         """Multi-stage retrieval: vector search with semantic matching
         
         Args:
             query: Query text
             k: Number of results to return
             similarity_threshold: Maximum L2 distance threshold (default: from config)
+            filters: Metadata filters applied inside the vector search (see VectorStore.filter_mask)
+            analysis: analyze_query(query), if the caller already has it
+            fetch_k: Number of nearest neighbours to fetch and rerank (default: k * VECTOR_FETCH_FACTOR)
+            stats: Optional dict that receives the candidate sizes used
+            timings: Optional dict that receives the embed, vector_search and rerank times (see stage_timer())
+        """
+        if fetch_k is None:
+            fetch_k = k * config.vector_fetch_factor
+        fetch_k = min(fetch_k, self.vector_store.index.ntotal)
+        if stats is not None:
+            stats.update({"vector_fetch": fetch_k, "vector_rerank": k})
+        
+        with stage_timer(timings, "embed"):
+            query_vector = self.embed_query(query)
+        return self._rank_vector_candidates(query, query_vector, k, fetch_k, similarity_threshold, filters, analysis, timings)
+    
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Embedding of the preprocessed query (use the memoized embed_query())"""
+        query_processed = self.embedding_service.preprocess_turkish(query)
+        return np.array(self.embedding_service.embed_text(query_processed)).astype('float32')
+    
+    def _rank_vector_candidates(self, query: str, query_vector: np.ndarray, k: int, fetch_k: int, similarity_threshold: Optional[float],
+                                filters: Optional[Dict], analysis: Optional[QueryAnalysis], timings: Optional[Dict[str, float]] = None) -> List[Dict]:
+        """Fetch fetch_k neighbours, drop those beyond the threshold, rerank and keep k"""
+        ranking = self._vector_ranking(query, query_vector, k, fetch_k, similarity_threshold, filters, analysis, timings)
+        with stage_timer(timings, "rerank"):
+            return self._vector_results(ranking)
+    
+    def _vector_ranking(self, query: str, query_vector: np.ndarray, k: int, fetch_k: int, similarity_threshold: Optional[float],
+                        filters: Optional[Dict], analysis: Optional[QueryAnalysis], timings: Optional[Dict[str, float]] = None) -> VectorRanking:
+        """_rank_vector_candidates() without building result dicts"""
+        if fetch_k <= 0:
+            return EMPTY_VECTOR_RANKING
+        with stage_timer(timings, "vector_search"):
+            rows, distances = self.vector_store.search_rows(query_vector, k=fetch_k, filters=filters)
+        with stage_timer(timings, "rerank"):
+            return self._score_rows(query, rows, distances, k, similarity_threshold, analysis)
+    
+    def _rank_rows(self, query: str, rows: np.ndarray, distances: np.ndarray, k: int, similarity_threshold: Optional[float],
+                   analysis: Optional[QueryAnalysis]) -> List[Dict]:
+        """rerank() faiss neighbours given as (rows, distances), building result dicts for the k best only"""
+        return self._vector_results(self._score_rows(query, rows, distances, k, similarity_threshold, analysis))
+    
+    def _score_rows(self, query: str, rows: np.ndarray, distances: np.ndarray, k: int, similarity_threshold: Optional[float],
+                    analysis: Optional[QueryAnalysis]) -> VectorRanking:
+        """rerank() scores of faiss neighbours given as (rows, distances), k best first
+        
+        Candidates are scored from the keyword index's precomputed fields.
         """
         if similarity_threshold is None:
             similarity_threshold = self.similarity_threshold
+        positions = self._threshold_positions(distances, similarity_threshold)
+        if len(positions) == 0:
+            return EMPTY_VECTOR_RANKING
+        rows, distances = np.asarray(rows, dtype=np.int64)[positions], np.asarray(distances, dtype=np.float64)[positions]
         
-        query_processed = self.embedding_service.preprocess_turkish(query)
-        query_vector = self.embedding_service.embed_text(query_processed)
+        analysis = analysis or analyze_query(query)
+        keyword_index = self.vector_store.keyword_index
+        all_fields = [keyword_index.fields(row) for row in rows.tolist()]
+        scores = self._rerank_scores(analysis, all_fields, distances, self.vector_store.type_mask("title_description")[rows])
         
-        query_vector_np = np.array(query_vector).astype('float32')
-        results = self.vector_store.search(query_vector_np, k=min(k*15, self.vector_store.index.ntotal))
+        order = top_k_order(scores, k)
+        return VectorRanking(rows[order], distances[order], positions[order], scores[order])
+    
+    def _vector_results(self, ranking: VectorRanking) -> List[Dict]:
+        """Result dicts of a vector ranking with score (L2 distance), rank (faiss position) and rerank_score"""
+        results = []
+        for row, distance, position, score in zip(*(values.tolist() for values in ranking)):
+            result = self.vector_store.chunk_result(row)
+            result["score"] = distance
+            result["rank"] = position + 1
+            result["rerank_score"] = score
+            results.append(result)
+        return results
+    
+    def retrieve_many(self, queries: List[str], k: int = 5, similarity_threshold: Optional[float] = None, filters: Optional[Dict] = None) -> List[List[Dict]]:
+        """Batched retrieve(): one embed_batch call and one faiss search for all queries
         
-        filtered_results = self._filter_by_threshold(results, similarity_threshold)
+        Args:
+            queries: Query texts
+            k: Number of results per query
+            similarity_threshold: Maximum L2 distance threshold (default: from config)
+            filters: Metadata filters shared by all queries
+        
+        Returns:
+            One reranked result list per query, same as retrieve()
+        """
+        if not queries:
+            return []
+        if similarity_threshold is None:
+            similarity_threshold = self.similarity_threshold
         
-        reranked = self.rerank(query, filtered_results)
+        queries_processed = [self.embedding_service.preprocess_turkish(query) for query in queries]
+        query_matrix = np.array(self.embedding_service.embed_batch(queries_processed)).astype('float32')
         
-        return reranked[:k]
+        fetch_k = min(k * config.vector_fetch_factor, self.vector_store.index.ntotal)
+        if fetch_k <= 0:
+            return [[] for _ in queries]
+        batch_rows = self.vector_store.search_rows_batch(query_matrix, k=fetch_k, filters=filters)
+        return [self._rank_rows(query, rows, distances, k, similarity_threshold, None) for query, (rows, distances) in zip(queries, batch_rows)]
     
-    def _filter_by_threshold(self, results: List[Dict], max_distance: float) -> List[Dict]:
-        """Filter results by maximum distance threshold
+    def _threshold_positions(self, distances: np.ndarray, max_distance: float) -> np.ndarray:
+        """Positions of the distances within the maximum distance threshold
         
         Note: If threshold is very high (>= 100), filtering is effectively disabled
         to allow reranking to handle quality sorting.
         """
+        distances = np.asarray(distances)
         if max_distance >= 100.0:
             logger.debug(f"Threshold {max_distance} is very high, skipping distance filtering")
+            return np.arange(len(distances))
+        
+        positions = np.flatnonzero(distances <= max_distance)
+        if len(positions) == 0 and len(distances) > 0:
+            logger.warning(f"All {len(distances)} results filtered out by threshold {max_distance}. Returning top results anyway.")
+            return np.arange(min(10, len(distances)))
+        
+        logger.info(f"Filtered {len(distances)} results to {len(positions)} using threshold {max_distance}")
+        return positions
+    
+    def _result_fields(self, results: List[Dict]) -> List[ChunkFields]:
+        """Normalized fields of results: precomputed for indexed chunks, computed for the rest"""
+        fields = [None] * len(results)
+        indexed = [i for i, result in enumerate(results) if "chunk_id" in result]
+        if indexed:
+            for i, chunk_fields in zip(indexed, self.vector_store.chunk_fields([results[i]["chunk_id"] for i in indexed])):
+                fields[i] = chunk_fields
+        return [chunk_fields or normalize_chunk(result) for chunk_fields, result in zip(fields, results)]
+    
+    def _word_overlaps(self, query_words: frozenset, all_fields: List[ChunkFields]) -> np.ndarray:
+        """Number of query words among each chunk's text tokens; indexed chunks are counted with one isin over all their tokens"""
+        overlaps = np.zeros(len(all_fields), dtype=np.int64)
+        indexed = [i for i, fields in enumerate(all_fields) if fields.token_ids is not None]
+        if indexed:
+            token_ids = [all_fields[i].token_ids for i in indexed]
+            owners = np.repeat(np.arange(len(indexed)), [len(ids) for ids in token_ids])
+            hits = np.isin(np.concatenate(token_ids), self.vector_store.keyword_index.lookup(query_words))
+            overlaps[indexed] = np.bincount(owners, weights=hits, minlength=len(indexed)).astype(np.int64)
+        for i, fields in enumerate(all_fields):
+            if fields.token_ids is None:
+                overlaps[i] = len(query_words & fields.words)
+        return overlaps
+    
+    def _match_features(self, analysis: QueryAnalysis, all_fields: List[ChunkFields], title_description: np.ndarray, with_text: bool = True) -> MatchFeatures:
+        """Feature arrays of the candidates, aligned with all_fields
+        
+        Without with_text the features that need the chunk text (word_overlap,
+        exact_in_text, variation_match) are left as None.
+        """
+        count = len(all_fields)
+        query_lower, matcher = analysis.query_lower, analysis.matcher
+        titles = np.array([fields.title for fields in all_fields], dtype=str)
+        campaign_ids = np.array([fields.campaign_id for fields in all_fields], dtype=str)
+        
+        def words_in(values: np.ndarray) -> np.ndarray:
+            counts = np.zeros(count, dtype=np.int64)
+            for word in analysis.query_words:
+                counts += np.char.find(values, word) >= 0
+            return counts
+        
+        variation_in_title = matcher.search_array(titles)
+        variation_in_id = matcher.search_array(campaign_ids)
+        word_overlap = exact_in_text = variation_match = None
+        if with_text:
+            word_overlap = self._word_overlaps(analysis.query_words, all_fields)
+            exact_in_text = np.fromiter((bool(fields.text) and query_lower in fields.text for fields in all_fields), dtype=bool, count=count)
+            # A variation in the title or campaign_id is also in the combined text
+            variation_match = variation_in_title | variation_in_id
+            for i in np.flatnonzero(~variation_match):
+                fields = all_fields[i]
+                variation_match[i] = matcher.search(f"{fields.text} {fields.title} {fields.campaign_id}")
+        
+        return MatchFeatures(
+            word_overlap=word_overlap,
+            exact_in_title=(titles != "") & (np.char.find(titles, query_lower) >= 0),
+            exact_in_id=(campaign_ids != "") & (np.char.find(campaign_ids, query_lower) >= 0),
+            exact_in_text=exact_in_text,
+            words_in_title=words_in(titles),
+            words_in_id=words_in(campaign_ids),
+            variation_match=variation_match,
+            variation_in_title=variation_in_title,
+            variation_in_id=variation_in_id,
+            title_description=title_description
+        )
+    
+    def _apply_match_rules(self, scores: np.ndarray, features: MatchFeatures, num_words: int, text_rule: bool) -> np.ndarray:
+        """Apply the first matching rule to each score: clamp into a range or add a bonus
+        
+        Rules in priority order: exact query in campaign_id, title (and text,
+        if text_rule), then the share of query words found in campaign_id and
+        title, then any query word in title or campaign_id.
+        """
+        ratio_title = features.words_in_title / max(num_words, 1)
+        ratio_id = features.words_in_id / max(num_words, 1)
+        # (condition, low, high, bonus)
+        rules = [(features.exact_in_id, 0.9, 0.98, 0.0), (features.exact_in_title, 0.8, 0.92, 0.0)]
+        if text_rule:
+            rules.append((features.exact_in_text, 0.7, 0.85, 0.0))
+        rules += [
+            (ratio_id >= 0.7, 0.75, 0.88, 0.0),
+            (ratio_title >= 0.7, 0.65, 0.82, 0.0),
+            (ratio_id >= 0.5, 0.6, 0.78, 0.0),
+            (ratio_title >= 0.5, 0.55, 0.72, 0.0),
+            (features.words_in_title > 0, -np.inf, np.inf, 0.2),
+            (features.words_in_id > 0, -np.inf, np.inf, 0.25),
+        ]
+        conditions = [rule[0] for rule in rules]
+        low = np.select(conditions, [rule[1] for rule in rules], default=-np.inf)
+        high = np.select(conditions, [rule[2] for rule in rules], default=np.inf)
+        bonus = np.select(conditions, [rule[3] for rule in rules], default=0.0)
+        return np.minimum(np.maximum(scores + bonus, low), high)
+    
+    def _sort_by_rerank_score(self, results: List[Dict], scores: np.ndarray, k: Optional[int] = None) -> List[Dict]:
+        """Return the k best results (default: all), best first with their rerank_score (ties keep their order)"""
+        order = top_k_order(scores, k)
+        selected = [results[i] for i in order.tolist()]
+        for result, score in zip(selected, scores[order].tolist()):
+            result["rerank_score"] = score
+        return selected
+    
+    @staticmethod
+    def _title_descriptions(results: List[Dict]) -> np.ndarray:
+        return np.array([result.get("type", "") == "title_description" for result in results], dtype=bool)
+    
+    def rerank(self, query: str, results: List[Dict], analysis: Optional[QueryAnalysis] = None, k: Optional[int] = None) -> List[Dict]:
+        """Reranking that prioritizes semantic similarity and variation matches
+        
+        Features of all candidates are extracted into arrays and scored with
+        vectorized rules (see _apply_match_rules()). Sorts results in place,
+        keeping only the k best if k is given.
+        """
+        if not results:
             return results
+        analysis = analysis or analyze_query(query)
+        distances = np.array([result.get("score", float('inf')) for result in results], dtype=np.float64)
+        scores = self._rerank_scores(analysis, self._result_fields(results), distances, self._title_descriptions(results))
+        results[:] = self._sort_by_rerank_score(results, scores, k)
+        return results
+    
+    def _rerank_scores(self, analysis: QueryAnalysis, all_fields: List[ChunkFields], distances: np.ndarray, title_description: np.ndarray) -> np.ndarray:
+        """rerank() scores of candidates given their fields and L2 distances (inf: no vector score)"""
+        features = self._match_features(analysis, all_fields, title_description)
+        num_words = len(analysis.query_words)
         
-        filtered = []
-        for result in results:
-            distance = result.get("score", float('inf'))
-            if distance <= max_distance:
-                filtered.append(result)
+        max_distance = max(self.similarity_threshold, 10.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            normalized_distances = np.minimum(distances / max_distance, 1.0) if max_distance > 0 else np.ones_like(distances)
+        semantic_similarity = np.where(distances < np.inf, 1.0 - normalized_distances, 0.0)
+        
+        word_match_score = features.word_overlap / max(num_words, 1)
+        
+        scores = semantic_similarity * 0.4 + word_match_score * 0.3
+        scores = scores + np.where(features.title_description, 0.1, 0.0)
+        scores = self._apply_match_rules(scores, features, num_words, text_rule=True)
+        
+        scores = scores + np.where(features.variation_match, 0.1, 0.0)
+        scores = scores + np.where(features.variation_in_title, 0.15, 0.0)
+        scores = scores + np.where(features.variation_in_id, 0.2, 0.0)
+        return np.minimum(scores, 0.99)
+    
+    def cross_encoder_rerank(self, query: str, results: List[Dict], k: int, stats: Optional[Dict] = None) -> List[Dict]:
+        """Rerank the top RERANK_TOP_N results with the cross-encoder and keep k
+        
+        Scoring must finish within RERANK_BUDGET_MS; if it does not, or the
+        model fails, the incoming (heuristic) order is kept. Without a
+        cross-encoder this only truncates to k.
+        
+        Args:
+            query: Query text
+            results: Retrieved results, best first
+            k: Number of results to return
+            stats: Optional dict that receives the number of pairs scored, and
+                "cross_encoder" under "timed_out" on fallback
+        """
+        candidates = results[:config.rerank_top_n]
+        if self.cross_encoder is None or len(candidates) < 2:
+            return results[:k]
+        
+        if stats is not None:
+            stats["cross_encoder"] = len(candidates)
+        budget = config.rerank_budget_ms / 1000
+        # The deadline also stops an abandoned scoring thread at its next batch
+        deadline = time.monotonic() + budget
+        try:
+            (scores,), timed_out = run_stages([
+                ("cross_encoder", lambda: self.cross_encoder.score(query, [pair_text(result) for result in candidates], deadline), budget, None)
+            ])
+        except Exception as e:
+            logger.error(f"Cross-encoder rerank failed, keeping heuristic order: {e}")
+            return results[:k]
+        if scores is None:
+            if not timed_out:
+                logger.warning(f"Cross-encoder rerank exceeded {config.rerank_budget_ms}ms, keeping heuristic order")
+            if stats is not None:
+                stats["timed_out"] = stats.get("timed_out", []) + ["cross_encoder"]
+            return results[:k]
+        
+        order = np.argsort(-scores, kind="stable")[:k]
+        reranked = []
+        for i in order.tolist():
+            result = dict(candidates[i])
+            result["cross_score"] = float(scores[i])
+            reranked.append(result)
+        return reranked
+    
+    def diversify(self, results: List[Dict], k: int, stats: Optional[Dict] = None) -> List[Dict]:
+        """Pick up to k non-redundant results by campaign grouping and Maximal Marginal Relevance
+        
+        Results beyond DIVERSIFY_PER_CAMPAIGN chunks of one campaign are
+        dropped first. MMR then repeatedly takes the result maximizing
+        MMR_LAMBDA * relevance - (1 - MMR_LAMBDA) * (max cosine similarity to
+        the results taken so far), where relevance falls linearly with the
+        incoming rank, so the upstream ranking is kept. Similarities use the
+        stored chunk vectors. Results more similar than
+        DIVERSIFY_MAX_SIMILARITY to a taken one are skipped, so fewer than k
+        may be returned.
+        
+        Args:
+            results: Retrieved results, best first
+            k: Maximum number of results to return
+            stats: Optional dict that receives the number of candidates considered
+        """
+        if stats is not None:
+            stats["diversify"] = len(results)
+        if len(results) <= 1 or k <= 0:
+            return results[:k]
+        
+        per_campaign = config.diversify_per_campaign
+        if per_campaign > 0:
+            taken: Dict[str, int] = {}
+            grouped = []
+            for result in results:
+                campaign_id = result.get("campaign_id", "")
+                if taken.get(campaign_id, 0) < per_campaign:
+                    taken[campaign_id] = taken.get(campaign_id, 0) + 1
+                    grouped.append(result)
+            results = grouped
+        
+        # Results without a known chunk_id get a zero vector, i.e. no similarity to anything
+        vectors, _ = self.vector_store.chunk_vectors([result.get("chunk_id", -1) for result in results])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+        similarity = vectors @ vectors.T
+        
+        count = len(results)
+        relevance = 1.0 - np.arange(count) / count
+        max_similarity = np.zeros(count, dtype=np.float32)
+        available = np.ones(count, dtype=bool)
+        selected = []
+        while len(selected) < k and available.any():
+            mmr = np.where(available, config.mmr_lambda * relevance - (1 - config.mmr_lambda) * max_similarity, -np.inf)
+            best = int(np.argmax(mmr))
+            selected.append(best)
+            available[best] = False
+            max_similarity = np.maximum(max_similarity, similarity[best])
+            available &= max_similarity < config.diversify_max_similarity
+        return [results[i] for i in selected]
+    
+    def candidate_sizes(self, k: int) -> Dict[str, int]:
+        """Per-stage candidate budget of hybrid_search() for k results
+        
+        vector_rerank vector results (reranked from vector_fetch neighbours),
+        keyword results and, with HYBRID_FUZZY_FACTOR > 0, fuzzy title /
+        campaign_id matches are merged and rescored. In adaptive mode
+        vector_fetch is the upper bound.
+        """
+        vector_rerank = k * config.hybrid_vector_factor
+        sizes = {
+            "vector_fetch": min(vector_rerank * config.vector_fetch_factor, self.vector_store.index.ntotal),
+            "vector_rerank": vector_rerank,
+            "keyword": k * config.hybrid_keyword_factor
+        }
+        if config.hybrid_fuzzy_factor > 0:
+            sizes["fuzzy"] = k * config.hybrid_fuzzy_factor
+        return sizes
+    
+    def _is_confident(self, scores: np.ndarray, k: int) -> bool:
+        """Whether the k best rerank scores (sorted, best first) all reach HYBRID_CONFIDENCE"""
+        return len(scores) >= k and bool(np.all(scores[:k] >= config.hybrid_confidence))
+    
+    def _adaptive_vector_ranking(self, query: str, k: int, sizes: Dict[str, int], filters: Optional[Dict], analysis: QueryAnalysis,
+                                 timings: Optional[Dict[str, float]] = None) -> VectorRanking:
+        """Vector stage of adaptive hybrid_search()
+        
+        Starts by fetching vector_rerank neighbours and doubles the pool, up to
+        vector_fetch, while the top k results are low-confidence. Records the
+        final fetch size and the number of rounds in sizes.
+        """
+        with stage_timer(timings, "embed"):
+            query_vector = self.embed_query(query)
+        max_fetch = sizes["vector_fetch"]
+        fetch_k = min(sizes["vector_rerank"], max_fetch)
+        rounds = 1
+        ranking = self._vector_ranking(query, query_vector, sizes["vector_rerank"], fetch_k, None, filters, analysis, timings)
+        while fetch_k < max_fetch and not self._is_confident(ranking.scores, k):
+            fetch_k = min(fetch_k * 2, max_fetch)
+            rounds += 1
+            ranking = self._vector_ranking(query, query_vector, sizes["vector_rerank"], fetch_k, None, filters, analysis, timings)
+        sizes.update({"vector_fetch": fetch_k, "rounds": rounds})
+        return ranking
+    
+    def hybrid_search(self, query: str, k: int = 5, filters: Optional[Dict] = None, analysis: Optional[QueryAnalysis] = None,
+                      stats: Optional[Dict] = None, fusion: Optional[str] = None, timings: Optional[Dict[str, float]] = None) -> List[Dict]:
+        """Hybrid search combining vector and keyword matching, plus fuzzy name matching if HYBRID_FUZZY_FACTOR > 0
+        
+        Args:
+            query: Query text
+            k: Number of results to return
+            filters, analysis: See retrieve()
+            stats: Optional dict that receives the candidate sizes used (see candidate_sizes())
+            fusion: How the two result lists are combined (default: HYBRID_FUSION)
+                - "heuristic": rerank both lists and rescore the merged results
+                - "rrf": reciprocal rank fusion of the raw vector and keyword rankings
+                - "weighted": weighted sum of min-max normalized vector similarity and keyword score
+            timings: Optional dict that receives the time of each stage (see stage_timer());
+                the stages run concurrently, so their times overlap
+        """
+        analysis = analysis or analyze_query(query)
+        fusion = fusion or config.hybrid_fusion
+        if fusion not in FUSION_MODES:
+            raise ValueError(f"Unknown fusion mode: {fusion}. Must be one of {FUSION_MODES}")
+        sizes = self.candidate_sizes(k)
+        if fusion != "heuristic":
+            return self._fused_search(query, k, fusion, sizes, filters, analysis, stats, timings)
+        
+        # The adaptive stage records its sizes in its own copy, so one that times out cannot change them later
+        vector_sizes = dict(sizes)
+        if config.hybrid_adaptive:
+            vector_stage = lambda: self._adaptive_vector_ranking(query, k, vector_sizes, filters, analysis, timings)
+        else:
+            def vector_stage():
+                with stage_timer(timings, "embed"):
+                    query_vector = self.embed_query(query)
+                return self._vector_ranking(query, query_vector, sizes["vector_rerank"], sizes["vector_fetch"], None, filters, analysis, timings)
+        
+        # Like _fused_search(), the stages return rows and scores; _rescore_merged() builds dicts for the final k only
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64))
+        keyword_stage = lambda: self._keyword_ranking(analysis, sizes["keyword"], filters)
+        stages = [
+            ("vector", vector_stage, config.hybrid_vector_timeout, EMPTY_VECTOR_RANKING),
+            ("keyword", timed_stage(timings, "keyword_search", keyword_stage), config.hybrid_keyword_timeout, empty)
+        ]
+        if "fuzzy" in sizes:
+            fuzzy_stage = lambda: self._fuzzy_ranking(analysis, sizes["fuzzy"], filters)
+            stages.append(("fuzzy", timed_stage(timings, "fuzzy_search", fuzzy_stage), config.hybrid_keyword_timeout, empty))
+        (vector_ranking, keyword_ranking, *fuzzy_ranking), timed_out = run_stages(stages)
+        
+        if "vector" not in timed_out:
+            sizes.update(vector_sizes)
+        sizes["fusion"] = fusion
+        if timed_out:
+            sizes["timed_out"] = timed_out
+        logger.info(f"Hybrid candidates: {sizes}")
+        if stats is not None:
+            stats.update(sizes)
+        
+        rankings = [("keyword_score", *keyword_ranking)] + [("fuzzy_score", *ranking) for ranking in fuzzy_ranking]
+        with stage_timer(timings, "merge"):
+            return self._rescore_merged(analysis, vector_ranking, rankings, k)
+    
+    def _rescore_merged(self, analysis: QueryAnalysis, vector_ranking: VectorRanking, rankings: List[Tuple[str, np.ndarray, np.ndarray]], k: int) -> List[Dict]:
+        """Merge the heuristic hybrid stages and rescore the merged rows by title and campaign_id matches
+        
+        Args:
+            analysis: analyze_query() of the query
+            vector_ranking: Reranked vector candidates, merged first
+            rankings: (score key, rows, scores) of the keyword and fuzzy stages, merged in order
+            k: Number of results to return
+        
+        A chunk found by several stages (same campaign_id and chunk_index)
+        keeps its first occurrence and that stage's score. Result dicts are
+        built for the k best only and carry that stage's score key.
+        """
+        stage_rows = [vector_ranking.rows] + [rows for _, rows, _ in rankings]
+        stage_scores = [vector_ranking.scores] + [scores for _, _, scores in rankings]
+        seen = set()
+        merged = []
+        for stage, rows in enumerate(stage_rows):
+            for i, row in enumerate(rows.tolist()):
+                key = self.vector_store.chunk_key(row)
+                if key not in seen:
+                    seen.add(key)
+                    merged.append((stage, i))
+        if not merged:
+            return []
+        
+        rows = np.array([stage_rows[stage][i] for stage, i in merged], dtype=np.int64)
+        keyword_index = self.vector_store.keyword_index
+        all_fields = [keyword_index.fields(row) for row in rows.tolist()]
+        features = self._match_features(analysis, all_fields, self.vector_store.type_mask("title_description")[rows], with_text=False)
+        
+        scores = np.array([stage_scores[stage][i] for stage, i in merged], dtype=np.float64)
+        scores = scores + np.where(features.title_description, 0.2, 0.0)
+        scores = self._apply_match_rules(scores, features, len(analysis.query_words), text_rule=False)
+        
+        scores = scores + np.where(features.variation_in_title, 0.2, 0.0)
+        scores = scores + np.where(features.variation_in_id, 0.3, 0.0)
+        scores = np.minimum(scores, 0.99)
+        
+        results = []
+        for j in top_k_order(scores, k).tolist():
+            stage, i = merged[j]
+            result = self.vector_store.chunk_result(int(rows[j]))
+            if stage == 0:
+                result["score"] = float(vector_ranking.distances[i])
+                result["rank"] = int(vector_ranking.positions[i]) + 1
             else:
-                logger.debug(f"Filtered out result with distance {distance:.4f} (threshold: {max_distance})")
-        
-        if len(filtered) == 0 and len(results) > 0:
-            logger.warning(f"All {len(results)} results filtered out by threshold {max_distance}. Returning top results anyway.")
-            return results[:min(10, len(results))]
-        
-        logger.info(f"Filtered {len(results)} results to {len(filtered)} using threshold {max_distance}")
-        return filtered
-    
-    def rerank(self, query: str, results: List[Dict]) -> List[Dict]:
-        """Reranking that prioritizes semantic similarity and variation matches"""
-        from services.rag.preprocessing import TurkishPreprocessor
-        preprocessor = TurkishPreprocessor()
-        
-        query_lower = query.lower()
-        query_words = set(query_lower.split())
-        processed_query = preprocessor.preprocess_query(query)
-        processed_variations = preprocessor._generate_variations(processed_query)
-        query_variations = preprocessor._generate_variations(query)
-        all_variations = query_variations | processed_variations
-        
-        for result in results:
-            text = result.get("text", "").lower()
-            title = result.get("title", "").lower() if result.get("title") else ""
-            campaign_id = result.get("campaign_id", "").lower()
-            full_text = f"{text} {title} {campaign_id}"
-            text_words = set(text.split())
-            
-            exact_overlap = len(query_words & text_words)
-            
-            variation_match = False
-            variation_in_title = False
-            variation_in_id = False
-            for variation in all_variations:
-                if len(variation) > 2:
-                    if variation in full_text:
-                        variation_match = True
-                    if variation in title:
-                        variation_in_title = True
-                    if variation in campaign_id:
-                        variation_in_id = True
-                        break
-            
-            semantic_distance = result.get("score", float('inf'))
-            if semantic_distance < float('inf'):
-                max_distance = max(self.similarity_threshold, 10.0)
-                normalized_distance = min(semantic_distance / max_distance, 1.0) if max_distance > 0 else 1.0
-                semantic_similarity = 1.0 - normalized_distance
+                result[rankings[stage - 1][0]] = float(stage_scores[stage][i])
+            result["rerank_score"] = float(scores[j])
+            results.append(result)
+        return results
+    
+    def _fused_search(self, query: str, k: int, fusion: str, sizes: Dict, filters: Optional[Dict], analysis: QueryAnalysis,
+                      stats: Optional[Dict], timings: Optional[Dict[str, float]] = None) -> List[Dict]:
+        """hybrid_search() with rank or score fusion
+        
+        Both stages return ranked chunk rows and scores only; chunk dicts are
+        built for the fused top k alone. The vector ranking is the raw faiss
+        order of vector_rerank neighbours, without reranking.
+        """
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64))
+        def vector_stage():
+            with stage_timer(timings, "embed"):
+                query_vector = self.embed_query(query)
+            with stage_timer(timings, "vector_search"):
+                return self.vector_store.search_rows(query_vector, k=sizes["vector_rerank"], filters=filters)
+        
+        keyword_stage = lambda: self._keyword_ranking(analysis, sizes["keyword"], filters)
+        stages = [
+            ("vector", vector_stage, config.hybrid_vector_timeout, empty),
+            ("keyword", timed_stage(timings, "keyword_search", keyword_stage), config.hybrid_keyword_timeout, empty)
+        ]
+        if "fuzzy" in sizes:
+            fuzzy_stage = lambda: self._fuzzy_ranking(analysis, sizes["fuzzy"], filters)
+            stages.append(("fuzzy", timed_stage(timings, "fuzzy_search", fuzzy_stage), config.hybrid_keyword_timeout, empty))
+        ((vector_rows, distances), (keyword_rows, keyword_scores), *fuzzy_ranking), timed_out = run_stages(stages)
+        
+        rankings = [(vector_rows, -distances), (keyword_rows, keyword_scores)] + fuzzy_ranking
+        weights = (config.hybrid_vector_weight, config.hybrid_keyword_weight, config.hybrid_fuzzy_weight)
+        with stage_timer(timings, "merge"):
+            if fusion == "rrf":
+                fused = reciprocal_rank_fusion([rows for rows, _ in rankings], weights, k, rrf_k=config.rrf_k)
             else:
-                semantic_similarity = 0.0
-            
-            word_match_score = exact_overlap / max(len(query_words), 1) if query_words else 0.0
-            
-            exact_match_in_title = query_lower in title if title else False
-            exact_match_in_id = query_lower in campaign_id if campaign_id else False
-            exact_match_in_text = query_lower in text if text else False
-            
-            key_words_in_title = sum(1 for word in query_words if word in title) if title else 0
-            key_words_in_id = sum(1 for word in query_words if word in campaign_id) if campaign_id else 0
-            key_words_in_text = sum(1 for word in query_words if word in text) if text else 0
-            
-            key_word_ratio_title = key_words_in_title / max(len(query_words), 1) if query_words else 0.0
-            key_word_ratio_id = key_words_in_id / max(len(query_words), 1) if query_words else 0.0
-            
-            rerank_score = semantic_similarity * 0.4 + word_match_score * 0.3
-            
-            chunk_type = result.get("type", "")
-            if chunk_type == "title_description":
-                rerank_score += 0.1
-            
-            if exact_match_in_id:
-                rerank_score = min(max(rerank_score, 0.9), 0.98)
-            elif exact_match_in_title:
-                rerank_score = min(max(rerank_score, 0.8), 0.92)
-            elif exact_match_in_text:
-                rerank_score = min(max(rerank_score, 0.7), 0.85)
-            elif key_word_ratio_id >= 0.7:
-                rerank_score = min(max(rerank_score, 0.75), 0.88)
-            elif key_word_ratio_title >= 0.7:
-                rerank_score = min(max(rerank_score, 0.65), 0.82)
-            elif key_word_ratio_id >= 0.5:
-                rerank_score = min(max(rerank_score, 0.6), 0.78)
-            elif key_word_ratio_title >= 0.5:
-                rerank_score = min(max(rerank_score, 0.55), 0.72)
-            elif key_words_in_title > 0:
-                rerank_score += 0.2
-            elif key_words_in_id > 0:
-                rerank_score += 0.25
-            
-            if variation_match:
-                rerank_score += 0.1
-            if variation_in_title:
-                rerank_score += 0.15
-            if variation_in_id:
-                rerank_score += 0.2
-            
-            result["rerank_score"] = min(rerank_score, 0.99)
-        
-        results.sort(key=lambda x: x.get("rerank_score", 0), reverse=True)
+                fused = weighted_fusion(rankings, weights, k)
+        
+        sizes = {"vector_fetch": len(vector_rows), "keyword": len(keyword_rows), "fusion": fusion}
+        if fuzzy_ranking:
+            sizes["fuzzy"] = len(fuzzy_ranking[0][0])
+        if timed_out:
+            sizes["timed_out"] = timed_out
+        logger.info(f"Hybrid candidates: {sizes}")
+        if stats is not None:
+            stats.update(sizes)
+        
+        with stage_timer(timings, "merge"):
+            vector_distances = dict(zip(vector_rows.tolist(), distances.tolist()))
+            keyword_scores = dict(zip(keyword_rows.tolist(), keyword_scores.tolist()))
+            fuzzy_scores = dict(zip(fuzzy_ranking[0][0].tolist(), fuzzy_ranking[0][1].tolist())) if fuzzy_ranking else {}
+            results = []
+            for row, fusion_score in fused:
+                result = self.vector_store.chunk_result(row)
+                if row in vector_distances:
+                    result["score"] = vector_distances[row]
+                if row in keyword_scores:
+                    result["keyword_score"] = keyword_scores[row]
+                if row in fuzzy_scores:
+                    result["fuzzy_score"] = fuzzy_scores[row]
+                result["fusion_score"] = fusion_score
+                results.append(result)
         return results
     
-    def hybrid_search(self, query: str, k: int = 5) -> List[Dict]:
-        """Hybrid search combining vector and keyword matching"""
-        from services.rag.preprocessing import TurkishPreprocessor
-        preprocessor = TurkishPreprocessor()
-        
-        processed_query = preprocessor.preprocess_query(query)
-        all_variations = preprocessor._generate_variations(query) | preprocessor._generate_variations(processed_query)
-        
-        vector_results = self.retrieve(query, k=k*15)
-        
-        keyword_results = self.keyword_search(query, k=k*5)
-        
-        combined = self._merge_results(vector_results, keyword_results)
-        
-        query_lower = query.lower()
-        query_words = set(query_lower.split())
-        
-        for result in combined:
-            title = result.get("title", "").lower() if result.get("title") else ""
-            text = result.get("text", "").lower()
-            campaign_id = result.get("campaign_id", "").lower()
-            chunk_type = result.get("type", "")
-            full_text = f"{text} {title} {campaign_id}"
-            
-            variation_in_title = False
-            variation_in_id = False
-            for variation in all_variations:
-                if len(variation) > 2:
-                    if variation in title:
-                        variation_in_title = True
-                    if variation in campaign_id:
-                        variation_in_id = True
-                        break
-            
-            key_words_in_title = sum(1 for word in query_words if word in title) if title else 0
-            key_words_in_id = sum(1 for word in query_words if word in campaign_id) if campaign_id else 0
-            key_word_ratio_title = key_words_in_title / max(len(query_words), 1) if query_words else 0.0
-            key_word_ratio_id = key_words_in_id / max(len(query_words), 1) if query_words else 0.0
-            
-            exact_match_in_title = query_lower in title if title else False
-            exact_match_in_id = query_lower in campaign_id if campaign_id else False
-            
-            current_score = result.get("rerank_score", result.get("keyword_score", result.get("score", 0)))
-            
-            if chunk_type == "title_description":
-                current_score += 0.2
-            
-            if exact_match_in_id:
-                current_score = min(max(current_score, 0.9), 0.98)
-            elif exact_match_in_title:
-                current_score = min(max(current_score, 0.8), 0.92)
-            elif key_word_ratio_id >= 0.7:
-                current_score = min(max(current_score, 0.75), 0.88)
-            elif key_word_ratio_title >= 0.7:
-                current_score = min(max(current_score, 0.65), 0.82)
-            elif key_word_ratio_id >= 0.5:
-                current_score = min(max(current_score, 0.6), 0.78)
-            elif key_word_ratio_title >= 0.5:
-                current_score = min(max(current_score, 0.55), 0.72)
-            elif key_words_in_title > 0:
-                current_score += 0.2
-            elif key_words_in_id > 0:
-                current_score += 0.25
-            
-            if variation_in_title:
-                current_score += 0.2
-            if variation_in_id:
-                current_score += 0.3
-            
-            result["rerank_score"] = min(current_score, 0.99)
-        
-        combined_sorted = sorted(combined, key=lambda x: x.get("rerank_score", x.get("keyword_score", x.get("score", float('inf')))), reverse=True)
-        
-        return combined_sorted[:k]
-    
-    def keyword_search(self, query: str, k: int = 5) -> List[Dict]:
-        """Keyword-based search with variation matching"""
-        from services.rag.preprocessing import TurkishPreprocessor
-        preprocessor = TurkishPreprocessor()
-        
-        query_lower = query.lower()
-        query_words = set(query_lower.split())
-        processed_query = preprocessor.preprocess_query(query)
-        processed_variations = preprocessor._generate_variations(processed_query)
-        query_variations = preprocessor._generate_variations(query)
-        all_variations = query_variations | processed_variations
-        
-        matches = []
-        
-        for chunk in self.vector_store.chunks:
-            text = chunk.get("text", "").lower()
-            title = chunk.get("title", "").lower() if chunk.get("title") else ""
-            campaign_id = chunk.get("campaign_id", "").lower()
-            text_words = set(text.split())
-            full_text = f"{text} {title} {campaign_id}"
-            
-            exact_overlap = len(query_words & text_words)
-            
-            variation_match = False
-            variation_in_title = False
-            variation_in_id = False
-            for variation in all_variations:
-                if len(variation) > 2:
-                    if variation in full_text:
-                        variation_match = True
-                    if variation in title:
-                        variation_in_title = True
-                    if variation in campaign_id:
-                        variation_in_id = True
-                        break
-            
-            if exact_overlap > 0 or variation_match:
-                score = (exact_overlap / max(len(query_words), 1)) * 0.3
-                if variation_match:
-                    score += 0.4
-                if variation_in_title:
-                    score += 0.5
-                if variation_in_id:
-                    score += 0.7
-                
-                match = chunk.copy()
-                match["keyword_score"] = score
-                matches.append(match)
-        
-        matches.sort(key=lambda x: x.get("keyword_score", 0), reverse=True)
-        return matches[:k]
-    
-    def _merge_results(self, vector_results: List[Dict], keyword_results: List[Dict]) -> List[Dict]:
-        """Merge and deduplicate results"""
-        seen = set()
-        merged = []
+    def keyword_search(self, query: str, k: int = 5, filters: Optional[Dict] = None, analysis: Optional[QueryAnalysis] = None) -> List[Dict]:
+        """Keyword-based search with variation matching (filters, analysis: see retrieve())
         
-        for result in vector_results + keyword_results:
-            chunk_id = f"{result.get('campaign_id', '')}_{result.get('chunk_index', 0)}"
-            if chunk_id not in seen:
-                seen.add(chunk_id)
-                merged.append(result)
+        Candidate chunks come from the store's inverted keyword index (query
+        words in text, variations via the vocabulary), so only chunks sharing
+        a term with the query are scored.
+        """
+        analysis = analysis or analyze_query(query)
+        rows, scores = self._keyword_ranking(analysis, k, filters)
         
-        return merged
-
+        results = []
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            result = self.vector_store.chunk_result(row)
+            result["keyword_score"] = score
+            results.append(result)
+        return results
+    
+    def _keyword_ranking(self, analysis: QueryAnalysis, k: int, filters: Optional[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, keyword scores) of the k best keyword matches, best first
+        
+        Candidates are scored as arrays from the index's precomputed fields;
+        only the selected k are sorted.
+        """
+        matcher = analysis.matcher
+        query_words = analysis.query_words
+        
+        keyword_index = self.vector_store.keyword_index
+        candidates = [keyword_index.rows("text", word) for word in query_words]
+        candidates += [keyword_index.substring_rows(pattern) for pattern in matcher.patterns]
+        rows = np.unique(np.concatenate(candidates)) if candidates else np.zeros(0, dtype=np.int32)
+        
+        mask = self.vector_store.filter_mask(filters) if filters else None
+        if mask is not None:
+            rows = rows[mask[rows]]
+        
+        if len(rows) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        
+        all_fields = [keyword_index.fields(row) for row in rows.tolist()]
+        features = self._match_features(analysis, all_fields, np.zeros(len(rows), dtype=bool))
+        matched = (features.word_overlap > 0) | features.variation_match
+        
+        scores = (features.word_overlap / max(len(query_words), 1)) * 0.3
+        scores = scores + np.where(features.variation_match, 0.4, 0.0)
+        scores = scores + np.where(features.variation_in_title, 0.5, 0.0)
+        scores = scores + np.where(features.variation_in_id, 0.7, 0.0)
+        
+        rows, scores = rows[matched].astype(np.int64), scores[matched]
+        order = top_k_order(scores, k)
+        return rows[order], scores[order]
+    
+    def bm25_search(self, query: str, k: int = 5, filters: Optional[Dict] = None, analysis: Optional[QueryAnalysis] = None) -> List[Dict]:
+        """BM25F search over text, title and campaign_id (filters, analysis: see retrieve())
+        
+        Query terms are the words of the query and of its preprocessed form,
+        so expansions like "oto" -> "auto" also match.
+        """
+        analysis = analysis or analyze_query(query)
+        mask = self.vector_store.filter_mask(filters) if filters else None
+        rows, scores = self.vector_store.bm25_index.search(analysis.terms, k=k, mask=mask)
+        
+        results = []
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            result = self.vector_store.chunk_result(int(row))
+            result["bm25_score"] = float(score)
+            results.append(result)
+        return results
+    
+    def fuzzy_search(self, query: str, k: int = 5, filters: Optional[Dict] = None, analysis: Optional[QueryAnalysis] = None) -> List[Dict]:
+        """Fuzzy title / campaign_id search for misspelled or mis-transcribed names (filters, analysis: see retrieve())
+        
+        Query words are matched against the store's trigram index (see
+        FuzzyIndex), so "otokin" or "oto king" still find "Otoking".
+        """
+        analysis = analysis or analyze_query(query)
+        rows, scores = self._fuzzy_ranking(analysis, k, filters)
+        
+        results = []
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            result = self.vector_store.chunk_result(row)
+            result["fuzzy_score"] = score
+            results.append(result)
+        return results
+    
+    def _fuzzy_ranking(self, analysis: QueryAnalysis, k: int, filters: Optional[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, fuzzy scores) of the k best fuzzy matches, best first"""
+        mask = self.vector_store.filter_mask(filters) if filters else None
+        return self.vector_store.fuzzy_index.search(analysis.query, k=k, mask=mask, min_similarity=config.fuzzy_min_similarity)
@@ -0,0 +1,109 @@
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import time
+import faiss
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SemanticCache:
+    """Answer cache matched by query embedding instead of exact question text
+
+    Embeddings of answered queries are L2-normalized and kept in a small
+    exact faiss index, so a lookup is one k-NN search. A new query hits when
+    a cached query lies within max_distance (squared L2 between normalized
+    embeddings, i.e. 2 - 2 * cosine similarity) and was answered with the
+    same parameters against the same index version. The oldest entry is
+    evicted when full; entries expire after ttl seconds. A max_size of 0
+    disables the cache.
+    """
+
+    # Neighbours checked per lookup, so entries with other parameters do not hide a match
+    SEARCH_K = 8
+
+    def __init__(self, dimension: int, max_size: int, max_distance: float, ttl: float):
+        self.dimension = dimension
+        self.max_size = max_size
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(dimension))
+        # id -> (expires_at, params, index_version, value), oldest first
+        self._entries: "OrderedDict[int, Tuple[float, Hashable, int, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _normalize(self, query_vector: np.ndarray) -> np.ndarray:
+        vector = np.array(query_vector, dtype='float32').reshape(1, self.dimension)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def get(self, query_vector: np.ndarray, params: Hashable, index_version: int) -> Optional[Any]:
+        """Value cached for the nearest matching query, or None on a miss"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self.index.ntotal > 0:
+                distances, ids = self.index.search(self._normalize(query_vector), min(self.SEARCH_K, self.index.ntotal))
+                now = time.monotonic()
+                for distance, entry_id in zip(distances[0], ids[0]):
+                    if distance > self.max_distance:
+                        break
+                    entry = self._entries.get(int(entry_id))
+                    if entry is not None and entry[0] > now and entry[1] == params and entry[2] == index_version:
+                        self.hits += 1
+                        logger.debug(f"Semantic cache hit at distance {distance:.4f}")
+                        return entry[3]
+            self.misses += 1
+            return None
+
+    def put(self, query_vector: np.ndarray, params: Hashable, index_version: int, value: Any):
+        if not self.enabled:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self.index.add_with_ids(self._normalize(query_vector), np.array([entry_id], dtype=np.int64))
+            self._entries[entry_id] = (time.monotonic() + self.ttl, params, index_version, value)
+
+            # All entries share one TTL, so expired entries are always the oldest
+            now = time.monotonic()
+            evicted = []
+            while self._entries:
+                oldest_id, oldest = next(iter(self._entries.items()))
+                if oldest[0] > now and len(self._entries) <= self.max_size:
+                    break
+                evicted.append(oldest_id)
+                del self._entries[oldest_id]
+            if evicted:
+                self.index.remove_ids(faiss.IDSelectorArray(np.array(evicted, dtype=np.int64)))
+
+    def clear(self):
+        with self._lock:
+            self.index.reset()
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -5,37 +5,77 @@ project_root = Path(__file__).parent.parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
+import json
+import time
+import hashlib
 import logging
+import threading
+import numpy as np
 from typing import List, Dict, Optional
 from services.rag.vector_store import VectorStore
 from services.rag.embeddings import EmbeddingService
 from services.rag.retriever import Retriever
 from services.rag.generator import ResponseGenerator
 from services.rag.chunker import Chunker
+from services.rag.preprocessing import analyze_query
+from services.rag.query_cache import QueryCache, normalize_question, freeze_filters
+from services.rag.semantic_cache import SemanticCache
+from services.rag.cross_encoder import load_cross_encoder
+from services.rag.metrics import LatencyMetrics, stage_timer
+from configs.rag_config import config
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class RAGService:
     def __init__(self):
+        dimension = 768
         self.embedding_service = EmbeddingService()
-        self.vector_store = VectorStore(dimension=768)
-        self.retriever = Retriever(self.vector_store, self.embedding_service)
+        self.vector_store = VectorStore(dimension=dimension)
+        self.cross_encoder = load_cross_encoder()
+        self.retriever = Retriever(self.vector_store, self.embedding_service, self.cross_encoder)
         self.generator = ResponseGenerator()
         self.chunker = Chunker()
+        self.index_version = 0
+        self._build_lock = threading.Lock()
+        self.retrieval_cache = QueryCache(config.query_cache_size, config.query_cache_ttl)
+        self.answer_cache = QueryCache(config.query_cache_size, config.answer_cache_ttl)
+        self.semantic_cache = SemanticCache(dimension, config.semantic_cache_size, config.semantic_cache_distance, config.answer_cache_ttl)
+        self.latency = LatencyMetrics()
     
-    def index_campaigns(self, campaigns: List, chunking_strategy: str = "default"):
+    def _publish(self, vector_store: VectorStore):
+        """Atomically swap in a freshly built vector store
+        
+        Queries read self.retriever once, so in-flight queries finish on the old
+        index while new ones see the new index; neither sees a partial build.
+        """
+        self.retriever = Retriever(vector_store, self.embedding_service, self.cross_encoder)
+        self.vector_store = vector_store
+        self.index_version += 1
+        self.retrieval_cache.clear()
+        self.answer_cache.clear()
+        self.semantic_cache.clear()
+        logger.info(f"Published index '{vector_store.current_index_name}' as version {self.index_version}")
+    
+    def index_campaigns(self, campaigns: List, chunking_strategy: str = "default", index_type: Optional[str] = None, incremental: bool = False, storage: Optional[str] = None) -> Dict:
         """Index campaigns into vector store with new timestamped index
         
+        The index is built into a separate VectorStore and published only after
+        it is saved, so queries keep being served from the current index during
+        the rebuild. Concurrent builds are serialized.
+        
         Args:
             campaigns: List of campaigns to index
             chunking_strategy: "default", "sliding_window", or "semantic"
+            index_type: "flat", "ivf", "hnsw", or "ivfpq" (default: from config)
+            storage: "float32", "fp16", or "sq8" vector storage (default: from config)
+            incremental: Re-embed only campaigns whose chunks changed since the
+                current index, and drop campaigns that are gone. Falls back to a
+                full rebuild when the current index cannot be updated in place.
         """
         logger.info(f"Indexing {len(campaigns)} campaigns with chunking strategy: {chunking_strategy}")
         
-        self.vector_store.create_new_index()
-        
-        all_chunks = []
+        campaign_chunks = {}
         for campaign in campaigns:
             if chunking_strategy == "sliding_window":
                 chunks = self._chunk_with_sliding_window(campaign)
@@ -43,20 +83,67 @@ class RAGService:
                 chunks = self._chunk_with_semantic(campaign)
             else:
                 chunks = self.chunker.chunk_campaign(campaign)
-            all_chunks.extend(chunks)
+            campaign_chunks.setdefault(campaign.campaign_id, []).extend(chunks)
+        
+        fingerprints = {campaign_id: self._fingerprint(chunks) for campaign_id, chunks in campaign_chunks.items()}
+        
+        with self._build_lock:
+            current = self.vector_store
+            if incremental and current.supports_updates(index_type, storage):
+                return self._index_changed_campaigns(current, campaign_chunks, fingerprints)
+            
+            all_chunks = [chunk for chunks in campaign_chunks.values() for chunk in chunks]
+            
+            if not all_chunks:
+                logger.warning("No chunks to index")
+                return {"mode": "full", "chunks_indexed": 0, "index_version": self.index_version}
+            
+            store = VectorStore(dimension=current.dimension, index_base_path=str(current.index_base_path), load_existing=False)
+            store.create_new_index(index_type=index_type, storage=storage)
+            
+            texts = [chunk["text"] for chunk in all_chunks]
+            embeddings = self.embedding_service.embed_batch(texts)
+            
+            store.add_vectors(np.array(embeddings), all_chunks)
+            store.campaign_hashes = fingerprints
+            store.save_index()
+            self._publish(store)
+        
+        logger.info(f"Indexed {len(all_chunks)} chunks into '{store.current_index_name}'")
+        return {"mode": "full", "chunks_indexed": len(all_chunks), "index_version": self.index_version}
+    
+    def _index_changed_campaigns(self, current: VectorStore, campaign_chunks: Dict[str, List[Dict]], fingerprints: Dict[str, str]) -> Dict:
+        """Apply only the campaign-level diff against the current index, into a copy of it"""
+        previous = current.campaign_hashes
+        changed = [campaign_id for campaign_id, fingerprint in fingerprints.items() if previous.get(campaign_id) != fingerprint]
+        removed = [campaign_id for campaign_id in previous if campaign_id not in fingerprints]
+        summary = {"mode": "incremental", "campaigns_changed": len(changed), "campaigns_removed": len(removed), "chunks_indexed": 0}
         
-        if not all_chunks:
-            logger.warning("No chunks to index")
-            return
+        if not changed and not removed:
+            logger.info(f"Index '{current.current_index_name}' is up to date")
+            summary["index_version"] = self.index_version
+            return summary
         
-        texts = [chunk["text"] for chunk in all_chunks]
-        embeddings = self.embedding_service.embed_batch(texts)
+        store = VectorStore(dimension=current.dimension, index_base_path=str(current.index_base_path), index_name=current.current_index_name)
+        store.remove_campaigns(changed + removed)
         
-        import numpy as np
-        self.vector_store.add_vectors(np.array(embeddings), all_chunks)
-        self.vector_store.save_index()
+        changed_chunks = [chunk for campaign_id in changed for chunk in campaign_chunks[campaign_id]]
+        if changed_chunks:
+            embeddings = self.embedding_service.embed_batch([chunk["text"] for chunk in changed_chunks])
+            store.add_vectors(np.array(embeddings), changed_chunks)
         
-        logger.info(f"Indexed {len(all_chunks)} chunks into '{self.vector_store.current_index_name}'")
+        store.campaign_hashes = fingerprints
+        store.save_index(store.new_index_name())
+        self._publish(store)
+        
+        summary["chunks_indexed"] = len(changed_chunks)
+        summary["index_version"] = self.index_version
+        logger.info(f"Updated {len(changed)} and removed {len(removed)} campaigns into '{store.current_index_name}'")
+        return summary
+    
+    def _fingerprint(self, chunks: List[Dict]) -> str:
+        """Content hash of a campaign's chunks, used to detect changed campaigns"""
+        return hashlib.sha1(json.dumps(chunks, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
     
     def _chunk_with_sliding_window(self, campaign):
         """Chunk campaign using sliding window strategy"""
@@ -110,34 +197,120 @@ class RAGService:
         
         return chunks if chunks else self.chunker.chunk_campaign(campaign)
     
-    def query(self, question: str, k: int = 5, search_strategy: str = "hybrid", similarity_threshold: Optional[float] = None) -> Dict:
+    def query(self, question: str, k: int = 5, search_strategy: str = "hybrid", similarity_threshold: Optional[float] = None, filters: Optional[Dict] = None,
+              fusion: Optional[str] = None, diversify: Optional[bool] = None, debug: bool = False) -> Dict:
         """Query RAG system
         
         Args:
             question: Query question
             k: Number of results to return
-            search_strategy: "vector", "keyword", or "hybrid"
+            search_strategy: "vector", "keyword", "bm25", "fuzzy", or "hybrid"
             similarity_threshold: Maximum L2 distance for vector search (only used with "vector" strategy)
+            filters: Restrict retrieval by "campaign_ids", "types", "indexed_after"/"indexed_before"
+            fusion: "heuristic", "rrf", or "weighted" merge of the hybrid stages (default: HYBRID_FUSION)
+            diversify: Group by campaign and apply MMR before generation (default: DIVERSIFY)
+            debug: Include this query's per-stage timings (milliseconds) as "timings"
+        
+        Retrieval results and answers are cached separately (QUERY_CACHE_TTL,
+        ANSWER_CACHE_TTL), keyed by the normalized question, the parameters
+        and the index version; publishing a new index clears the caches.
+        When the exact caches miss, the semantic cache (SEMANTIC_CACHE_SIZE)
+        can still answer a differently worded question of the same meaning.
+        Results degraded by a timed-out stage are not cached.
+        
+        With a cross-encoder (RERANK_MODEL), max(k, RERANK_TOP_N) candidates
+        are retrieved and the cross-encoder picks the k passed to generation.
+        With diversification, k * DIVERSIFY_FETCH_FACTOR candidates are
+        retrieved and at most k non-redundant ones are kept.
+        
+        Every query's stage timings are added to the latency histograms
+        (self.latency); stages that did not run, e.g. on a cache hit, are
+        left out. Concurrent hybrid stages overlap, so stages may add up to
+        more than "total".
         """
-        if search_strategy == "vector":
-            retrieved = self.retriever.retrieve(question, k=k, similarity_threshold=similarity_threshold)
-        elif search_strategy == "keyword":
-            retrieved = self.retriever.keyword_search(question, k=k)
+        timings = {}
+        start = time.perf_counter()
+        result = self._query(question, k, search_strategy, similarity_threshold, filters, fusion, diversify, timings)
+        timings["total"] = (time.perf_counter() - start) * 1000
+        self.latency.record(timings)
+        if debug:
+            result = {**result, "timings": {stage: round(value_ms, 3) for stage, value_ms in dict(timings).items()}}
+        return result
+    
+    def _query(self, question: str, k: int, search_strategy: str, similarity_threshold: Optional[float], filters: Optional[Dict],
+               fusion: Optional[str], diversify: Optional[bool], timings: Dict[str, float]) -> Dict:
+        """query() without the timing bookkeeping; stage times go to timings"""
+        # Version before retriever: _publish swaps the retriever first, so a
+        # racing query can only file new results under the old (dead) version
+        index_version = self.index_version
+        retriever = self.retriever
+        diversify = config.diversify if diversify is None else diversify
+        params = (k, search_strategy, similarity_threshold, fusion, diversify, freeze_filters(filters))
+        with stage_timer(timings, "preprocess"):
+            cache_key = (normalize_question(question), params, index_version)
+            analysis = analyze_query(question)
+        
+        query_vector = None
+        cached = self.retrieval_cache.get(cache_key)
+        if cached is None and self.semantic_cache.enabled:
+            with stage_timer(timings, "embed"):
+                query_vector = retriever.embed_query(question)
+            similar = self.semantic_cache.get(query_vector, params, index_version)
+            if similar is not None:
+                return dict(similar)
+        
+        if cached is not None:
+            retrieved, candidate_sizes = cached
         else:
-            retrieved = self.retriever.hybrid_search(question, k=k)
+            candidate_sizes = {}
+            fetch_k = max(k, config.rerank_top_n) if retriever.cross_encoder is not None else k
+            if diversify:
+                fetch_k = max(fetch_k, k * config.diversify_fetch_factor)
+            if search_strategy == "vector":
+                retrieved = retriever.retrieve(question, k=fetch_k, similarity_threshold=similarity_threshold, filters=filters, analysis=analysis, stats=candidate_sizes,
+                                               timings=timings)
+            elif search_strategy == "keyword":
+                with stage_timer(timings, "keyword_search"):
+                    retrieved = retriever.keyword_search(question, k=fetch_k, filters=filters, analysis=analysis)
+            elif search_strategy == "bm25":
+                with stage_timer(timings, "keyword_search"):
+                    retrieved = retriever.bm25_search(question, k=fetch_k, filters=filters, analysis=analysis)
+            elif search_strategy == "fuzzy":
+                with stage_timer(timings, "fuzzy_search"):
+                    retrieved = retriever.fuzzy_search(question, k=fetch_k, filters=filters, analysis=analysis)
+            else:
+                retrieved = retriever.hybrid_search(question, k=fetch_k, filters=filters, analysis=analysis, stats=candidate_sizes, fusion=fusion, timings=timings)
+            if retriever.cross_encoder is not None:
+                with stage_timer(timings, "cross_encoder"):
+                    retrieved = retriever.cross_encoder_rerank(question, retrieved, fetch_k if diversify else k, stats=candidate_sizes)
+            if diversify:
+                with stage_timer(timings, "diversify"):
+                    retrieved = retriever.diversify(retrieved, k, stats=candidate_sizes)
+        # A stage that missed its deadline (see run_stages()) degrades only this query, so its result is not cached
+        degraded = "timed_out" in candidate_sizes
+        if cached is None and not degraded:
+            self.retrieval_cache.put(cache_key, (retrieved, candidate_sizes))
         
-        response = self.generator.generate(question, retrieved)
+        response = self.answer_cache.get(cache_key)
+        if response is None:
+            response = self.generator.generate(question, retrieved, analysis=analysis, timings=timings)
+            if not degraded:
+                self.answer_cache.put(cache_key, response)
         
-        return {
+        result = {
             "answer": response,
             "sources": [
                 {
                     "campaign_id": chunk.get("campaign_id", ""),
                     "title": chunk.get("title", ""),
-                    "score": chunk.get("rerank_score", chunk.get("keyword_score", chunk.get("score", 0)))
+                    "score": chunk.get("cross_score", chunk.get("fusion_score", chunk.get("rerank_score", chunk.get("keyword_score", chunk.get("bm25_score", chunk.get("fuzzy_score", chunk.get("score", 0)))))))
                 }
                 for chunk in retrieved
             ],
-            "num_sources": len(retrieved)
+            "num_sources": len(retrieved),
+            "candidate_sizes": candidate_sizes
         }
+        if query_vector is not None and not degraded:
+            self.semantic_cache.put(query_vector, params, index_version, result)
+        return result
 
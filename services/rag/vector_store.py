@@ -7,102 +7,661 @@ if str(project_root) not in sys.path:
 
 import faiss
 import numpy as np
+import os
 import json
 import pickle
+import time
+import shutil
+import hashlib
 import logging
+import threading
 from pathlib import Path as PathLib
-from typing import List, Dict, Tuple, Optional
+from typing import Any, List, Dict, Tuple, Optional
 from datetime import datetime
 from configs.rag_config import config
+from services.rag.chunk_store import ChunkStore
+from services.rag.keyword_index import KeywordIndex, ChunkFields
+from services.rag.bm25 import BM25Index
+from services.rag.fuzzy_index import FuzzyIndex
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+INDEX_TYPES = ["flat", "ivf", "hnsw", "ivfpq"]
+
+# Per-vector storage: faiss factory code for the flat/IVF/HNSW storage of each mode
+STORAGE_TYPES = {"float32": "Flat", "fp16": "SQfp16", "sq8": "SQ8"}
+
+VECTORS_FILE = "vectors.npy"
+
+# Lives in index_base_path: current index pointer plus stats/checksums of retained builds
+MANIFEST_FILE = "manifest.json"
+
+# search() filter keys -> chunk field they match against
+FILTER_KEYS = {"campaign_ids": "campaign_id", "types": "type"}
+DATE_FILTER_KEYS = ("indexed_after", "indexed_before")
+
+# faiss warns below ~39 training points per centroid, use it to size IVF/PQ codebooks
+MIN_POINTS_PER_CENTROID = 39
+
+# Index names handed out by new_index_name() in this process, so two builds never share a directory
+_issued_index_names = set()
+_issued_index_names_lock = threading.Lock()
+
+def build_index(index_type: str, dimension: int, num_vectors: int, storage: str = "float32") -> Tuple[faiss.Index, str]:
+    """Build an empty faiss index sized for the corpus it will be trained on
+    
+    Args:
+        index_type: "flat", "ivf", "hnsw", or "ivfpq"
+        dimension: Vector dimension
+        num_vectors: Number of training vectors (the corpus being indexed)
+        storage: "float32", "fp16", or "sq8" scalar quantization of stored
+            vectors (ignored by "ivfpq", which is already compressed)
+    
+    Returns:
+        (index, resolved_type) - corpora too small to train the requested
+        codebooks fall back to a simpler type
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Invalid index type '{index_type}'. Must be one of: {INDEX_TYPES}")
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Invalid storage '{storage}'. Must be one of: {list(STORAGE_TYPES)}")
+    code = STORAGE_TYPES[storage]
+    
+    nlist = min(config.ivf_nlist, num_vectors // MIN_POINTS_PER_CENTROID)
+    
+    if index_type == "ivfpq":
+        if dimension % config.pq_m != 0:
+            raise ValueError(f"PQ sub-quantizers ({config.pq_m}) must divide dimension ({dimension})")
+        nbits = min(config.pq_nbits, int(np.log2(max(num_vectors // MIN_POINTS_PER_CENTROID, 1))))
+        if nbits >= 4 and nlist >= 1:
+            return faiss.index_factory(dimension, f"IVF{nlist},PQ{config.pq_m}x{nbits}"), index_type
+        logger.warning(f"Too few vectors ({num_vectors}) to train PQ codebooks, falling back to 'ivf'")
+        index_type = "ivf"
+    
+    if index_type == "ivf":
+        if nlist >= 1:
+            return faiss.index_factory(dimension, f"IVF{nlist},{code}"), index_type
+        logger.warning(f"Too few vectors ({num_vectors}) to train IVF centroids, falling back to 'flat'")
+        index_type = "flat"
+    
+    if index_type == "hnsw":
+        index = faiss.index_factory(dimension, f"HNSW{config.hnsw_m}" if storage == "float32" else f"HNSW{config.hnsw_m},{code}")
+        index.hnsw.efConstruction = config.hnsw_ef_construction
+        return index, index_type
+    
+    if storage == "float32":
+        return faiss.IndexFlatL2(dimension), "flat"
+    return faiss.index_factory(dimension, code), "flat"
+
+def read_index(index_file: Path, index_type: str, use_mmap: bool = False) -> faiss.Index:
+    """Read a faiss index, memory-mapped read-only if use_mmap
+    
+    IO_FLAG_MMAP maps only the inverted lists of IVF indexes; flat and HNSW
+    indexes still copy their stored vectors into memory with it, so those
+    are read with IO_FLAG_MMAP_IFC, which maps the whole file instead.
+    """
+    if not use_mmap:
+        return faiss.read_index(str(index_file))
+    mmap_flag = faiss.IO_FLAG_MMAP if index_type in ("ivf", "ivfpq") else faiss.IO_FLAG_MMAP_IFC
+    return faiss.read_index(str(index_file), mmap_flag | faiss.IO_FLAG_READ_ONLY)
+
+def _file_checksum(path: Path) -> str:
+    """sha256 of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def apply_search_params(index: faiss.Index, index_type: str):
+    """Apply per-type search knobs (nprobe, efSearch) from config"""
+    params = faiss.ParameterSpace()
+    if index_type in ("ivf", "ivfpq"):
+        params.set_index_parameter(index, "nprobe", config.ivf_nprobe)
+    elif index_type == "hnsw":
+        params.set_index_parameter(index, "efSearch", config.hnsw_ef_search)
+
 class VectorStore:
-    def __init__(self, dimension: int = 768, index_base_path: str = "data/vector_index", index_name: Optional[str] = None):
+    def __init__(self, dimension: int = 768, index_base_path: str = "data/vector_index", index_name: Optional[str] = None, index_type: Optional[str] = None, use_mmap: Optional[bool] = None, load_existing: bool = True, storage: Optional[str] = None):
         self.dimension = dimension
+        self.use_mmap = config.vector_index_mmap if use_mmap is None else use_mmap
         self.index_base_path = PathLib(index_base_path)
         self.index_base_path.mkdir(parents=True, exist_ok=True)
         
-        self.index = faiss.IndexFlatL2(dimension)
-        self.metadata = []
-        self.chunks = []
+        self.index_type = (index_type or config.vector_index_type).lower()
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Invalid index type '{self.index_type}'. Must be one of: {INDEX_TYPES}")
+        self.storage = (storage or config.vector_storage).lower()
+        if self.storage not in STORAGE_TYPES:
+            raise ValueError(f"Invalid storage '{self.storage}'. Must be one of: {list(STORAGE_TYPES)}")
+        self.rescore_factor = config.vector_rescore_factor
+        
+        self._reset()
         self.current_index_name = index_name
         
         if index_name:
             self.load_index(index_name)
-        else:
+        elif load_existing:
             self.load_latest_index()
     
+    def _reset(self):
+        """Reset to an empty in-memory index"""
+        self.index = faiss.IndexFlatL2(self.dimension)
+        self.mmap_loaded = False
+        self.loaded_index_name: Optional[str] = None
+        self.chunks = []
+        self.chunk_ids = np.zeros(0, dtype=np.int64)
+        self.indexed_at = np.zeros(0, dtype=np.int64)
+        self.vectors = np.zeros((0, self.dimension), dtype=np.float32)
+        self.campaign_hashes: Dict[str, str] = {}
+        self._field_masks: Dict[Tuple[str, str], np.ndarray] = {}
+        self._keyword_index: Optional[KeywordIndex] = None
+        self._bm25_index: Optional[BM25Index] = None
+        self._fuzzy_index: Optional[FuzzyIndex] = None
+    
+    @property
+    def keyword_index(self) -> KeywordIndex:
+        """Inverted keyword index over the chunks, built on first use if not loaded"""
+        if self._keyword_index is None:
+            self._keyword_index = KeywordIndex.build(self.chunks)
+        return self._keyword_index
+    
+    def chunk_fields(self, chunk_ids) -> List[Optional[ChunkFields]]:
+        """Precomputed normalized fields of chunks by faiss id (None for unknown ids)"""
+        rows = self._rows_for_ids(np.asarray(chunk_ids, dtype=np.int64))
+        keyword_index = self.keyword_index
+        return [keyword_index.fields(int(row)) if row >= 0 else None for row in rows]
+    
+    @property
+    def bm25_index(self) -> BM25Index:
+        """BM25F index over the chunks, built on first use if not loaded"""
+        if self._bm25_index is None:
+            self._bm25_index = BM25Index.build(self.chunks)
+        return self._bm25_index
+    
+    @property
+    def fuzzy_index(self) -> FuzzyIndex:
+        """Trigram index over title and campaign_id terms, built on first use if not loaded"""
+        if self._fuzzy_index is None:
+            self._fuzzy_index = FuzzyIndex.build(self.chunks)
+        return self._fuzzy_index
+    
+    @property
+    def is_lossy(self) -> bool:
+        """Whether the index stores compressed vectors (distances are approximate)"""
+        return self.storage != "float32" or self.index_type == "ivfpq"
+    
+    def _make_mutable(self):
+        """Copy mmap-loaded, read-only state into memory before modifying it"""
+        if not isinstance(self.chunks, list):
+            self.chunks = list(self.chunks)
+        self.chunk_ids = np.array(self.chunk_ids, dtype=np.int64)
+        self.indexed_at = np.array(self.indexed_at, dtype=np.int64)
+        self._field_masks = {}
+        self._keyword_index = None
+        self._bm25_index = None
+        self._fuzzy_index = None
+        if self.vectors is not None:
+            self.vectors = np.array(self.vectors, dtype=np.float32)
+        if self.mmap_loaded:
+            # mmap'd indexes are read-only and cannot be cloned, so re-read the file into memory
+            self.index = faiss.read_index(str(self.index_file))
+            apply_search_params(self.index, self.index_type)
+            self.mmap_loaded = False
+    
+    def _rows_for_ids(self, ids: np.ndarray) -> np.ndarray:
+        """Map faiss ids to chunk rows (-1 if unknown); chunk_ids is kept sorted"""
+        rows = np.searchsorted(self.chunk_ids, ids)
+        valid = (ids >= 0) & (rows < len(self.chunk_ids))
+        valid[valid] = self.chunk_ids[rows[valid]] == ids[valid]
+        return np.where(valid, rows, -1)
+    
     def add_vectors(self, vectors: np.ndarray, chunks: List[Dict]):
-        """Add vectors and metadata to index"""
+        """Add vectors and chunks to index
+        
+        The first batch added to an empty index decides its size and trains
+        IVF/PQ codebooks, so index the whole corpus in one call. Chunks get
+        increasing faiss ids so they can later be removed per campaign: IVF
+        lists store ids natively, other types are wrapped in an IndexIDMap2.
+        Compressed indexes also keep the float32 vectors for exact re-scoring.
+        """
         if len(vectors) != len(chunks):
             raise ValueError("Vectors and chunks must have same length")
         
         vectors = np.array(vectors).astype('float32')
-        self.index.add(vectors)
+        self._make_mutable()
+        
+        if self.index.ntotal == 0:
+            index, self.index_type = build_index(self.index_type, self.dimension, len(vectors), storage=self.storage)
+            if not index.is_trained:
+                logger.info(f"Training '{self.index_type}' ({self.storage}) index on {len(vectors)} vectors")
+                index.train(vectors)
+            self.index = self._with_ids(index)
+            apply_search_params(self.index, self.index_type)
+            self.vectors = np.zeros((0, self.dimension), dtype=np.float32) if self.is_lossy else None
+        
+        next_id = int(self.chunk_ids[-1]) + 1 if len(self.chunk_ids) else 0
+        ids = np.arange(next_id, next_id + len(vectors), dtype=np.int64)
+        if self._is_id_mapped(self.index):
+            self.index.add_with_ids(vectors, ids)
+        else:
+            self.index.add(vectors)
         
-        for chunk in chunks:
-            self.chunks.append(chunk)
-            self.metadata.append({
-                "chunk_index": len(self.metadata),
-                "campaign_id": chunk.get("campaign_id", ""),
-                "text": chunk.get("text", "")[:200]
-            })
+        self.chunks.extend(chunks)
+        self.chunk_ids = np.concatenate([self.chunk_ids, ids])
+        self.indexed_at = np.concatenate([self.indexed_at, np.full(len(ids), int(time.time()), dtype=np.int64)])
+        if self.vectors is not None:
+            self.vectors = np.concatenate([self.vectors, vectors])
         
         logger.info(f"Added {len(chunks)} vectors to index. Total: {self.index.ntotal}")
     
-    def search(self, query_vector: np.ndarray, k: int = 5) -> List[Dict]:
-        """Search for similar vectors"""
-        if self.index.ntotal == 0:
-            return []
+    def _with_ids(self, index: faiss.Index) -> faiss.Index:
+        """Make an empty index accept explicit ids"""
+        if faiss.try_extract_index_ivf(index) is None:
+            return faiss.IndexIDMap2(index)
+        # IndexIDMap2 cannot remove twice from IVF; a hashtable direct map adds remove/reconstruct by id
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return index
+    
+    def _is_id_mapped(self, index: faiss.Index) -> bool:
+        return isinstance(index, faiss.IndexIDMap2) or faiss.try_extract_index_ivf(index) is not None
+    
+    def supports_updates(self, index_type: Optional[str] = None, storage: Optional[str] = None) -> bool:
+        """Whether campaigns can be upserted/removed in place (index_type/storage: requested, if any)"""
+        if not self._is_id_mapped(self.index) or self.index.ntotal == 0:
+            return False
+        if storage and storage.lower() != self.storage:
+            return False
+        return not index_type or index_type.lower() == self.index_type
+    
+    def remove_campaigns(self, campaign_ids) -> int:
+        """Remove all chunks of the given campaigns, returns number of chunks removed"""
+        campaign_ids = set(campaign_ids)
+        if not campaign_ids or self.index.ntotal == 0:
+            return 0
+        if not self._is_id_mapped(self.index):
+            raise ValueError("Index was built without id mapping, re-index to enable incremental updates")
         
-        query_vector = np.array([query_vector]).astype('float32')
-        distances, indices = self.index.search(query_vector, min(k, self.index.ntotal))
+        if isinstance(self.chunks, ChunkStore):
+            rows = self.chunks.campaign_rows(campaign_ids)
+        else:
+            rows = np.array([i for i, chunk in enumerate(self.chunks) if chunk.get("campaign_id") in campaign_ids], dtype=np.int64)
+        if len(rows) == 0:
+            return 0
+        
+        self._make_mutable()
+        keep = np.ones(len(self.chunk_ids), dtype=bool)
+        keep[rows] = False
         
-        results = []
-        for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
-            if idx < len(self.chunks):
-                result = self.chunks[idx].copy()
+        try:
+            self.index.remove_ids(faiss.IDSelectorArray(self.chunk_ids[rows]))
+        except RuntimeError:
+            # HNSW graphs do not support removal, rebuild from the remaining vectors
+            kept_ids = self.chunk_ids[keep]
+            if not len(kept_ids):
+                vectors = None
+            elif self.vectors is not None:
+                vectors = self.vectors[keep]
+            else:
+                vectors = self.index.reconstruct_batch(kept_ids)
+            self.index = faiss.IndexFlatL2(self.dimension)
+            if vectors is not None:
+                index, self.index_type = build_index(self.index_type, self.dimension, len(kept_ids), storage=self.storage)
+                if not index.is_trained:
+                    index.train(vectors)
+                self.index = self._with_ids(index)
+                self.index.add_with_ids(vectors, kept_ids)
+                apply_search_params(self.index, self.index_type)
+        
+        self.chunks = [chunk for chunk, kept in zip(self.chunks, keep) if kept]
+        self.chunk_ids = self.chunk_ids[keep]
+        self.indexed_at = self.indexed_at[keep]
+        if self.vectors is not None:
+            self.vectors = self.vectors[keep]
+        
+        logger.info(f"Removed {len(rows)} chunks of {len(campaign_ids)} campaigns. Total: {self.index.ntotal}")
+        return len(rows)
+    
+    def remove_campaign(self, campaign_id: str) -> int:
+        """Remove all chunks of a campaign, returns number of chunks removed"""
+        return self.remove_campaigns([campaign_id])
+    
+    def upsert_campaign(self, campaign_id: str, vectors: np.ndarray, chunks: List[Dict]):
+        """Replace all chunks of a campaign (insert if it is new)"""
+        if any(chunk.get("campaign_id") != campaign_id for chunk in chunks):
+            raise ValueError(f"All chunks must belong to campaign '{campaign_id}'")
+        
+        self.remove_campaign(campaign_id)
+        if chunks:
+            self.add_vectors(vectors, chunks)
+    
+    def _field_mask(self, field: str, value: str) -> np.ndarray:
+        """Cached boolean row mask of chunks whose field equals value"""
+        key = (field, value)
+        mask = self._field_masks.get(key)
+        if mask is None:
+            if isinstance(self.chunks, ChunkStore):
+                mask = self.chunks.field_mask(field, value)
+            else:
+                mask = np.fromiter((chunk.get(field) == value for chunk in self.chunks), dtype=bool, count=len(self.chunks))
+            self._field_masks[key] = mask
+        return mask
+    
+    def type_mask(self, chunk_type: str) -> np.ndarray:
+        """Cached boolean row mask of chunks of the given type"""
+        return self._field_mask("type", chunk_type)
+    
+    def filter_mask(self, filters: Optional[Dict]) -> Optional[np.ndarray]:
+        """Boolean row mask of chunks matching filters (None if nothing is filtered)
+        
+        Args:
+            filters: Any of "campaign_ids" and "types" (lists, a chunk matches
+                any listed value) and "indexed_after"/"indexed_before" (epoch
+                seconds). Different keys are combined with AND.
+        """
+        if not filters:
+            return None
+        unknown = set(filters) - set(FILTER_KEYS) - set(DATE_FILTER_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown filter keys {sorted(unknown)}. Must be among: {list(FILTER_KEYS) + list(DATE_FILTER_KEYS)}")
+        
+        mask = None
+        for key, field in FILTER_KEYS.items():
+            if filters.get(key) is None:
+                continue
+            values = [filters[key]] if isinstance(filters[key], str) else filters[key]
+            field_mask = np.zeros(len(self.chunk_ids), dtype=bool)
+            for value in values:
+                field_mask |= self._field_mask(field, value)
+            mask = field_mask if mask is None else mask & field_mask
+        
+        if filters.get("indexed_after") is not None:
+            date_mask = self.indexed_at >= filters["indexed_after"]
+            mask = date_mask if mask is None else mask & date_mask
+        if filters.get("indexed_before") is not None:
+            date_mask = self.indexed_at < filters["indexed_before"]
+            mask = date_mask if mask is None else mask & date_mask
+        
+        return mask
+    
+    def _search_params(self, mask: np.ndarray) -> faiss.SearchParameters:
+        """Search parameters restricting faiss to the ids of the masked rows"""
+        id_mask = np.zeros(int(self.chunk_ids[-1]) + 1, dtype=bool)
+        id_mask[self.chunk_ids[mask]] = True
+        bitmap = np.packbits(id_mask, bitorder="little")
+        selector = faiss.IDSelectorBitmap(bitmap)
+        
+        if self.index_type in ("ivf", "ivfpq"):
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=config.ivf_nprobe)
+        elif self.index_type == "hnsw":
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=config.hnsw_ef_search)
+        else:
+            params = faiss.SearchParameters(sel=selector)
+        # The selector only points into the bitmap, keep it alive with the params
+        params.referenced_objects = [selector, bitmap]
+        return params
+    
+    def _search_rows(self, query_matrix: np.ndarray, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact k-NN over a small subset of rows, returns (distances, faiss ids)"""
+        if self.vectors is not None:
+            vectors = np.asarray(self.vectors[rows], dtype=np.float32)
+        else:
+            vectors = self.index.reconstruct_batch(self.chunk_ids[rows])
+        distances, positions = faiss.knn(query_matrix, vectors, min(k, len(rows)))
+        return distances, self.chunk_ids[rows][positions]
+    
+    def chunk_vectors(self, chunk_ids) -> Tuple[np.ndarray, np.ndarray]:
+        """(float32 vectors, found mask) of chunks by faiss id; unknown ids get zero vectors"""
+        ids = np.asarray(chunk_ids, dtype=np.int64)
+        rows = self._rows_for_ids(ids)
+        found = rows >= 0
+        vectors = np.zeros((len(ids), self.dimension), dtype=np.float32)
+        if found.any():
+            if self.vectors is not None and len(self.vectors) == len(self.chunk_ids):
+                vectors[found] = self.vectors[rows[found]]
+            else:
+                vectors[found] = self.index.reconstruct_batch(ids[found])
+        return vectors, found
+    
+    def search(self, query_vector: np.ndarray, k: int = 5, filters: Optional[Dict] = None) -> List[Dict]:
+        """Search for similar vectors (filters: see filter_mask())"""
+        return self.search_batch(np.array([query_vector]), k=k, filters=filters)[0]
+    
+    def search_batch(self, query_matrix: np.ndarray, k: int = 5, filters: Optional[Dict] = None) -> List[List[Dict]]:
+        """Search for several query vectors in one faiss call
+        
+        Args:
+            query_matrix: (n_queries, dimension) array
+            k: Number of results per query
+            filters: Restrict results to matching chunks, see filter_mask()
+        
+        Returns:
+            One result list per query row, same format as search()
+        
+        Filters are applied inside faiss through an id bitmap, so filtered
+        queries need no over-fetching. Subsets of at most
+        VECTOR_FILTER_EXACT_LIMIT chunks are scanned exactly instead, since
+        IVF probing and HNSW traversal can miss most of a very small subset.
+        
+        With a compressed index and VECTOR_RESCORE_FACTOR > 1, k * factor
+        candidates are fetched and re-ranked by exact L2 distance against the
+        float32 vectors, which stay memory-mapped on disk.
+        """
+        all_results = []
+        for rows, distances in self.search_rows_batch(query_matrix, k=k, filters=filters):
+            results = []
+            for i, (row, distance) in enumerate(zip(rows, distances)):
+                result = self.chunk_result(int(row))
                 result["score"] = float(distance)
                 result["rank"] = i + 1
                 results.append(result)
+            all_results.append(results)
+        
+        return all_results
+    
+    def chunk_result(self, row: int) -> Dict:
+        """Copy of the chunk at row, with its faiss id as chunk_id"""
+        result = self.chunks[row].copy()
+        result["chunk_id"] = int(self.chunk_ids[row])
+        return result
+    
+    def chunk_key(self, row: int) -> Tuple[str, Any]:
+        """(campaign_id, chunk_index) of the chunk at row, which identifies it across search stages"""
+        if isinstance(self.chunks, ChunkStore):
+            return self.chunks.chunk_key(row)
+        chunk = self.chunks[row]
+        return chunk.get("campaign_id", ""), chunk.get("chunk_index", 0)
+    
+    def search_rows(self, query_vector: np.ndarray, k: int = 5, filters: Optional[Dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, distances) of the nearest chunks, see search_rows_batch()"""
+        return self.search_rows_batch(np.array([query_vector]), k=k, filters=filters)[0]
+    
+    def search_rows_batch(self, query_matrix: np.ndarray, k: int = 5, filters: Optional[Dict] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """search_batch() without building result dicts
+        
+        Returns:
+            (rows, distances) per query row, nearest first; rows index chunks
+            (see chunk_result())
+        """
+        query_matrix = np.array(query_matrix).astype('float32').reshape(-1, self.dimension)
+        mask = self.filter_mask(filters)
+        allowed = self.index.ntotal if mask is None else int(mask.sum())
+        if allowed == 0:
+            return [(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)) for _ in range(len(query_matrix))]
+        
+        rescore = self.rescore_factor > 1 and self.vectors is not None and len(self.vectors) == len(self.chunk_ids)
+        if mask is not None and allowed <= config.vector_filter_exact_limit:
+            distances, indices = self._search_rows(query_matrix, np.nonzero(mask)[0], k)
+            rescore = False
+        else:
+            fetch_k = min(k * self.rescore_factor if rescore else k, allowed)
+            params = self._search_params(mask) if mask is not None else None
+            distances, indices = self.index.search(query_matrix, fetch_k, params=params)
+        
+        all_rows = []
+        for query_vector, query_distances, query_ids in zip(query_matrix, distances, indices):
+            rows = self._rows_for_ids(query_ids)
+            hits = rows >= 0
+            query_distances, rows = query_distances[hits], rows[hits]
+            if rescore:
+                exact = np.sum((self.vectors[rows] - query_vector) ** 2, axis=1)
+                order = np.argsort(exact, kind="stable")[:k]
+                query_distances, rows = exact[order], rows[order]
+            all_rows.append((rows, query_distances))
         
-        return results
+        return all_rows
     
-    def create_new_index(self) -> str:
-        """Create new timestamped index name"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        index_name = f"index_{timestamp}"
+    def new_index_name(self) -> str:
+        """Unique timestamped name for the next saved index
+        
+        Microsecond timestamps, plus a counter suffix if the name was already
+        issued or its directory exists, so builds finishing in the same second
+        never write into each other's (or the live index's) directory.
+        """
+        base_name = f"index_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        with _issued_index_names_lock:
+            index_name, suffix = base_name, 1
+            while index_name in _issued_index_names or (self.index_base_path / index_name).exists():
+                index_name = f"{base_name}_{suffix}"
+                suffix += 1
+            _issued_index_names.add(index_name)
+        return index_name
+    
+    def create_new_index(self, index_type: Optional[str] = None, storage: Optional[str] = None) -> str:
+        """Create new timestamped index name
+        
+        Args:
+            index_type: "flat", "ivf", "hnsw", or "ivfpq" (default: keep current type)
+            storage: "float32", "fp16", or "sq8" (default: keep current storage)
+        """
+        if index_type:
+            index_type = index_type.lower()
+            if index_type not in INDEX_TYPES:
+                raise ValueError(f"Invalid index type '{index_type}'. Must be one of: {INDEX_TYPES}")
+            self.index_type = index_type
+        if storage:
+            storage = storage.lower()
+            if storage not in STORAGE_TYPES:
+                raise ValueError(f"Invalid storage '{storage}'. Must be one of: {list(STORAGE_TYPES)}")
+            self.storage = storage
+        
+        index_name = self.new_index_name()
         self.current_index_name = index_name
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.metadata = []
-        self.chunks = []
+        self._reset()
         return index_name
     
     def save_index(self, index_name: Optional[str] = None):
-        """Save index and metadata to disk with timestamp"""
+        """Save index, columnar chunk store and header to disk with timestamp
+        
+        Never writes into the published index (the manifest's current one) or
+        the index this store was loaded from, whose files may be served or
+        memory-mapped: without index_name such a store is saved under a new
+        name, and naming one of them explicitly raises ValueError.
+        """
+        protected = {self.loaded_index_name, self.read_manifest().get("current")} - {None}
         if not index_name:
             if not self.current_index_name:
                 index_name = self.create_new_index()
+            elif self.current_index_name in protected:
+                index_name = self.new_index_name()
             else:
                 index_name = self.current_index_name
+        elif index_name in protected:
+            raise ValueError(f"Refusing to overwrite index '{index_name}', which is published or loaded; save under new_index_name()")
         
         index_dir = self.index_base_path / index_name
         index_dir.mkdir(parents=True, exist_ok=True)
         
         index_file = index_dir / "index.faiss"
-        metadata_file = index_dir / "metadata.pkl"
+        header_file = index_dir / "index.json"
         
         faiss.write_index(self.index, str(index_file))
+        ChunkStore.write(list(self.chunks), index_dir, ids=self.chunk_ids, indexed_at=self.indexed_at)
+        self.keyword_index.save(index_dir)
+        self.bm25_index.save(index_dir)
+        self.fuzzy_index.save(index_dir)
+        if self.vectors is not None:
+            np.save(index_dir / VECTORS_FILE, self.vectors)
         
-        with open(metadata_file, "wb") as f:
-            pickle.dump({"chunks": self.chunks, "metadata": self.metadata, "created_at": datetime.now().isoformat()}, f)
+        with open(header_file, "w", encoding="utf-8") as f:
+            json.dump({
+                "index_type": self.index_type,
+                "storage": self.storage,
+                "ntotal": self.index.ntotal,
+                "campaign_hashes": self.campaign_hashes,
+                "created_at": datetime.now().isoformat()
+            }, f, ensure_ascii=False)
         
         self.current_index_name = index_name
-        logger.info(f"Saved index '{index_name}' with {self.index.ntotal} vectors")
+        self._register_index(index_name, index_dir)
+        logger.info(f"Saved '{self.index_type}' ({self.storage}) index '{index_name}' with {self.index.ntotal} vectors")
+    
+    def read_manifest(self) -> Dict:
+        """Read the index manifest ({"current": name, "indexes": [entries, oldest first]})"""
+        manifest_file = self.index_base_path / MANIFEST_FILE
+        if not manifest_file.exists():
+            return {"current": None, "indexes": []}
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    def _write_manifest(self, manifest: Dict):
+        """Atomically replace the manifest, readers never see a partial file"""
+        manifest_file = self.index_base_path / MANIFEST_FILE
+        tmp_file = manifest_file.with_name(f".{MANIFEST_FILE}.{os.getpid()}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, manifest_file)
+    
+    def _register_index(self, index_name: str, index_dir: PathLib):
+        """Point the manifest at a saved index and prune builds beyond retention"""
+        manifest = self.read_manifest()
+        entries = [entry for entry in manifest["indexes"] if entry["name"] != index_name]
+        entries.append({
+            "name": index_name,
+            "index_type": self.index_type,
+            "storage": self.storage,
+            "ntotal": self.index.ntotal,
+            "campaigns": len(self.campaign_hashes),
+            "created_at": datetime.now().isoformat(),
+            "checksums": {path.name: _file_checksum(path) for path in sorted(index_dir.iterdir()) if path.is_file()}
+        })
+        
+        retention = config.vector_index_retention
+        pruned = entries[:-retention] if retention > 0 else []
+        self._write_manifest({"current": index_name, "indexes": entries[len(pruned):]})
+        
+        for entry in pruned:
+            shutil.rmtree(self.index_base_path / entry["name"], ignore_errors=True)
+            logger.info(f"Pruned index '{entry['name']}' (retention: {retention})")
+    
+    def verify_index(self, index_name: str) -> bool:
+        """Check an index's files against the manifest checksums (True if it is not tracked)"""
+        entry = next((entry for entry in self.read_manifest()["indexes"] if entry["name"] == index_name), None)
+        if entry is None:
+            return True
+        index_dir = self.index_base_path / index_name
+        for file_name, checksum in entry["checksums"].items():
+            path = index_dir / file_name
+            if not path.exists() or _file_checksum(path) != checksum:
+                logger.error(f"Index '{index_name}' failed verification: {file_name} is missing or modified")
+                return False
+        return True
     
     def find_latest_index(self) -> Optional[str]:
+        """Find the current index from the manifest, without scanning the directory
+        
+        Falls back to scanning for the newest index directory or old format
+        index when no manifest has been written yet.
+        """
+        current = self.read_manifest().get("current")
+        if current and (self.index_base_path / current).is_dir():
+            return current
+        return self._scan_latest_index()
+    
+    def _scan_latest_index(self) -> Optional[str]:
         """Find the latest index directory or old format index"""
         if not self.index_base_path.exists():
             return None
@@ -128,39 +687,79 @@ class VectorStore:
         return latest.name
     
     def load_index(self, index_name: str):
-        """Load specific index by name"""
+        """Load specific index by name
+        
+        In mmap mode the faiss index and chunk store are memory-mapped read-only,
+        so loading is near-instant and replicas on one host share the page cache.
+        Chunks are always served from the columnar chunk store and materialized
+        only when a search hit needs them. Indexes saved before the chunk store
+        existed are read from their metadata.pkl.
+        """
         if index_name == "legacy":
-            index_file = self.index_base_path / "index.faiss"
-            metadata_file = self.index_base_path / "metadata.pkl"
+            index_dir = self.index_base_path
         else:
             index_dir = self.index_base_path / index_name
-            index_file = index_dir / "index.faiss"
-            metadata_file = index_dir / "metadata.pkl"
+        index_file = index_dir / "index.faiss"
+        header_file = index_dir / "index.json"
+        metadata_file = index_dir / "metadata.pkl"
         
-        if index_file.exists() and metadata_file.exists():
-            self.index = faiss.read_index(str(index_file))
-            
-            with open(metadata_file, "rb") as f:
-                data = pickle.load(f)
+        if index_file.exists() and ((header_file.exists() and ChunkStore.exists(index_dir)) or metadata_file.exists()):
+            if header_file.exists() and ChunkStore.exists(index_dir):
+                with open(header_file, "r", encoding="utf-8") as f:
+                    header = json.load(f)
+                self.index_type = header.get("index_type", "flat")
+                self.storage = header.get("storage", "float32")
+                self.campaign_hashes = header.get("campaign_hashes", {})
+                self.chunks = ChunkStore(index_dir, use_mmap=self.use_mmap)
+                self.chunk_ids = self.chunks.columns["id"]
+                self.indexed_at = self.chunks.columns["indexed_at"]
+                # Always mmap'd: only rows touched by re-scoring are paged in
+                vectors_file = index_dir / VECTORS_FILE
+                self.vectors = np.load(vectors_file, mmap_mode="r") if vectors_file.exists() else None
+                self._keyword_index = KeywordIndex.load(index_dir, use_mmap=self.use_mmap) if KeywordIndex.exists(index_dir) else None
+                self._bm25_index = BM25Index.load(index_dir, use_mmap=self.use_mmap) if BM25Index.exists(index_dir) else None
+                self._fuzzy_index = FuzzyIndex.load(index_dir, use_mmap=self.use_mmap) if FuzzyIndex.exists(index_dir) else None
+            else:
+                logger.info(f"Index '{index_name}' uses the legacy pickle format, re-index to convert it")
+                with open(metadata_file, "rb") as f:
+                    data = pickle.load(f)
+                self.index_type = data.get("index_type", "flat")
+                self.storage = "float32"
+                self.vectors = None
+                self.campaign_hashes = {}
                 self.chunks = data.get("chunks", [])
-                self.metadata = data.get("metadata", [])
+                self.chunk_ids = np.arange(len(self.chunks), dtype=np.int64)
+                self.indexed_at = np.zeros(len(self.chunks), dtype=np.int64)
+                self._keyword_index = None
+                self._bm25_index = None
+                self._fuzzy_index = None
+            self._field_masks = {}
             
+            self.index_file = index_file
+            self.index = read_index(index_file, self.index_type, self.use_mmap)
+            self.mmap_loaded = self.use_mmap
+            self.loaded_index_name = index_name
+            apply_search_params(self.index, self.index_type)
             self.current_index_name = index_name
-            logger.info(f"Loaded index '{index_name}' with {self.index.ntotal} vectors")
+            mode = " (mmap)" if self.use_mmap else ""
+            logger.info(f"Loaded '{self.index_type}' ({self.storage}) index '{index_name}'{mode} with {self.index.ntotal} vectors")
         else:
             logger.warning(f"Index '{index_name}' not found, starting fresh")
-            self.index = faiss.IndexFlatL2(self.dimension)
-            self.metadata = []
-            self.chunks = []
+            self._reset()
     
     def load_latest_index(self):
-        """Load the latest index"""
+        """Load the latest index
+        
+        With VECTOR_INDEX_VERIFY, an index failing its manifest checksums is
+        skipped in favour of the newest retained build that passes.
+        """
         latest_index = self.find_latest_index()
+        if latest_index and config.vector_index_verify and not self.verify_index(latest_index):
+            retained = [entry["name"] for entry in reversed(self.read_manifest()["indexes"]) if entry["name"] != latest_index]
+            latest_index = next((name for name in retained if self.verify_index(name)), None)
         if latest_index:
             self.load_index(latest_index)
         else:
             logger.info("No existing index found, starting fresh")
-            self.index = faiss.IndexFlatL2(self.dimension)
-            self.metadata = []
-            self.chunks = []
+            self._reset()
 
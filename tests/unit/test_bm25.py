@@ -0,0 +1,60 @@
+import pytest
+import sys
+from pathlib import Path
+import numpy as np
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from services.rag.bm25 import BM25Index, tokenize
+
+
+CHUNKS = [
+    {"text": "Otoking kampanyası ile taksit fırsatı", "campaign_id": "otoking", "title": "Auto King"},
+    {"text": "iPhone 15 alımlarında taksit", "campaign_id": "iphone-15", "title": "iPhone Kampanyası"},
+    {"text": "akaryakıt alımlarında indirim ve taksit", "campaign_id": "opet", "title": "Opet Bonus"},
+    {"text": "taksit taksit taksit", "campaign_id": "diger"}
+]
+
+
+class TestBM25Index:
+    def test_tokenize(self):
+        assert tokenize("iPhone-15 Kampanyası, ÖZEL!") == ["iphone", "15", "kampanyası", "özel"]
+        assert tokenize(None) == []
+
+    def test_rare_terms_and_fields_rank_higher(self):
+        index = BM25Index.build(CHUNKS)
+
+        rows, scores = index.search(["iphone", "taksit"], k=4)
+
+        assert rows[0] == 1
+        assert list(scores) == sorted(scores, reverse=True)
+        assert index.idf[index.token_ids["iphone"]] > index.idf[index.token_ids["taksit"]]
+
+    def test_campaign_id_field(self):
+        index = BM25Index.build(CHUNKS)
+
+        rows, _ = index.search(tokenize("opet"), k=5)
+
+        assert list(rows) == [2]
+
+    def test_mask_and_unknown_terms(self):
+        index = BM25Index.build(CHUNKS)
+
+        rows, _ = index.search(["taksit"], k=5, mask=np.array([False, True, True, False]))
+
+        assert sorted(rows) == [1, 2]
+        assert len(index.search(["yok"], k=5)[0]) == 0
+        assert len(index.search(["taksit"], k=0)[0]) == 0
+
+    def test_save_and_load(self, tmp_path):
+        index = BM25Index.build(CHUNKS)
+        index.save(tmp_path)
+
+        loaded = BM25Index.load(tmp_path, use_mmap=True)
+        expected_rows, expected_scores = index.search(["kampanyası", "taksit"], k=3)
+        rows, scores = loaded.search(["kampanyası", "taksit"], k=3)
+
+        assert list(rows) == list(expected_rows)
+        assert scores == pytest.approx(expected_scores)
@@ -0,0 +1,36 @@
+import pytest
+import sys
+from pathlib import Path
+import numpy as np
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from services.rag.fusion import reciprocal_rank_fusion, weighted_fusion
+
+
+class TestFusion:
+    def test_reciprocal_rank_fusion(self):
+        fused = reciprocal_rank_fusion([np.array([1, 2, 3]), np.array([3, 4])], weights=(1.0, 1.0), k=3, rrf_k=60)
+
+        assert [item for item, _ in fused] == [3, 1, 2]
+        assert fused[0][1] == pytest.approx(1 / 63 + 1 / 61)
+
+    def test_reciprocal_rank_fusion_weights(self):
+        fused = reciprocal_rank_fusion([np.array([1, 2]), np.array([2, 1])], weights=(1.0, 3.0), k=2)
+
+        assert [item for item, _ in fused] == [2, 1]
+
+    def test_weighted_fusion(self):
+        fused = weighted_fusion([
+            (np.array([1, 2, 3]), np.array([-0.0, -1.0, -2.0])),
+            (np.array([3, 4]), np.array([0.9, 0.1]))
+        ], weights=(1.0, 2.0), k=10)
+
+        assert [item for item, _ in fused] == [3, 1, 2, 4]
+        assert [score for _, score in fused] == pytest.approx([2.0, 1.0, 0.5, 0.0])
+
+    def test_empty_and_constant_rankings(self):
+        assert reciprocal_rank_fusion([np.array([]), np.array([])], weights=(1.0, 1.0), k=5) == []
+        assert weighted_fusion([(np.array([7]), np.array([0.3])), (np.array([]), np.array([]))], weights=(1.0, 1.0), k=5) == [(7, 1.0)]
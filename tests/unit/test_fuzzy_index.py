@@ -0,0 +1,67 @@
+import pytest
+import sys
+from pathlib import Path
+import numpy as np
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from services.rag.fuzzy_index import FuzzyIndex, name_terms, query_terms, trigrams
+
+
+CHUNKS = [
+    {"text": "Otoking ile akaryakıt indirimi", "campaign_id": "otoking-akaryakit", "title": "Otoking Kampanyası"},
+    {"text": "Otoking taksit", "campaign_id": "otoking-akaryakit", "title": "Otoking Kampanyası"},
+    {"text": "market alışverişi", "campaign_id": "market-puan", "title": "Market Kampanyası"},
+    {"text": "araç bakım", "campaign_id": "auto-king", "title": "İndirim Kampanyası"},
+    {"text": "bonus puan", "campaign_id": "bonus", "title": "Bonus Kampanyası"}
+]
+
+
+class TestFuzzyIndex:
+    def test_terms(self):
+        assert name_terms("Şık Ödeme Kampanyası", "auto-king") == ["odeme", "kampanyasi", "auto", "king", "autoking"]
+        assert query_terms("oto king nedir") == ["king", "nedir", "otoking", "kingnedir"]
+        assert trigrams("oto") == ["$ot", "oto", "to$"]
+
+    @pytest.mark.parametrize("query, expected", [
+        ("otokin kampanyası nedir", {0, 1}),
+        ("oto king", {0, 1, 3}),
+        ("autokink", {3}),
+        ("marketler", {2})
+    ])
+    def test_misspelled_names(self, query, expected):
+        index = FuzzyIndex.build(CHUNKS)
+
+        rows, scores = index.search(query, k=5, min_similarity=0.6)
+
+        assert set(rows[:len(expected)]) == expected
+        assert list(scores) == sorted(scores, reverse=True)
+
+    def test_rare_names_outrank_common_words(self):
+        index = FuzzyIndex.build(CHUNKS)
+
+        rows, scores = index.search("otokin kampanyası", k=5, min_similarity=0.6)
+
+        assert set(rows[:2]) == {0, 1}
+        assert scores[0] > scores[-1]
+
+    def test_mask_threshold_and_k(self):
+        index = FuzzyIndex.build(CHUNKS)
+
+        assert list(index.search("otoking", k=5, mask=np.array([False, True, True, True, True]), min_similarity=0.6)[0]) == [1, 3]
+        assert len(index.search("otokin", k=5, min_similarity=0.95)[0]) == 0
+        assert len(index.search("zzzz", k=5)[0]) == 0
+        assert len(index.search("otoking", k=0)[0]) == 0
+
+    def test_save_and_load(self, tmp_path):
+        index = FuzzyIndex.build(CHUNKS)
+        index.save(tmp_path)
+
+        loaded = FuzzyIndex.load(tmp_path, use_mmap=True)
+        expected_rows, expected_scores = index.search("oto king", k=3)
+        rows, scores = loaded.search("oto king", k=3)
+
+        assert list(rows) == list(expected_rows)
+        assert scores == pytest.approx(expected_scores)
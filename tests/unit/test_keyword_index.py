@@ -0,0 +1,62 @@
+import pytest
+import sys
+from pathlib import Path
+import numpy as np
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from services.rag.keyword_index import KeywordIndex
+
+
+CHUNKS = [
+    {"text": "Otoking kampanyası ile taksit", "campaign_id": "otoking", "title": "Auto King"},
+    {"text": "iPhone 15 kampanyası", "campaign_id": "iphone-15", "title": "iPhone"},
+    {"text": "akaryakıt indirimi", "campaign_id": "opet", "title": "Opet AutoKing Bonus"},
+    {"text": "", "campaign_id": "bos"}
+]
+
+
+class TestKeywordIndex:
+    def test_token_rows_per_field(self):
+        index = KeywordIndex.build(CHUNKS)
+
+        assert list(index.rows("text", "kampanyası")) == [0, 1]
+        assert list(index.rows("title", "iphone")) == [1]
+        assert list(index.rows("campaign_id", "opet")) == [2]
+        assert list(index.rows("text", "opet")) == []
+        assert list(index.rows("text", "unknown")) == []
+
+    @pytest.mark.parametrize("pattern", ["autoking", "auto king", "king kampanyası", "phone 15", "15 kampanyası", "taksit", "xyz", "ı ile"])
+    def test_substring_rows_cover_scan(self, pattern):
+        index = KeywordIndex.build(CHUNKS)
+        full_texts = [f"{c['text']} {c.get('title', '')} {c['campaign_id']}".lower() for c in CHUNKS]
+        expected = {row for row, full_text in enumerate(full_texts) if pattern in full_text}
+
+        candidates = set(index.substring_rows(pattern).tolist())
+
+        assert expected <= candidates
+        assert candidates <= {row for row in range(len(CHUNKS)) if all(piece in full_texts[row] for piece in pattern.split())}
+
+    def test_fields(self):
+        index = KeywordIndex.build(CHUNKS)
+
+        fields = index.fields(1)
+
+        assert (fields.text, fields.title, fields.campaign_id) == ("iphone 15 kampanyası", "iphone", "iphone-15")
+        assert fields.token_count == 3
+        assert sorted(index.vocab[i] for i in fields.token_ids) == ["15", "iphone", "kampanyası"]
+        assert index.fields(3).title == ""
+
+    def test_save_and_load(self, tmp_path):
+        index = KeywordIndex.build(CHUNKS)
+        index.save(tmp_path)
+
+        loaded = KeywordIndex.load(tmp_path, use_mmap=True)
+
+        assert loaded.vocab == index.vocab
+        assert list(loaded.rows("title", "auto")) == [0]
+        assert np.array_equal(loaded.substring_rows("king"), index.substring_rows("king"))
+        assert loaded.fields(2).title == index.fields(2).title == "opet autoking bonus"
+        assert list(loaded.fields(0).token_ids) == list(index.fields(0).token_ids)
@@ -0,0 +1,59 @@
+import pytest
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from services.rag.metrics import LatencyHistogram, LatencyMetrics, stage_timer, timed_stage
+
+
+class TestLatencyHistogram:
+    def test_quantiles_within_bucket_width(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 1001):
+            histogram.record(float(value))
+
+        summary = histogram.summary()
+
+        assert summary["count"] == 1000
+        assert summary["mean_ms"] == pytest.approx(500.5)
+        assert summary["max_ms"] == 1000.0
+        for key, expected in [("p50_ms", 500), ("p95_ms", 950), ("p99_ms", 990)]:
+            assert expected <= summary[key] <= expected * LatencyHistogram.GROWTH
+
+    def test_empty_and_overflow(self):
+        histogram = LatencyHistogram()
+        assert histogram.quantile(0.99) == 0.0
+
+        histogram.record(0.0)
+        histogram.record(LatencyHistogram.MAX_MS * 10)
+
+        assert histogram.quantile(0.5) == LatencyHistogram.MIN_MS
+        assert histogram.quantile(0.99) == LatencyHistogram.MAX_MS * 10
+
+
+class TestLatencyMetrics:
+    def test_stage_timer_accumulates(self, mocker):
+        mocker.patch('services.rag.metrics.time.perf_counter', side_effect=[1.0, 1.002, 2.0, 2.003])
+        timings = {}
+
+        with stage_timer(timings, "rerank"):
+            pass
+        timed_stage(timings, "rerank", lambda: None)()
+        with stage_timer(None, "rerank"):
+            pass
+
+        assert timings == {"rerank": pytest.approx(5.0)}
+
+    def test_snapshot_in_pipeline_order(self):
+        metrics = LatencyMetrics()
+        metrics.record({"total": 12.0, "generation": 8.0, "embed": 3.0})
+        metrics.record({"total": 2.0, "custom": 1.0})
+
+        snapshot = metrics.snapshot()
+
+        assert list(snapshot) == ["embed", "generation", "total", "custom"]
+        assert snapshot["total"]["count"] == 2
+        assert snapshot["embed"]["count"] == 1
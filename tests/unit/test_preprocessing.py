@@ -0,0 +1,52 @@
+import pytest
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from services.rag.preprocessing import VariationMatcher, analyze_query, turkish_preprocessor
+
+
+class TestVariationMatcher:
+    def test_patterns(self):
+        matcher = VariationMatcher({"auto king", "autoking", "AutoKing", "ok", "king"})
+
+        assert matcher.patterns == ["auto king", "autoking", "king"]
+        assert matcher.variations == ["AutoKing", "auto king", "autoking", "king"]
+
+    def test_search_and_findall(self):
+        matcher = VariationMatcher({"auto king", "autoking", "auto-king"})
+
+        assert matcher.search("yeni auto-king fırsatı")
+        assert matcher.search("auto kingdom")
+        assert matcher.findall("autoking ve auto king") == ["auto king", "autoking"]
+        assert not matcher.search("otoking")
+
+    def test_match_fields(self):
+        matcher = VariationMatcher({"auto king"})
+
+        assert matcher.match_fields("kampanya", "auto king", "otoking") == (True, True, False)
+        assert matcher.match_fields("bir auto", "king bonus", "opet") == (True, False, False)
+        assert matcher.match_fields("yok", "", "") == (False, False, False)
+
+
+
+class TestQueryAnalysis:
+    def test_analysis_is_shared(self):
+        analysis = analyze_query("Oto kampanyası")
+
+        assert analyze_query("Oto kampanyası") is analysis
+        assert analysis.processed_query == "auto kampanyası"
+        assert analysis.query_words == {"oto", "kampanyası"}
+        assert analysis.terms == {"oto", "auto", "kampanyası"}
+        assert "auto kampanyası" in analysis.matcher.patterns
+
+    def test_preprocessor_is_memoized(self):
+        turkish_preprocessor.preprocess_query.cache_clear()
+
+        assert turkish_preprocessor.preprocess_query("Autoking fırsatı") == "auto king fırsatı"
+        assert turkish_preprocessor.preprocess_query("Autoking fırsatı") == "auto king fırsatı"
+        assert turkish_preprocessor.preprocess_query.cache_info().hits == 1
+        assert turkish_preprocessor._generate_variations("auto king") >= {"autoking", "auto-king", "AutoKing"}
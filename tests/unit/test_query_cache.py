@@ -0,0 +1,52 @@
+import pytest
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from services.rag.query_cache import QueryCache, normalize_question, freeze_filters
+
+
+class TestQueryCache:
+    def test_hit_and_miss_counts(self):
+        cache = QueryCache(max_size=4, ttl=60)
+        cache.put("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.stats() == {"size": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    def test_least_recently_used_is_evicted(self):
+        cache = QueryCache(max_size=2, ttl=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_entries_expire(self, mocker):
+        monotonic = mocker.patch('services.rag.query_cache.time.monotonic', return_value=100.0)
+        cache = QueryCache(max_size=2, ttl=10)
+        cache.put("a", 1)
+
+        monotonic.return_value = 109.0
+        assert cache.get("a") == 1
+        monotonic.return_value = 111.0
+        assert cache.get("a") is None
+        assert cache.stats()["size"] == 0
+
+    def test_disabled(self):
+        cache = QueryCache(max_size=0, ttl=60)
+        cache.put("a", 1)
+
+        assert cache.get("a") is None
+
+    def test_key_normalization(self):
+        assert normalize_question("  iPhone   kampanyası NEDIR ") == "iphone kampanyası nedir"
+        assert freeze_filters({"types": ["a"], "campaign_ids": ["x", "y"]}) == freeze_filters({"campaign_ids": ["x", "y"], "types": ["a"]})
+        assert freeze_filters({}) is None
@@ -8,7 +8,9 @@ project_root = Path(__file__).parent.parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from services.rag.retriever import Retriever
+from services.rag.retriever import Retriever, VectorRanking, EMPTY_VECTOR_RANKING
+from services.rag.keyword_index import KeywordIndex
+from services.rag.vector_store import VectorStore
 
 
 class TestRetriever:
@@ -18,19 +20,49 @@ class TestRetriever:
         assert retriever.vector_store == mock_vector_store
         assert retriever.embedding_service == mock_embedding_service
     
-    def test_retrieve(self, mock_embedding_service, mock_vector_store):
-        mock_embedding_service.embed_text.return_value = np.array([0.1] * 768)
-        mock_vector_store.search.return_value = [
-            {"text": "chunk 1", "campaign_id": "test-1", "score": 0.5},
-            {"text": "chunk 2", "campaign_id": "test-2", "score": 0.6}
-        ]
+    def test_retrieve(self, mock_embedding_service, tmp_path, mocker):
+        from services.rag.vector_store import VectorStore
+        chunks = [{"text": f"chunk {i}", "campaign_id": f"test-{i}"} for i in range(4)]
+        store = VectorStore(dimension=4, index_base_path=str(tmp_path))
+        store.add_vectors(np.eye(4, dtype='float32'), chunks)
+        mock_embedding_service.embed_text.return_value = np.array([1.0, 0.2, 0.0, 0.0])
+        search_rows = mocker.spy(store, 'search_rows')
+        chunk_result = mocker.spy(store, 'chunk_result')
         
-        retriever = Retriever(mock_vector_store, mock_embedding_service)
+        retriever = Retriever(store, mock_embedding_service)
         results = retriever.retrieve("test query", k=2)
         
-        assert len(results) == 2
+        assert [r["campaign_id"] for r in results] == ["test-0", "test-1"]
+        assert [r["rank"] for r in results] == [1, 2]
+        assert all("rerank_score" in r and "score" in r for r in results)
+        assert chunk_result.call_count == 2
         mock_embedding_service.embed_text.assert_called_once()
-        mock_vector_store.search.assert_called_once()
+        search_rows.assert_called_once()
+    
+    def test_retrieve_many(self, mock_embedding_service, tmp_path, mocker):
+        from services.rag.vector_store import VectorStore
+        chunks = [{"text": f"chunk {i}", "campaign_id": f"test-{i}"} for i in range(3)]
+        store = VectorStore(dimension=3, index_base_path=str(tmp_path))
+        store.add_vectors(np.eye(3, dtype='float32'), chunks)
+        mock_embedding_service.embed_batch.return_value = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]
+        search_rows_batch = mocker.spy(store, 'search_rows_batch')
+        
+        retriever = Retriever(store, mock_embedding_service)
+        results = retriever.retrieve_many(["first query", "second query"], k=2)
+        
+        assert [r[0]["campaign_id"] for r in results] == ["test-0", "test-1"]
+        assert all(len(r) == 2 for r in results)
+        mock_embedding_service.embed_batch.assert_called_once()
+        search_rows_batch.assert_called_once()
+        mock_embedding_service.embed_text.assert_not_called()
+    
+    def test_top_k_order_matches_stable_sort(self):
+        from services.rag.retriever import top_k_order
+        scores = np.random.default_rng(0).integers(0, 5, size=50).astype(np.float64)
+        
+        for k in [None, 0, 1, 7, 50, 80]:
+            expected = np.argsort(-scores, kind="stable")[:k]
+            assert top_k_order(scores, k).tolist() == expected.tolist()
     
     def test_retrieve_empty_index(self, mock_embedding_service, mock_vector_store):
         mock_vector_store.index.ntotal = 0
@@ -53,12 +85,68 @@ class TestRetriever:
         assert len(reranked) == 2
         assert "rerank_score" in reranked[0]
         assert reranked[0]["rerank_score"] > 0
-    
+
+    def test_rerank_rules(self, mock_embedding_service, mock_vector_store):
+        results = [
+            {"text": "kampanya", "campaign_id": "opet", "title": "King Bonus", "score": 5.0},
+            {"text": "başka", "campaign_id": "b", "type": "title_description", "score": 0.0},
+            {"text": "auto king fırsatı", "campaign_id": "c"}
+        ]
+
+        retriever = Retriever(mock_vector_store, mock_embedding_service)
+        reranked = retriever.rerank("auto king", results)
+
+        assert [r["campaign_id"] for r in reranked] == ["c", "opet", "b"]
+        assert [r["rerank_score"] for r in reranked] == pytest.approx([0.8, 0.55, 0.5])
+
+    def test_hybrid_search_rules(self, mock_embedding_service, tmp_path, mocker):
+        from services.rag.vector_store import VectorStore
+        chunks = [
+            {"text": "auto king", "campaign_id": "g"},
+            {"text": "x", "campaign_id": "e", "title": "Auto King"},
+            {"text": "y", "campaign_id": "king-x", "type": "title_description"}
+        ]
+        store = VectorStore(dimension=4, index_base_path=str(tmp_path))
+        store.add_vectors(np.eye(4, dtype='float32')[:3], chunks)
+        mock_embedding_service.embed_text.return_value = [1.0, 0.0, 0.0, 0.0]
+        retriever = Retriever(store, mock_embedding_service)
+        mocker.patch.object(retriever, '_vector_ranking', return_value=VectorRanking(
+            np.array([0, 1]), np.array([1.5, 2.5]), np.array([0, 1]), np.array([0.4, 0.3])))
+        mocker.patch.object(retriever, '_keyword_ranking', return_value=(np.array([2]), np.array([0.1])))
+
+        results = retriever.hybrid_search("auto king", k=3)
+
+        assert [r["campaign_id"] for r in results] == ["e", "king-x", "g"]
+        assert [r["rerank_score"] for r in results] == pytest.approx([0.99, 0.6, 0.4])
+        assert (results[0]["score"], results[0]["rank"]) == (2.5, 2)
+        assert results[1]["keyword_score"] == 0.1 and "score" not in results[1]
+
+    def test_hybrid_search_builds_dicts_for_final_k(self, mock_embedding_service, tmp_path, mocker):
+        from services.rag.vector_store import VectorStore
+        chunks = [{"text": f"market alışverişi {i}", "campaign_id": f"market-{i}", "title": "Market"} for i in range(6)]
+        chunks[1] = {"text": "Auto King kampanyası", "campaign_id": "otoking", "title": "Auto King"}
+        store = VectorStore(dimension=8, index_base_path=str(tmp_path))
+        store.add_vectors(np.eye(8, dtype='float32')[:6], chunks)
+        mock_embedding_service.embed_text.return_value = [0.0, 1.0] + [0.0] * 6
+        chunk_result = mocker.spy(store, 'chunk_result')
+
+        retriever = Retriever(store, mock_embedding_service)
+        results = retriever.hybrid_search("auto king", k=2)
+
+        assert [r["campaign_id"] for r in results][0] == "otoking"
+        # Found by both stages, it keeps the vector stage's annotations
+        assert results[0]["rank"] == 1 and "keyword_score" not in results[0]
+        assert len({r["chunk_id"] for r in results}) == 2
+        assert chunk_result.call_count == 2
+
     def test_keyword_search(self, mock_embedding_service, mock_vector_store):
         mock_vector_store.chunks = [
             {"text": "test chunk with query", "campaign_id": "test-1", "title": "Test"},
             {"text": "other chunk", "campaign_id": "test-2", "title": "Other"}
         ]
+        mock_vector_store.keyword_index = KeywordIndex.build(mock_vector_store.chunks)
+        mock_vector_store.chunk_ids = np.arange(len(mock_vector_store.chunks))
+        mock_vector_store.chunk_result.side_effect = lambda row: VectorStore.chunk_result(mock_vector_store, row)
         
         retriever = Retriever(mock_vector_store, mock_embedding_service)
         results = retriever.keyword_search("query", k=2)
@@ -66,3 +154,297 @@ class TestRetriever:
         assert len(results) > 0
         assert "keyword_score" in results[0]
 
+    
+    def test_keyword_search_with_filters(self, mock_embedding_service, mock_vector_store):
+        mock_vector_store.chunks = [
+            {"text": "query in first", "campaign_id": "test-1"},
+            {"text": "query in second", "campaign_id": "test-2"}
+        ]
+        mock_vector_store.keyword_index = KeywordIndex.build(mock_vector_store.chunks)
+        mock_vector_store.chunk_ids = np.arange(len(mock_vector_store.chunks))
+        mock_vector_store.chunk_result.side_effect = lambda row: VectorStore.chunk_result(mock_vector_store, row)
+        mock_vector_store.filter_mask.return_value = np.array([False, True])
+        
+        retriever = Retriever(mock_vector_store, mock_embedding_service)
+        results = retriever.keyword_search("query", k=2, filters={"campaign_ids": ["test-2"]})
+        
+        assert [r["campaign_id"] for r in results] == ["test-2"]
+        mock_vector_store.filter_mask.assert_called_once_with({"campaign_ids": ["test-2"]})
+    
+    def test_keyword_search_matches_full_scan(self, mock_embedding_service, mock_vector_store):
+        mock_vector_store.chunks = [
+            {"text": "Otoking kampanyası ile taksit", "campaign_id": "otoking", "title": "Auto King"},
+            {"text": "iPhone 15 kampanyası", "campaign_id": "iphone-15", "title": "iPhone"},
+            {"text": "akaryakıt indirimi", "campaign_id": "opet", "title": "Opet Bonus"},
+            {"text": "alakasız metin", "campaign_id": "diger"}
+        ]
+        mock_vector_store.keyword_index = KeywordIndex.build(mock_vector_store.chunks)
+        mock_vector_store.chunk_ids = np.arange(len(mock_vector_store.chunks))
+        mock_vector_store.chunk_result.side_effect = lambda row: VectorStore.chunk_result(mock_vector_store, row)
+        
+        retriever = Retriever(mock_vector_store, mock_embedding_service)
+        results = retriever.keyword_search("auto king kampanyası", k=10)
+        
+        assert [r["campaign_id"] for r in results] == ["otoking", "iphone-15"]
+    
+    def test_bm25_search(self, mock_embedding_service, tmp_path):
+        from services.rag.vector_store import VectorStore
+        chunks = [
+            {"text": "akaryakıt indirimi", "campaign_id": "opet"},
+            {"text": "oto kredisi", "campaign_id": "auto-king", "title": "Auto King"}
+        ]
+        store = VectorStore(dimension=4, index_base_path=str(tmp_path))
+        store.add_vectors(np.eye(4, dtype='float32')[:2], chunks)
+        
+        retriever = Retriever(store, mock_embedding_service)
+        results = retriever.bm25_search("oto kampanyası", k=2)
+        
+        assert [r["campaign_id"] for r in results] == ["auto-king"]
+        assert results[0]["chunk_id"] == 1
+        assert results[0]["bm25_score"] > 0
+    
+    def test_diversify_bm25_results(self, mock_embedding_service, tmp_path, mocker):
+        from services.rag.vector_store import VectorStore
+        mocker.patch('services.rag.retriever.config.diversify_per_campaign', 0)
+        chunks = [{"text": f"oto kredisi {i}", "campaign_id": f"auto-{i}"} for i in range(3)]
+        vectors = np.array([[1, 0, 0], [1, 0.01, 0], [0, 0, 1]], dtype='float32')
+        store = VectorStore(dimension=3, index_base_path=str(tmp_path))
+        store.add_vectors(vectors, chunks)
+        
+        retriever = Retriever(store, mock_embedding_service)
+        results = retriever.bm25_search("oto kredisi", k=3)
+        _, found = store.chunk_vectors([r["chunk_id"] for r in results])
+        diversified = retriever.diversify(results, k=3)
+        
+        assert found.all()
+        # Chunks 0 and 1 are near-duplicates, so only one of them is kept
+        assert len(diversified) == 2
+        assert {r["campaign_id"] for r in diversified} & {"auto-0", "auto-1"} != {"auto-0", "auto-1"}
+    
+    def test_rerank_uses_precomputed_fields(self, mock_embedding_service, tmp_path, mocker):
+        from services.rag.vector_store import VectorStore
+        chunks = [
+            {"text": "Auto King kampanyası", "campaign_id": "otoking", "title": "Auto King"},
+            {"text": "akaryakıt indirimi", "campaign_id": "opet", "title": "Opet"}
+        ]
+        store = VectorStore(dimension=4, index_base_path=str(tmp_path))
+        store.add_vectors(np.eye(4, dtype='float32')[:2], chunks)
+        normalize = mocker.patch('services.rag.retriever.normalize_chunk')
+        
+        retriever = Retriever(store, mock_embedding_service)
+        results = retriever.rerank("auto king kampanyası", store.search(np.eye(4, dtype='float32')[1], k=2))
+        keyword_results = retriever.keyword_search("auto king kampanyası", k=2)
+        
+        assert results[0]["campaign_id"] == "otoking"
+        assert [r["chunk_id"] for r in keyword_results] == [0]
+        normalize.assert_not_called()
+
+    def test_hybrid_candidate_sizes(self, mock_embedding_service, mock_vector_store, mocker):
+        mock_vector_store.index.ntotal = 10000
+        retriever = Retriever(mock_vector_store, mock_embedding_service)
+        vector_ranking = mocker.patch.object(retriever, '_vector_ranking', return_value=EMPTY_VECTOR_RANKING)
+        keyword_ranking = mocker.patch.object(retriever, '_keyword_ranking', return_value=(np.zeros(0, dtype=np.int64), np.zeros(0)))
+        stats = {}
+
+        retriever.hybrid_search("auto king", k=4, stats=stats)
+
+        assert stats == {"vector_fetch": 900, "vector_rerank": 60, "keyword": 20, "fusion": "heuristic"}
+        assert vector_ranking.call_args.args[2:4] == (60, 900)
+        assert keyword_ranking.call_args.args[1] == 20
+
+    def test_adaptive_hybrid_grows_pool_while_low_confidence(self, mock_embedding_service, mock_vector_store, mocker):
+        mocker.patch('services.rag.retriever.config.hybrid_adaptive', True)
+        mock_vector_store.index.ntotal = 10000
+        mock_embedding_service.embed_text.return_value = [0.1] * 4
+        retriever = Retriever(mock_vector_store, mock_embedding_service)
+        low = VectorRanking(np.array([0, 1]), np.ones(2), np.arange(2), np.full(2, 0.3))
+        high = VectorRanking(np.array([2, 3]), np.ones(2), np.arange(2), np.full(2, 0.9))
+        rank = mocker.patch.object(retriever, '_vector_ranking', side_effect=[low, low, high])
+        mocker.patch.object(retriever, '_keyword_ranking', return_value=(np.zeros(0, dtype=np.int64), np.zeros(0)))
+        rescore = mocker.patch.object(retriever, '_rescore_merged', return_value=[])
+        stats = {}
+
+        retriever.hybrid_search("auto king", k=2, stats=stats)
+
+        assert [call.args[3] for call in rank.call_args_list] == [30, 60, 120]
+        assert stats == {"vector_fetch": 120, "vector_rerank": 30, "keyword": 10, "rounds": 3, "fusion": "heuristic"}
+        assert rescore.call_args.args[1] is high
+        mock_embedding_service.embed_text.assert_called_once()
+
+    @pytest.mark.parametrize("fusion", ["rrf", "weighted"])
+    def test_fused_hybrid_search(self, mock_embedding_service, tmp_path, mocker, fusion):
+        from services.rag.vector_store import VectorStore
+        chunks = [
+            {"text": "akaryakıt indirimi", "campaign_id": "opet", "title": "Opet"},
+            {"text": "Auto King kampanyası", "campaign_id": "otoking", "title": "Auto King"},
+            {"text": "market alışverişi", "campaign_id": "market", "title": "Market"}
+        ]
+        store = VectorStore(dimension=4, index_base_path=str(tmp_path))
+        store.add_vectors(np.eye(4, dtype='float32')[:3], chunks)
+        mock_embedding_service.embed_text.return_value = [1.0, 0.0, 0.0, 0.0]
+        chunk_result = mocker.spy(store, 'chunk_result')
+        stats = {}
+
+        retriever = Retriever(store, mock_embedding_service)
+        results = retriever.hybrid_search("auto king", k=2, fusion=fusion, stats=stats)
+
+        assert {r["campaign_id"] for r in results} == {"opet", "otoking"}
+        assert all("fusion_score" in r for r in results)
+        assert chunk_result.call_count == 2
+        assert stats == {"vector_fetch": 3, "keyword": 1, "fusion": fusion}
+        with pytest.raises(ValueError):
+            retriever.hybrid_search("auto king", fusion="borda")
+
+    @pytest.mark.parametrize("fusion", ["heuristic", "rrf"])
+    def test_hybrid_search_stage_timings(self, mock_embedding_service, tmp_path, fusion):
+        from services.rag.vector_store import VectorStore
+        chunks = [
+            {"text": "akaryakıt indirimi", "campaign_id": "opet", "title": "Opet"},
+            {"text": "Auto King kampanyası", "campaign_id": "otoking", "title": "Auto King"}
+        ]
+        store = VectorStore(dimension=4, index_base_path=str(tmp_path))
+        store.add_vectors(np.eye(4, dtype='float32')[:2], chunks)
+        mock_embedding_service.embed_text.return_value = [1.0, 0.0, 0.0, 0.0]
+        timings = {}
+
+        retriever = Retriever(store, mock_embedding_service)
+        retriever.hybrid_search("auto king", k=2, fusion=fusion, timings=timings)
+
+        assert {"embed", "vector_search", "keyword_search", "merge"} <= set(timings)
+        assert ("rerank" in timings) == (fusion == "heuristic")
+        assert all(value >= 0 for value in timings.values())
+
+    def test_fuzzy_search_matches_misspelled_names(self, mock_embedding_service, tmp_path):
+        from services.rag.vector_store import VectorStore
+        chunks = [
+            {"text": "akaryakıt indirimi", "campaign_id": "opet", "title": "Opet"},
+            {"text": "bakım fırsatı", "campaign_id": "otoking", "title": "Otoking Kampanyası"},
+            {"text": "market alışverişi", "campaign_id": "market", "title": "Market"}
+        ]
+        store = VectorStore(dimension=4, index_base_path=str(tmp_path))
+        store.add_vectors(np.eye(4, dtype='float32')[:3], chunks)
+
+        retriever = Retriever(store, mock_embedding_service)
+
+        results = retriever.fuzzy_search("otokink kampanyası", k=2)
+        assert [r["campaign_id"] for r in results] == ["otoking"]
+        assert results[0]["fuzzy_score"] > 0
+        assert retriever.keyword_search("otokink", k=2) == []
+        assert retriever.fuzzy_search("otokink", k=2, filters={"campaign_ids": ["opet"]}) == []
+
+    def test_hybrid_fuzzy_stage(self, mock_embedding_service, tmp_path, mocker):
+        from services.rag.vector_store import VectorStore
+        mocker.patch('services.rag.retriever.config.hybrid_fuzzy_factor', 3)
+        store = VectorStore(dimension=4, index_base_path=str(tmp_path))
+        store.add_vectors(np.eye(4, dtype='float32')[:2], [
+            {"text": "akaryakıt", "campaign_id": "opet", "title": "Opet"},
+            {"text": "bakım", "campaign_id": "otoking", "title": "Otoking"}
+        ])
+        retriever = Retriever(store, mock_embedding_service)
+        mocker.patch.object(retriever, '_vector_ranking', return_value=EMPTY_VECTOR_RANKING)
+        mocker.patch.object(retriever, '_keyword_ranking', return_value=(np.zeros(0, dtype=np.int64), np.zeros(0)))
+        fuzzy = mocker.patch.object(retriever, '_fuzzy_ranking', return_value=(np.array([1]), np.array([0.5])))
+        stats = {}
+
+        results = retriever.hybrid_search("otokin", k=2, stats=stats)
+
+        assert [r["campaign_id"] for r in results] == ["otoking"]
+        assert results[0]["fuzzy_score"] == 0.5
+        assert results[0]["rerank_score"] >= 0.5
+        assert fuzzy.call_args.args[1] == 6
+        assert stats["fuzzy"] == 6
+
+    def test_cross_encoder_rerank(self, mock_embedding_service, mock_vector_store, mocker):
+        mocker.patch('services.rag.retriever.config.rerank_top_n', 3)
+        cross_encoder = mocker.MagicMock()
+        cross_encoder.score.return_value = np.array([0.1, 0.9, 0.5], dtype=np.float32)
+        retriever = Retriever(mock_vector_store, mock_embedding_service, cross_encoder)
+        results = [{"text": f"chunk {i}", "campaign_id": f"c-{i}", "title": f"Title {i}"} for i in range(4)]
+        stats = {}
+
+        reranked = retriever.cross_encoder_rerank("iphone", results, k=2, stats=stats)
+
+        assert [r["campaign_id"] for r in reranked] == ["c-1", "c-2"]
+        assert reranked[0]["cross_score"] == pytest.approx(0.9)
+        assert cross_encoder.score.call_args.args[1] == ["Title 0\nchunk 0", "Title 1\nchunk 1", "Title 2\nchunk 2"]
+        assert stats == {"cross_encoder": 3}
+        assert "cross_score" not in results[1]
+
+    def test_cross_encoder_rerank_falls_back(self, mock_embedding_service, mock_vector_store, mocker):
+        import time
+        mocker.patch('services.rag.retriever.config.rerank_budget_ms', 50)
+        cross_encoder = mocker.MagicMock()
+        retriever = Retriever(mock_vector_store, mock_embedding_service, cross_encoder)
+        results = [{"text": f"chunk {i}", "campaign_id": f"c-{i}"} for i in range(3)]
+
+        cross_encoder.score.side_effect = lambda *args: time.sleep(0.5) or np.array([0.1, 0.2, 0.3])
+        stats = {}
+        assert [r["campaign_id"] for r in retriever.cross_encoder_rerank("iphone", results, k=2, stats=stats)] == ["c-0", "c-1"]
+        assert stats["timed_out"] == ["cross_encoder"]
+
+        cross_encoder.score.side_effect = RuntimeError("onnx")
+        assert [r["campaign_id"] for r in retriever.cross_encoder_rerank("iphone", results, k=2)] == ["c-0", "c-1"]
+
+        assert Retriever(mock_vector_store, mock_embedding_service).cross_encoder_rerank("iphone", results, k=1) == results[:1]
+
+    def test_diversify(self, mock_embedding_service, tmp_path, mocker):
+        from services.rag.vector_store import VectorStore
+        mocker.patch('services.rag.retriever.config.diversify_per_campaign', 2)
+        chunks = [{"text": f"chunk {i}", "campaign_id": campaign_id} for i, campaign_id in enumerate(["a", "a", "a", "b", "c"])]
+        vectors = np.array([[1, 0, 0], [1, 0.01, 0], [0.9, 0.4, 0], [1, 0.02, 0], [0, 0, 1]], dtype='float32')
+        store = VectorStore(dimension=3, index_base_path=str(tmp_path))
+        store.add_vectors(vectors, chunks)
+        results = [store.chunk_result(row) for row in range(5)]
+        stats = {}
+
+        retriever = Retriever(store, mock_embedding_service)
+        diversified = retriever.diversify(results, k=3, stats=stats)
+
+        # a's third chunk exceeds the per-campaign cap; a's second and b are near-duplicates of a's first
+        assert [r["text"] for r in diversified] == ["chunk 0", "chunk 4"]
+        assert stats == {"diversify": 5}
+        assert retriever.diversify(results[:1], k=3) == results[:1]
+
+    def test_diversify_mmr_order(self, mock_embedding_service, tmp_path, mocker):
+        from services.rag.vector_store import VectorStore
+        mocker.patch('services.rag.retriever.config.diversify_per_campaign', 0)
+        mocker.patch('services.rag.retriever.config.mmr_lambda', 0.5)
+        chunks = [{"text": f"chunk {i}", "campaign_id": f"c-{i}"} for i in range(3)]
+        vectors = np.array([[1, 0], [0.9, 0.3], [0, 1]], dtype='float32')
+        store = VectorStore(dimension=2, index_base_path=str(tmp_path))
+        store.add_vectors(vectors, chunks)
+        results = [store.chunk_result(row) for row in range(3)] + [{"text": "no id", "campaign_id": "c-3"}]
+
+        diversified = Retriever(store, mock_embedding_service).diversify(results, k=3)
+
+        assert [r["text"] for r in diversified] == ["chunk 0", "chunk 2", "no id"]
+
+    def test_hybrid_stages_run_concurrently(self, mock_embedding_service, mock_vector_store, mocker):
+        import threading
+        barrier = threading.Barrier(2, timeout=5)
+        retriever = Retriever(mock_vector_store, mock_embedding_service)
+
+        def stage():
+            # Each stage waits for the other, so serial execution would break the barrier
+            barrier.wait()
+
+        mocker.patch.object(retriever, '_vector_ranking', side_effect=lambda *args, **kwargs: stage() or EMPTY_VECTOR_RANKING)
+        mocker.patch.object(retriever, '_keyword_ranking', side_effect=lambda *args, **kwargs: stage() or (np.zeros(0, dtype=np.int64), np.zeros(0)))
+
+        assert retriever.hybrid_search("auto king", k=2) == []
+
+    def test_hybrid_stage_timeout_falls_back(self, mock_embedding_service, tmp_path, mocker):
+        import time
+        from services.rag.vector_store import VectorStore
+        mocker.patch('services.rag.retriever.config.hybrid_vector_timeout', 0.05)
+        store = VectorStore(dimension=4, index_base_path=str(tmp_path))
+        store.add_vectors(np.eye(4, dtype='float32')[:1], [{"text": "auto king", "campaign_id": "otoking"}])
+        retriever = Retriever(store, mock_embedding_service)
+        mocker.patch.object(retriever, '_vector_ranking', side_effect=lambda *args, **kwargs: time.sleep(0.5) or EMPTY_VECTOR_RANKING)
+        mocker.patch.object(retriever, '_keyword_ranking', return_value=(np.array([0]), np.array([0.7])))
+        stats = {}
+
+        results = retriever.hybrid_search("auto king", k=2, stats=stats)
+
+        assert [r["campaign_id"] for r in results] == ["otoking"]
+        assert stats["timed_out"] == ["vector"]
@@ -2,12 +2,14 @@ import pytest
 import sys
 from pathlib import Path
 from unittest.mock import MagicMock, patch
+import numpy as np
 
 project_root = Path(__file__).parent.parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 from services.rag.service import RAGService
+from services.rag.preprocessing import analyze_query
 from shared.models.rag_models import CampaignMetadata
 
 
@@ -54,6 +56,57 @@ class TestRAGService:
         mock_vector_store.add_vectors.assert_called_once()
         mock_vector_store.save_index.assert_called_once()
     
+    def test_index_campaigns_publishes_new_store(self, mocker, sample_campaign, mock_embedding_service):
+        mocker.patch('services.rag.service.EmbeddingService', return_value=mock_embedding_service)
+        mocker.patch('services.rag.service.VectorStore', side_effect=lambda **kwargs: MagicMock())
+        mocker.patch('services.rag.service.Retriever', side_effect=lambda store, embedding, cross_encoder: MagicMock(vector_store=store))
+        mocker.patch('services.rag.service.ResponseGenerator')
+        mocker.patch('services.rag.service.Chunker')
+        
+        service = RAGService()
+        old_store = service.vector_store
+        old_retriever = service.retriever
+        service.chunker.chunk_campaign.return_value = [{"text": "test chunk", "campaign_id": "test-1"}]
+        
+        summary = service.index_campaigns([sample_campaign])
+        
+        assert service.vector_store is not old_store
+        assert service.retriever is not old_retriever
+        assert service.retriever.vector_store is service.vector_store
+        assert service.index_version == summary["index_version"] == 1
+        old_store.create_new_index.assert_not_called()
+        old_store.add_vectors.assert_not_called()
+        service.vector_store.save_index.assert_called_once()
+    
+    def test_index_campaigns_incremental(self, mocker, sample_campaign, mock_embedding_service, mock_vector_store):
+        mocker.patch('services.rag.service.EmbeddingService', return_value=mock_embedding_service)
+        mocker.patch('services.rag.service.VectorStore', return_value=mock_vector_store)
+        mocker.patch('services.rag.service.Retriever')
+        mocker.patch('services.rag.service.ResponseGenerator')
+        mocker.patch('services.rag.service.Chunker')
+        
+        service = RAGService()
+        unchanged = {"text": "same chunk", "campaign_id": "test-1"}
+        changed = {"text": "new chunk", "campaign_id": "test-2"}
+        mock_vector_store.supports_updates.return_value = True
+        mock_vector_store.campaign_hashes = {
+            "test-1": service._fingerprint([unchanged]),
+            "test-2": "stale",
+            "test-3": "gone"
+        }
+        mock_embedding_service.embed_batch.return_value = [[0.1] * 768]
+        mocker.patch.object(service.chunker, 'chunk_campaign', side_effect=lambda c: [unchanged] if c.campaign_id == "test-1" else [changed])
+        
+        campaigns = [sample_campaign, sample_campaign.model_copy(update={"campaign_id": "test-2"})]
+        summary = service.index_campaigns(campaigns, incremental=True)
+        
+        assert summary["campaigns_changed"] == 1
+        assert summary["campaigns_removed"] == 1
+        mock_vector_store.create_new_index.assert_not_called()
+        mock_vector_store.remove_campaigns.assert_called_once_with(["test-2", "test-3"])
+        mock_embedding_service.embed_batch.assert_called_once_with(["new chunk"])
+        mock_vector_store.save_index.assert_called_once()
+    
     def test_index_campaigns_empty(self, mocker, mock_embedding_service, mock_vector_store):
         mocker.patch('services.rag.service.EmbeddingService', return_value=mock_embedding_service)
         mocker.patch('services.rag.service.VectorStore', return_value=mock_vector_store)
@@ -93,6 +146,156 @@ class TestRAGService:
         assert "sources" in result
         assert "num_sources" in result
         assert result["answer"] == "Test answer"
-        mock_retriever.hybrid_search.assert_called_once_with("test question", k=3)
-        mock_generator.generate.assert_called_once()
+        analysis = analyze_query("test question")
+        mock_retriever.hybrid_search.assert_called_once_with("test question", k=3, filters=None, analysis=analysis, stats=result["candidate_sizes"], fusion=None,
+                                                             timings=mocker.ANY)
+        mock_generator.generate.assert_called_once_with("test question", mock_retriever.hybrid_search.return_value, analysis=analysis, timings=mocker.ANY)
+        assert "timings" not in result
+    
+    def test_query_debug_timings(self, mocker, mock_retriever, mock_generator):
+        mocker.patch('services.rag.service.EmbeddingService')
+        mocker.patch('services.rag.service.VectorStore')
+        mocker.patch('services.rag.service.Retriever', return_value=mock_retriever)
+        mocker.patch('services.rag.service.ResponseGenerator', return_value=mock_generator)
+        mocker.patch('services.rag.service.Chunker')
+        
+        def hybrid_search(question, timings=None, **kwargs):
+            timings["vector_search"] = 2.0
+            return [{"text": "test chunk", "campaign_id": "test-1", "score": 0.5, "title": "Test"}]
+        mock_retriever.hybrid_search = mocker.MagicMock(side_effect=hybrid_search)
+        
+        service = RAGService()
+        result = service.query("test question", k=3, debug=True)
+        cached = service.query("test question", k=3, debug=True)
+        
+        assert {"preprocess", "vector_search", "total"} <= set(result["timings"])
+        assert result["timings"]["vector_search"] == 2.0
+        assert "vector_search" not in cached["timings"]
+        metrics = service.latency.snapshot()
+        assert metrics["total"]["count"] == 2
+        assert metrics["vector_search"]["count"] == 1
+        assert list(metrics)[-1] == "total"
+    
+    def test_query_cross_encoder(self, mocker, mock_retriever, mock_generator):
+        mocker.patch('services.rag.service.config.rerank_top_n', 10)
+        mocker.patch('services.rag.service.EmbeddingService')
+        mocker.patch('services.rag.service.VectorStore')
+        mocker.patch('services.rag.service.Retriever', return_value=mock_retriever)
+        mocker.patch('services.rag.service.ResponseGenerator', return_value=mock_generator)
+        mocker.patch('services.rag.service.Chunker')
+        mock_retriever.hybrid_search = mocker.MagicMock(return_value=[
+            {"text": f"chunk {i}", "campaign_id": f"test-{i}", "score": 0.5, "title": "Test"} for i in range(10)
+        ])
+        mock_retriever.cross_encoder = mocker.MagicMock()
+        mock_retriever.cross_encoder.score.return_value = np.arange(10, dtype=np.float32)
+        
+        service = RAGService()
+        result = service.query("test question", k=3)
+        
+        assert mock_retriever.hybrid_search.call_args.kwargs["k"] == 10
+        assert [source["campaign_id"] for source in result["sources"]] == ["test-9", "test-8", "test-7"]
+        assert result["sources"][0]["score"] == 9.0
+        assert result["candidate_sizes"]["cross_encoder"] == 10
+        assert len(mock_generator.generate.call_args.args[1]) == 3
+    
+    def test_query_diversify(self, mocker, mock_retriever, mock_generator):
+        mocker.patch('services.rag.service.config.diversify_fetch_factor', 3)
+        mocker.patch('services.rag.service.EmbeddingService')
+        mocker.patch('services.rag.service.VectorStore')
+        mocker.patch('services.rag.service.Retriever', return_value=mock_retriever)
+        mocker.patch('services.rag.service.ResponseGenerator', return_value=mock_generator)
+        mocker.patch('services.rag.service.Chunker')
+        candidates = [{"text": f"chunk {i}", "campaign_id": "test-1", "score": 0.5, "title": "Test"} for i in range(6)]
+        mock_retriever.hybrid_search = mocker.MagicMock(return_value=candidates)
+        mock_retriever.diversify = mocker.MagicMock(return_value=candidates[:1])
+        
+        service = RAGService()
+        result = service.query("test question", k=2, diversify=True)
+        
+        assert mock_retriever.hybrid_search.call_args.kwargs["k"] == 6
+        mock_retriever.diversify.assert_called_once_with(candidates, 2, stats=result["candidate_sizes"])
+        assert result["num_sources"] == 1
+        
+        service.query("test question", k=2)
+        assert mock_retriever.hybrid_search.call_args.kwargs["k"] == 2
+        assert mock_retriever.diversify.call_count == 1
+    
+    def test_query_cache(self, mocker, mock_retriever, mock_generator):
+        mocker.patch('services.rag.service.EmbeddingService')
+        mocker.patch('services.rag.service.VectorStore')
+        mocker.patch('services.rag.service.Retriever', return_value=mock_retriever)
+        mocker.patch('services.rag.service.ResponseGenerator', return_value=mock_generator)
+        mocker.patch('services.rag.service.Chunker')
+        mock_retriever.hybrid_search = mocker.MagicMock(return_value=[
+            {"text": "test chunk", "campaign_id": "test-1", "score": 0.5, "title": "Test"}
+        ])
+        
+        service = RAGService()
+        first = service.query("iPhone kampanyası nedir", k=3)
+        second = service.query("iphone  kampanyası nedir ", k=3)
+        service.query("iphone kampanyası nedir", k=5)
+        
+        assert second == first
+        assert mock_retriever.hybrid_search.call_count == 2
+        assert mock_generator.generate.call_count == 2
+        assert service.retrieval_cache.stats()["hits"] == 1
+        
+        service._publish(mocker.MagicMock())
+        service.query("iphone kampanyası nedir", k=3)
+        
+        assert mock_retriever.hybrid_search.call_count == 3
+        assert service.answer_cache.stats()["size"] == 1
+    
+    @pytest.mark.parametrize("timed_out", [["vector"], ["cross_encoder"]])
+    def test_query_timed_out_not_cached(self, mocker, mock_retriever, mock_generator, timed_out):
+        mocker.patch('services.rag.service.config.semantic_cache_size', 16)
+        mocker.patch('services.rag.service.EmbeddingService')
+        mocker.patch('services.rag.service.VectorStore')
+        mocker.patch('services.rag.service.Retriever', return_value=mock_retriever)
+        mocker.patch('services.rag.service.ResponseGenerator', return_value=mock_generator)
+        mocker.patch('services.rag.service.Chunker')
+        
+        def hybrid_search(question, stats=None, **kwargs):
+            stats["timed_out"] = timed_out
+            return [{"text": "test chunk", "campaign_id": "test-1", "score": 0.5, "title": "Test"}]
+        mock_retriever.hybrid_search = mocker.MagicMock(side_effect=hybrid_search)
+        mock_retriever.embed_query = mocker.MagicMock(return_value=np.eye(768, dtype='float32')[0])
+        
+        service = RAGService()
+        first = service.query("iphone kampanyası nedir", k=3)
+        service.query("iphone kampanyası nedir", k=3)
+        
+        assert first["candidate_sizes"]["timed_out"] == timed_out
+        assert mock_retriever.hybrid_search.call_count == 2
+        assert mock_generator.generate.call_count == 2
+        assert service.retrieval_cache.stats()["size"] == 0
+        assert service.answer_cache.stats()["size"] == 0
+        assert service.semantic_cache.stats()["size"] == 0
+    
+    def test_semantic_cache(self, mocker, mock_retriever, mock_generator):
+        mocker.patch('services.rag.service.config.semantic_cache_size', 16)
+        mocker.patch('services.rag.service.EmbeddingService')
+        mocker.patch('services.rag.service.VectorStore')
+        mocker.patch('services.rag.service.Retriever', return_value=mock_retriever)
+        mocker.patch('services.rag.service.ResponseGenerator', return_value=mock_generator)
+        mocker.patch('services.rag.service.Chunker')
+        mock_retriever.hybrid_search = mocker.MagicMock(return_value=[
+            {"text": "test chunk", "campaign_id": "test-1", "score": 0.5, "title": "Test"}
+        ])
+        vectors = {
+            "iphone kampanyası nedir": np.eye(768, dtype='float32')[0],
+            "iphone kampanyası ne": np.eye(768, dtype='float32')[0] + np.eye(768, dtype='float32')[1] * 0.05,
+            "opet indirimi": np.eye(768, dtype='float32')[2]
+        }
+        mock_retriever.embed_query = mocker.MagicMock(side_effect=lambda question: vectors[question])
+        
+        service = RAGService()
+        first = service.query("iphone kampanyası nedir", k=3)
+        similar = service.query("iphone kampanyası ne", k=3)
+        service.query("opet indirimi", k=3)
+        
+        assert similar == first
+        assert mock_retriever.hybrid_search.call_count == 2
+        assert mock_generator.generate.call_count == 2
+        assert service.semantic_cache.stats()["hits"] == 1
 
@@ -0,0 +1,58 @@
+import pytest
+import sys
+from pathlib import Path
+import numpy as np
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from services.rag.semantic_cache import SemanticCache
+
+
+def unit(*values):
+    vector = np.array(values, dtype='float32')
+    return vector / np.linalg.norm(vector)
+
+
+class TestSemanticCache:
+    def test_similar_query_hits(self):
+        cache = SemanticCache(dimension=3, max_size=4, max_distance=0.05, ttl=60)
+        cache.put(unit(1, 0, 0), "params", 1, "answer")
+
+        assert cache.get(unit(1, 0.1, 0) * 5, "params", 1) == "answer"
+        assert cache.get(unit(1, 1, 0), "params", 1) is None
+        assert cache.stats() == {"size": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    def test_params_and_index_version_must_match(self):
+        cache = SemanticCache(dimension=3, max_size=4, max_distance=0.05, ttl=60)
+        cache.put(unit(1, 0, 0), "k=3", 1, "old")
+        cache.put(unit(1, 0, 0), "k=5", 1, "other")
+
+        assert cache.get(unit(1, 0, 0), "k=3", 1) == "old"
+        assert cache.get(unit(1, 0, 0), "k=3", 2) is None
+
+    def test_oldest_evicted_and_expired(self, mocker):
+        monotonic = mocker.patch('services.rag.semantic_cache.time.monotonic', return_value=0.0)
+        cache = SemanticCache(dimension=3, max_size=2, max_distance=0.05, ttl=10)
+        cache.put(unit(1, 0, 0), None, 1, "a")
+        cache.put(unit(0, 1, 0), None, 1, "b")
+        cache.put(unit(0, 0, 1), None, 1, "c")
+
+        assert cache.index.ntotal == 2
+        assert cache.get(unit(1, 0, 0), None, 1) is None
+        assert cache.get(unit(0, 1, 0), None, 1) == "b"
+
+        monotonic.return_value = 11.0
+        assert cache.get(unit(0, 0, 1), None, 1) is None
+
+    def test_disabled_and_clear(self):
+        disabled = SemanticCache(dimension=3, max_size=0, max_distance=0.05, ttl=60)
+        disabled.put(unit(1, 0, 0), None, 1, "a")
+        cache = SemanticCache(dimension=3, max_size=2, max_distance=0.05, ttl=60)
+        cache.put(unit(1, 0, 0), None, 1, "a")
+        cache.clear()
+
+        assert disabled.get(unit(1, 0, 0), None, 1) is None
+        assert cache.get(unit(1, 0, 0), None, 1) is None
+        assert cache.index.ntotal == 0
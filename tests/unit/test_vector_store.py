@@ -0,0 +1,345 @@
+import pytest
+import sys
+from pathlib import Path
+import faiss
+import numpy as np
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from services.rag.vector_store import VectorStore, build_index
+from services.rag.chunk_store import ChunkStore
+
+
+def make_corpus(n: int, dimension: int = 16):
+    rng = np.random.default_rng(0)
+    vectors = rng.random((n, dimension)).astype('float32')
+    chunks = [{"text": f"chunk {i}", "campaign_id": f"campaign-{i // 4}", "chunk_index": i % 4} for i in range(n)]
+    return vectors, chunks
+
+
+def stored_codes(index):
+    """Codes array holding the stored vectors of a flat or HNSW index"""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexIDMap2):
+        index = faiss.downcast_index(index.index)
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    return index.codes
+
+
+class TestVectorStore:
+    def test_flat_search(self, tmp_path):
+        vectors, chunks = make_corpus(20)
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path))
+        store.add_vectors(vectors, chunks)
+
+        results = store.search(vectors[3], k=3)
+
+        assert store.index_type == "flat"
+        assert results[0]["text"] == "chunk 3"
+        assert results[0]["rank"] == 1
+
+    def test_search_batch(self, tmp_path):
+        vectors, chunks = make_corpus(20)
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path))
+        store.add_vectors(vectors, chunks)
+
+        batch = store.search_batch(vectors[[2, 9, 15]], k=3)
+
+        assert [results[0]["text"] for results in batch] == ["chunk 2", "chunk 9", "chunk 15"]
+        assert batch[1] == store.search(vectors[9], k=3)
+
+    @pytest.mark.parametrize("index_type", ["ivf", "hnsw", "ivfpq"])
+    def test_index_type_persisted(self, tmp_path, index_type, mocker):
+        mocker.patch('services.rag.vector_store.config.pq_m', 4)
+        vectors, chunks = make_corpus(2000)
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path), index_type=index_type)
+        store.create_new_index()
+        store.add_vectors(vectors, chunks)
+        store.save_index()
+
+        loaded = VectorStore(dimension=16, index_base_path=str(tmp_path))
+
+        assert loaded.index_type == index_type
+        assert loaded.index.ntotal == 2000
+        assert loaded.search(vectors[7], k=1)[0]["text"] == "chunk 7"
+
+    @pytest.mark.parametrize("index_type,storage", [("flat", "float32"), ("flat", "sq8"), ("hnsw", "float32")])
+    def test_mmap_load(self, tmp_path, index_type, storage):
+        vectors, chunks = make_corpus(20)
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path), index_type=index_type, storage=storage)
+        store.create_new_index()
+        store.add_vectors(vectors, chunks)
+        store.save_index()
+
+        loaded = VectorStore(dimension=16, index_base_path=str(tmp_path), use_mmap=True)
+
+        assert isinstance(loaded.chunks, ChunkStore)
+        assert loaded.mmap_loaded
+        assert not stored_codes(loaded.index).is_owned
+        assert loaded.search(vectors[5], k=1)[0]["text"] == "chunk 5"
+        assert loaded.chunks[-1] == chunks[-1]
+
+        loaded.add_vectors(vectors[:2], chunks[:2])
+
+        assert loaded.index.ntotal == 22
+        assert isinstance(loaded.chunks, list)
+
+    @pytest.mark.parametrize("index_type", ["flat", "ivf", "hnsw"])
+    def test_upsert_and_remove_campaign(self, tmp_path, index_type):
+        vectors, chunks = make_corpus(400)
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path), index_type=index_type)
+        store.create_new_index()
+        store.add_vectors(vectors, chunks)
+
+        removed = store.remove_campaign("campaign-1")
+
+        assert removed == 4
+        assert store.index.ntotal == 396
+        assert all(result["campaign_id"] != "campaign-1" for result in store.search(vectors[5], k=10))
+
+        new_vectors = vectors[4:6] + 0.001
+        new_chunks = [{"text": f"updated {i}", "campaign_id": "campaign-2", "chunk_index": i} for i in range(2)]
+        store.upsert_campaign("campaign-2", new_vectors, new_chunks)
+
+        assert store.index.ntotal == 394
+        assert store.search(new_vectors[0], k=1)[0]["text"] == "updated 0"
+        assert list(store.chunk_ids) == sorted(store.chunk_ids)
+
+    @pytest.mark.parametrize("index_type", ["flat", "ivf"])
+    def test_updates_persisted(self, tmp_path, index_type):
+        vectors, chunks = make_corpus(400)
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path), index_type=index_type)
+        store.create_new_index()
+        store.add_vectors(vectors, chunks)
+        store.remove_campaign("campaign-0")
+        store.campaign_hashes = {"campaign-1": "abc"}
+        store.save_index()
+
+        loaded = VectorStore(dimension=16, index_base_path=str(tmp_path), use_mmap=True)
+
+        assert loaded.supports_updates()
+        assert loaded.campaign_hashes == {"campaign-1": "abc"}
+        assert loaded.search(vectors[10], k=1)[0]["chunk_id"] == 10
+
+        loaded.remove_campaign("campaign-2")
+
+        assert loaded.index.ntotal == 392
+        assert loaded.search(vectors[20], k=1)[0]["chunk_id"] == 20
+
+    @pytest.mark.parametrize("index_type,storage", [("flat", "sq8"), ("hnsw", "fp16"), ("ivf", "sq8")])
+    def test_compressed_storage_persisted(self, tmp_path, index_type, storage, mocker):
+        mocker.patch('services.rag.vector_store.config.vector_rescore_factor', 4)
+        vectors, chunks = make_corpus(400)
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path), index_type=index_type)
+        store.create_new_index(storage=storage)
+        store.add_vectors(vectors, chunks)
+        store.save_index()
+
+        loaded = VectorStore(dimension=16, index_base_path=str(tmp_path), use_mmap=True)
+        result = loaded.search(vectors[7], k=3)[0]
+
+        assert loaded.storage == storage
+        assert loaded.vectors.shape == (400, 16)
+        assert result["chunk_id"] == 7
+        assert result["score"] == pytest.approx(0.0)
+
+    def test_rescore_uses_exact_distances(self, tmp_path, mocker):
+        mocker.patch('services.rag.vector_store.config.vector_rescore_factor', 5)
+        vectors, chunks = make_corpus(400)
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path), storage="sq8")
+        store.add_vectors(vectors, chunks)
+        query = vectors[11] + 0.01
+
+        results = store.search(query, k=5)
+        exact = np.sum((vectors - query) ** 2, axis=1)
+
+        assert [r["chunk_id"] for r in results] == list(np.argsort(exact)[:5])
+        assert [r["score"] for r in results] == pytest.approx(sorted(exact)[:5], rel=1e-5)
+
+        store.remove_campaign("campaign-2")
+
+        assert store.vectors.shape == (396, 16)
+        assert all(r["chunk_id"] not in (8, 9, 10, 11) for r in store.search(query, k=5))
+
+    def test_float32_storage_keeps_no_vector_copy(self, tmp_path):
+        vectors, chunks = make_corpus(20)
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path))
+        store.add_vectors(vectors, chunks)
+
+        assert store.vectors is None
+
+    @pytest.mark.parametrize("storage", ["float32", "sq8"])
+    def test_chunk_vectors(self, tmp_path, storage):
+        vectors, chunks = make_corpus(20)
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path), storage=storage)
+        store.add_vectors(vectors, chunks)
+
+        chunk_vectors, found = store.chunk_vectors([3, 19, 42])
+
+        assert list(found) == [True, True, False]
+        assert chunk_vectors[:2] == pytest.approx(vectors[[3, 19]])
+        assert not chunk_vectors[2].any()
+
+    @pytest.mark.parametrize("index_type", ["flat", "ivf", "hnsw"])
+    @pytest.mark.parametrize("exact_limit", [0, 2048])
+    def test_filtered_search(self, tmp_path, index_type, exact_limit, mocker):
+        mocker.patch('services.rag.vector_store.config.vector_filter_exact_limit', exact_limit)
+        vectors, chunks = make_corpus(400)
+        for chunk in chunks:
+            chunk["type"] = "title_description" if chunk["chunk_index"] == 0 else "cleaned_text"
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path), index_type=index_type)
+        store.create_new_index()
+        store.add_vectors(vectors, chunks)
+
+        by_campaign = store.search(vectors[0], k=10, filters={"campaign_ids": ["campaign-7", "campaign-8"]})
+        by_type = store.search(vectors[1], k=5, filters={"types": ["title_description"]})
+
+        assert sorted(r["chunk_id"] for r in by_campaign) == list(range(28, 36))
+        assert len(by_type) == 5
+        assert all(r["type"] == "title_description" for r in by_type)
+        assert store.search(vectors[0], k=5, filters={"campaign_ids": ["unknown"]}) == []
+
+    def test_chunk_store_field_mask(self, tmp_path):
+        vectors, chunks = make_corpus(20)
+        for chunk in chunks:
+            chunk["type"] = "title_description" if chunk["chunk_index"] == 0 else "cleaned_text"
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path))
+        store.create_new_index()
+        store.add_vectors(vectors, chunks)
+        store.save_index()
+
+        loaded = VectorStore(dimension=16, index_base_path=str(tmp_path), use_mmap=True)
+
+        assert np.flatnonzero(loaded.chunks.field_mask("type", "title_description")).tolist() == [0, 4, 8, 12, 16]
+        assert np.flatnonzero(loaded.chunks.field_mask("campaign_id", "campaign-2")).tolist() == [8, 9, 10, 11]
+        assert not loaded.chunks.field_mask("type", "unknown").any()
+        assert not loaded.chunks.field_mask("campaign_id", "unknown").any()
+
+    def test_filter_by_indexed_at(self, tmp_path, mocker):
+        vectors, chunks = make_corpus(20)
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path))
+        store.create_new_index()
+        mocker.patch('services.rag.vector_store.time.time', return_value=1000)
+        store.add_vectors(vectors[:10], chunks[:10])
+        mocker.patch('services.rag.vector_store.time.time', return_value=2000)
+        store.add_vectors(vectors[10:], chunks[10:])
+        store.save_index()
+
+        loaded = VectorStore(dimension=16, index_base_path=str(tmp_path), use_mmap=True)
+        results = loaded.search(vectors[0], k=20, filters={"indexed_after": 1500, "campaign_ids": ["campaign-2", "campaign-3"]})
+
+        assert sorted(r["chunk_id"] for r in results) == list(range(10, 16))
+        assert loaded.filter_mask({"indexed_before": 1500}).sum() == 10
+        with pytest.raises(ValueError):
+            loaded.filter_mask({"date": 0})
+
+    def test_manifest_tracks_current_index(self, tmp_path, mocker):
+        mocker.patch('services.rag.vector_store.config.vector_index_retention', 2)
+        vectors, chunks = make_corpus(20)
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path))
+        for name in ["index_1", "index_2", "index_3"]:
+            store.add_vectors(vectors[:2], chunks[:2])
+            store.save_index(name)
+        (tmp_path / "index_9").mkdir()
+
+        manifest = store.read_manifest()
+
+        assert manifest["current"] == "index_3"
+        assert [entry["name"] for entry in manifest["indexes"]] == ["index_2", "index_3"]
+        assert manifest["indexes"][-1]["ntotal"] == 6
+        assert "index.faiss" in manifest["indexes"][-1]["checksums"]
+        assert not (tmp_path / "index_1").exists()
+        assert store.find_latest_index() == "index_3"
+        assert VectorStore(dimension=16, index_base_path=str(tmp_path)).index.ntotal == 6
+
+    def test_builds_in_same_instant_get_distinct_names(self, tmp_path, mocker):
+        from datetime import datetime
+        mocker.patch('services.rag.vector_store.config.vector_index_retention', 5)
+        mocker.patch('services.rag.vector_store.datetime').now.return_value = datetime(2026, 1, 1, 12, 0, 0)
+        vectors, chunks = make_corpus(20)
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path))
+
+        names = []
+        for n in (5, 10):
+            store.create_new_index()
+            store.add_vectors(vectors[:n], chunks[:n])
+            store.save_index()
+            names.append(store.current_index_name)
+
+        manifest = store.read_manifest()
+
+        assert names[0] != names[1]
+        assert [entry["name"] for entry in manifest["indexes"]] == names
+        assert all((tmp_path / name / "index.faiss").exists() for name in names)
+        assert [entry["ntotal"] for entry in manifest["indexes"]] == [5, 10]
+
+    def test_incremental_build_in_same_second_keeps_live_index(self, tmp_path, mocker):
+        from datetime import datetime
+        mocker.patch('services.rag.vector_store.config.vector_index_retention', 5)
+        mocker.patch('services.rag.vector_store.datetime').now.return_value = datetime(2026, 1, 1, 12, 0, 0)
+        vectors, chunks = make_corpus(20)
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path))
+        store.create_new_index()
+        store.add_vectors(vectors, chunks)
+        store.save_index()
+        live = VectorStore(dimension=16, index_base_path=str(tmp_path), use_mmap=True)
+
+        for _ in range(2):
+            build = VectorStore(dimension=16, index_base_path=str(tmp_path), index_name=live.current_index_name, use_mmap=True)
+            build.remove_campaigns(["campaign-0"])
+            build.save_index(build.new_index_name())
+
+        assert live.chunks[0]["text"] == "chunk 0"
+        assert live.search(vectors[3], k=1)[0]["text"] == "chunk 3"
+        assert len({entry["name"] for entry in store.read_manifest()["indexes"]}) == 3
+        assert live.verify_index(live.current_index_name)
+        with pytest.raises(ValueError):
+            build.save_index(live.current_index_name)
+
+    def test_verify_falls_back_to_retained_index(self, tmp_path, mocker):
+        mocker.patch('services.rag.vector_store.config.vector_index_verify', True)
+        vectors, chunks = make_corpus(20)
+        store = VectorStore(dimension=16, index_base_path=str(tmp_path))
+        store.add_vectors(vectors[:5], chunks[:5])
+        store.save_index("index_1")
+        store.add_vectors(vectors[5:], chunks[5:])
+        store.save_index("index_2")
+        with open(tmp_path / "index_2" / "chunks_text.bin", "ab") as f:
+            f.write(b"corrupt")
+
+        loaded = VectorStore(dimension=16, index_base_path=str(tmp_path))
+
+        assert not store.verify_index("index_2")
+        assert loaded.current_index_name == "index_1"
+        assert loaded.index.ntotal == 5
+
+    def test_chunk_store_round_trip(self, tmp_path):
+        chunks = [
+            {"text": "Otoking kampanyası", "campaign_id": "otoking", "title": "Auto King", "chunk_index": 0, "type": "title_description"},
+            {"text": "kayan pencere ğüşıöç", "campaign_id": "otoking", "chunk_index": 1, "start_pos": 0, "end_pos": 300},
+            {"text": "", "campaign_id": "bos", "title": "", "chunk_index": 0, "type": "fallback"}
+        ]
+        ChunkStore.write(chunks, tmp_path)
+
+        store = ChunkStore(tmp_path, use_mmap=False)
+
+        assert len(store) == 3
+        assert store.to_list() == chunks
+        assert store.campaign_id(2) == "bos"
+        assert store.campaign_ids == ["otoking", "bos"]
+
+    def test_small_corpus_falls_back(self, mocker):
+        mocker.patch('services.rag.vector_store.config.pq_m', 4)
+        index, index_type = build_index("ivfpq", 16, 50)
+
+        assert index_type == "ivf"
+        assert not index.is_trained
+
+    def test_invalid_index_type(self, tmp_path):
+        with pytest.raises(ValueError):
+            VectorStore(dimension=16, index_base_path=str(tmp_path), index_type="lsh")
+        with pytest.raises(ValueError):
+            VectorStore(dimension=16, index_base_path=str(tmp_path), storage="int4")